@@ -1,96 +1,54 @@
 import streamlit as st
-import plotly.graph_objects as go
 import pandas as pd
-from fpdf import FPDF
+import uuid
 from datetime import datetime
-import io
+from motor.nomina import TIPOS_CONTRATO, NominaIncremental
+from motor.contratos import optimizar_contratos
+from motor.precios import COLUMNAS_CATALOGO, COLUMNAS_OPCIONALES, COLUMNAS_PRECIO, carga_fijos_unitaria, cargar_catalogo, costo_mano_obra, precio_venta, precios_catalogo
+from motor.planillas import COLUMNAS_IMPORTACION, COLUMNAS_RESULTADO, cargar_planillas, detalle_por_rol, guardar_planillas, resumen_reporte
+from motor.financiero import EntradasFinancieras, calcular_diagnostico
+from motor.reglas import MOTOR_REGLAS
+from motor.historico import VENTANA_DEFECTO, VENTANAS_MOVILES, cargar_historico, tendencia_ventana
+from motor.ingesta_libro import agregar_libro, leer_mapeo
+from motor.almacen import AlmacenHistoricos
+from motor.portafolio import VENTANA_PORTAFOLIO, cargar_portafolio, filtrar_portafolio
+from motor.reporte import COLA_REPORTES, DatosReporte
+from motor.trabajos import EN_COLA, LISTO
+from motor.cache import huella_entradas
+from motor.recursos import CSS_APP, plantilla_csv
+from motor.latencias import FASE_TOTAL, LATENCIAS_PROCESO, AgregadorLatencias, RegistroRerun, escribir_registro
+from motor.editor import aplicar_cambios_editor
+from motor.graficos import (
+    figura_cascada, figura_mandibulas, figura_tendencia, figura_talento, figura_reloj_alquiler,
+    figura_reloj_nomina, figura_equilibrio, figura_simulador, figura_distribucion,
+    figura_mapa_sensibilidad, figura_tornado,
+)
+from motor.simulacion import (
+    META_LEGADO, TIPOS_DISTRIBUCION, Palanca, simular_montecarlo,
+    superficie_sensibilidad, impacto_palancas, combinacion_minima,
+)
 
 # ==========================================
 # CONFIGURACIÓN INICIAL Y ESTILOS
 # ==========================================
 st.set_page_config(page_title="Mi Director Financiero | App de Estrategia de Blindaje y Soberanía Patrimonial de SG Group", layout="wide", initial_sidebar_state="expanded")
 
-# ==========================================
-# 🇵🇦 MOTOR DE CÁLCULO NÓMINA PANAMÁ
-# ==========================================
-def calcular_carga_panama(salario, tipo):
-    """
-    Calcula el Costo Real para la empresa y el Neto para el empleado
-    basado en las leyes laborales de Panamá 2026.
-    """
-    if salario <= 0: return 0, 0, 0
-    
-    if tipo == "Planilla (Carga Patronal)":
-        # 1. Costos Patronales (Lo que paga la empresa ADICIONAL)
-        ss_patronal = salario * 0.1225
-        se_patronal = salario * 0.0150
-        rp_patronal = salario * 0.0150 # Riesgos Profesionales (Promedio)
-        decimo_prov = salario / 12     # Provisión XIII Mes (8.33%)
-        
-        carga_patronal = ss_patronal + se_patronal + rp_patronal + decimo_prov
-        costo_real_empresa = salario + carga_patronal
-        
-        # 2. Retenciones al Empleado (Lo que se descuenta)
-        ss_empleado = salario * 0.0975
-        se_empleado = salario * 0.0125
-        
-        # ISR (Tabla DGI Mensual 2025/2026 Proyectada)
-        isr_empleado = 0
-        if salario > 846.15:
-            excedente = salario - 846.15
-            isr_empleado = excedente * 0.15
-            
-        retenciones = ss_empleado + se_empleado + isr_empleado
-        salario_neto = salario - retenciones
-        
-        return costo_real_empresa, salario_neto, retenciones
-
-    elif tipo == "Servicios Profesionales (Freelance)":
-        # Empresa paga el bruto, pero retiene ISR si aplica o asume gasto
-        costo_real_empresa = salario 
-        
-        # Retención 10% (Si no presenta paz y salvo, práctica común retener)
-        retencion_10 = salario * 0.10
-        salario_neto = salario - retencion_10
-        
-        return costo_real_empresa, salario_neto, retencion_10
-    
-    return salario, salario, 0
-
 # Inicialización de Memoria (Session State)
 if 'lab_precios' not in st.session_state:
     st.session_state.lab_precios = []
+if 'id_sesion' not in st.session_state:
+    st.session_state.id_sesion = uuid.uuid4().hex[:8]
+    st.session_state.latencias_sesion = AgregadorLatencias()
 
-# ESTILOS CSS (DISEÑO VISUAL RECUPERADO)
-st.markdown("""
-    <style>
-    /* Estilos Generales */
-    .metric-card { background-color: #ffffff; padding: 20px; border-radius: 10px; border-left: 5px solid #1565c0; box-shadow: 0 4px 6px rgba(0,0,0,0.1); }
-    
-    /* Cajas de Diagnóstico (Tab 1) */
-    .power-level-title { font-size: 16px; font-weight: bold; color: #1565c0; margin-top: 15px; margin-bottom: 5px; text-transform: uppercase; }
-    .power-value { font-size: 22px; font-weight: bold; color: #000000; margin-bottom: 5px; }
-    
-    .check-box-success { 
-        background-color: #2e7d32; color: white; padding: 10px; border-radius: 5px; 
-        font-weight: bold; display: flex; align-items: center; margin-bottom: 10px; border-left: 5px solid #1b5e20;
-    }
-    .check-box-warning { 
-        background-color: #fbc02d; color: black; padding: 10px; border-radius: 5px; 
-        font-weight: bold; display: flex; align-items: center; margin-bottom: 10px; border-left: 5px solid #f57f17;
-    }
-    .check-box-danger { 
-        background-color: #c62828; color: white; padding: 10px; border-radius: 5px; 
-        font-weight: bold; display: flex; align-items: center; margin-bottom: 10px; border-left: 5px solid #b71c1c;
-    }
-
-    /* Estilos Nuevos V2.5 */
-    .verdict-box { background-color: #263238; color: #ffffff; padding: 20px; border-radius: 10px; margin-bottom: 20px; border-left: 8px solid #ffca28; box-shadow: 0 4px 10px rgba(0,0,0,0.2); }
-    .money-trap { background-color: #ffebee; padding: 20px; border-radius: 10px; border-left: 5px solid #c62828; }
-    .valuation-box { background-color: #e3f2fd; padding: 20px; border-radius: 10px; border-left: 5px solid #1565c0; }
-    .legal-footer { font-size: 10px; color: #777; margin-top: 10px; font-style: italic; border-top: 1px solid #ddd; padding-top: 5px;}
-    </style>
-    """, unsafe_allow_html=True)
+# Planillas grandes: el editor muestra una página y el gráfico de talento los roles más costosos
+FILAS_POR_PAGINA_NOMINA = 100
+MAX_ROLES_GRAFICO_TALENTO = 25
+
+# Latencia por fase de este rerun (panel 🩺 y archivo de latencias, ver motor.latencias)
+latencias = RegistroRerun(st.session_state.id_sesion)
+
+# ESTILOS CSS (motor.recursos: se construyen una vez por proceso)
+st.markdown(CSS_APP, unsafe_allow_html=True)
 
 st.title("🚀 Mi Director Financiero | App de Estrategia de Blindaje y Soberanía Patrimonial de SG Group")
 st.markdown("**Versión 2.5:** Diagnóstico Flash, Tendencias 'Mandíbulas', Valoración Patrimonial e Ingeniería de Precios.")
@@ -98,7 +56,7 @@ st.markdown("**Versión 2.5:** Diagnóstico Flash, Tendencias 'Mandíbulas', Val
 # ==========================================
 # BARRA LATERAL: MOTOR DE MODOS (A/B)
 # ==========================================
-with st.sidebar:
+with st.sidebar, latencias.fase("Barra lateral"):
     st.header("1. Modo de Operación")
     
     # SELECTOR DE MODO
@@ -122,6 +80,11 @@ with st.sidebar:
     impuestos_mes = 0.0
     
     df_historico = None 
+    historico = None
+    ventana_meses = None
+    tendencia = None
+    cliente_por_guardar = None
+    detalles_nomina = None
 
     # --- LÓGICA MODO A: FLASH (INPUT MANUAL CON MOTOR DE TALENTO) ---
     if modo_operacion == "Modo A: Diagnóstico Flash (Foto)":
@@ -143,14 +106,39 @@ with st.sidebar:
                      {"Nombre": "Contador Ext", "Tipo": "Servicios Profesionales (Freelance)", "Salario Pactado": 300.0}]
                 )
 
+            # Resultados por fila y totales acumulados; se recalcula todo solo si
+            # df_nomina se reemplazó por fuera del editor (ej. sesión nueva)
+            nomina = st.session_state.get('nomina_incremental')
+            if nomina is None or nomina.df is not st.session_state.df_nomina:
+                with latencias.fase("Nómina"):
+                    nomina = st.session_state.nomina_incremental = NominaIncremental(st.session_state.df_nomina)
+                st.session_state.df_nomina = nomina.df
+
+            # Paginación: el navegador recibe solo la página visible
+            paginas = max(1, -(-len(nomina) // FILAS_POR_PAGINA_NOMINA))
+            pagina = 1
+            if paginas > 1:
+                st.session_state.pagina_nomina = min(st.session_state.get('pagina_nomina', 1), paginas)
+                pagina = st.number_input("Página de la planilla", min_value=1, max_value=paginas, key="pagina_nomina")
+                st.caption(f"{len(nomina):,} empleados en {paginas} páginas. Las filas nuevas se agregan al final.")
+            desde_fila = (pagina - 1) * FILAS_POR_PAGINA_NOMINA
+
+            # Solo las filas editadas, agregadas o borradas se recalculan (NominaIncremental)
+            def _consolidar_nomina(clave, desplazamiento):
+                st.session_state.df_nomina = st.session_state.nomina_incremental.aplicar_cambios(st.session_state[clave], desplazamiento)
+
             # Editor Interactivo
-            df_editado = st.data_editor(
-                st.session_state.df_nomina,
+            clave_editor = f"editor_nomina_{pagina}"
+            st.data_editor(
+                nomina.df.iloc[desde_fila:desde_fila + FILAS_POR_PAGINA_NOMINA],
+                key=clave_editor,
+                on_change=_consolidar_nomina,
+                args=(clave_editor, desde_fila),
                 num_rows="dynamic",
                 column_config={
                     "Tipo": st.column_config.SelectboxColumn(
                         "Tipo Contrato",
-                        options=["Planilla (Carga Patronal)", "Servicios Profesionales (Freelance)"],
+                        options=TIPOS_CONTRATO,
                         required=True
                     ),
                     "Salario Pactado": st.column_config.NumberColumn(
@@ -163,28 +151,39 @@ with st.sidebar:
                 use_container_width=True
             )
             
-            # CÁLCULO EN TIEMPO REAL
-            costo_total_talento = 0.0
-            neto_total_equipo = 0.0
-            
-            # Iteramos para calcular costos ocultos
-            detalles_nomina = []
-            for index, row in df_editado.iterrows():
-                c_real, c_neto, ret = calcular_carga_panama(row['Salario Pactado'], row['Tipo'])
-                costo_total_talento += c_real
-                neto_total_equipo += c_neto
-                detalles_nomina.append({
-                    "Rol": row['Nombre'],
-                    "Costo Empresa": c_real,
-                    "Bolsillo Empleado": c_neto,
-                    "Retenciones Estado": ret
-                })
+            # CÁLCULO EN TIEMPO REAL (totales acumulados, sin recorrer la planilla)
+            detalles_nomina = nomina.detalle()
+            costo_total_talento = nomina.costo_total
+            neto_total_equipo = nomina.neto_total
             
             # ASIGNACIÓN A LA VARIABLE GLOBAL (Esto mueve la Mandíbula)
             gasto_planilla_mes = costo_total_talento
             
             st.markdown(f"**💰 Costo Real Nómina:** :red[${gasto_planilla_mes:,.2f}]")
-            st.caption(f"(Incluye Cargas Sociales Panamá: ${gasto_planilla_mes - df_editado['Salario Pactado'].sum():,.2f})")
+            st.caption(f"(Incluye Cargas Sociales Panamá: ${gasto_planilla_mes - nomina.df['Salario Pactado'].sum():,.2f})")
+
+        with st.expander("⚖️ Optimizador de Contratos", expanded=False):
+            st.caption("Evalúa a todo el equipo en Planilla y en Servicios Profesionales y sugiere la combinación de menor costo.")
+            if st.toggle("Calcular asignación óptima", value=False, key="optimizar_contratos"):
+                max_freelance_pct = st.slider("Máximo % del equipo como freelance", 0, 100, 20, key="opt_max_freelance")
+                protegidos = st.multiselect("Roles protegidos (conservan su contrato)", nomina.df['Nombre'].dropna().unique(), key="opt_protegidos")
+                with latencias.fase("Optimizador de contratos"):
+                    optimizacion = optimizar_contratos(nomina.df, max_freelance_pct, protegidos)
+
+                st.metric("Costo Óptimo", f"${optimizacion.costo_optimo:,.2f}", f"-${optimizacion.ahorro:,.2f}" if optimizacion.ahorro > 0 else "Sin ahorro", delta_color="inverse" if optimizacion.ahorro > 0 else "off")
+                st.line_chart(optimizacion.frontera, x="% Freelance", y="Costo Empresa", height=180)
+                cambios = optimizacion.cambios
+                if cambios.empty:
+                    st.success("La asignación actual ya es la de menor costo con estas restricciones.")
+                else:
+                    st.caption(f"{len(cambios):,} cambios de contrato sugeridos (se muestran los de mayor impacto).")
+                    st.dataframe(cambios.reindex(cambios["Ahorro"].abs().sort_values(ascending=False).index)
+                                 [["Rol", "Tipo Sugerido", "Ahorro"]].head(FILAS_POR_PAGINA_NOMINA),
+                                 hide_index=True, use_container_width=True)
+                    if st.button("Aplicar asignación sugerida", key="aplicar_contratos"):
+                        st.session_state.df_nomina = nomina.df.assign(Tipo=optimizacion.detalle["Tipo Sugerido"].to_numpy())
+                        st.rerun()
+                st.caption("⚠️ Solo es freelance quien trabaja sin subordinación ni horario fijo: reclasificar a un empleado es un riesgo laboral (Código de Trabajo).")
 
         with st.expander("3. Otros Gastos Operativos (OPEX)", expanded=False):
             gasto_alquiler_mes = st.number_input("Alquiler + CAM", value=5000.0, step=100.0)
@@ -196,35 +195,101 @@ with st.sidebar:
 
     # --- LÓGICA MODO B: ESTRATEGA (CARGA EXCEL) ---
     else:
-        st.info("🎥 **Modo Estratega:** Analizamos la tendencia de 12 meses.")
+        st.info("🎥 **Modo Estratega:** Analizamos la tendencia de tu histórico mensual en la ventana que elijas.")
         
-        data_plantilla = {
-            'Mes': ['Ene', 'Feb', 'Mar', 'Abr', 'May', 'Jun', 'Jul', 'Ago', 'Sep', 'Oct', 'Nov', 'Dic'],
-            'Ventas': [50000]*12, 'Costo_Ventas': [30000]*12,
-            'Alquiler': [5000]*12, 'Planilla': [8000]*12, 'Otros_Gastos': [2000]*12,
-            'Depreciacion': [2000]*12, 'Intereses': [1000]*12, 'Impuestos': [1500]*12
-        }
-        df_plantilla = pd.DataFrame(data_plantilla)
-        csv = df_plantilla.to_csv(index=False).encode('utf-8')
+        # La plantilla se genera al pulsar el botón (y queda en caché del proceso)
+        anio_plantilla = datetime.now().year - 1
+        st.download_button("⬇️ Descargar Plantilla Excel (CSV)", data=lambda: plantilla_csv(anio_plantilla), file_name="plantilla_sg_consulting.csv", mime="text/csv")
         
-        st.download_button("⬇️ Descargar Plantilla Excel (CSV)", data=csv, file_name="plantilla_sg_consulting.csv", mime="text/csv")
+        almacen = AlmacenHistoricos()
+        origen_datos = st.radio("Origen de datos", ["Plantilla mensual", "Libro mayor (transacciones)", "Cliente guardado"], horizontal=True)
         
-        archivo_subido = st.file_uploader("Sube tu archivo (CSV) con 12 meses", type=['csv'])
+        if origen_datos == "Plantilla mensual":
+            archivo_subido = st.file_uploader("Sube tu archivo (CSV, Parquet o Arrow) con 12 meses o más", type=['csv', 'parquet', 'arrow'])
+        elif origen_datos == "Cliente guardado":
+            clientes_guardados = almacen.clientes()
+            cliente_elegido = st.selectbox("Cliente", clientes_guardados, index=None, placeholder="Elige un cliente guardado...")
+            archivo_subido = None
+        else:
+            archivo_subido = st.file_uploader("Sube el libro mayor exportado (CSV)", type=['csv'], key="libro_mayor")
+            with st.expander("⚙️ Columnas del libro mayor"):
+                col_fecha = st.text_input("Columna de fecha", value="Fecha")
+                col_cuenta = st.text_input("Columna de cuenta", value="Cuenta")
+                col_monto = st.text_input("Columna de monto", value="Monto")
+                usar_debe_haber = st.checkbox("El libro trae Debe/Haber en columnas separadas")
+                col_debe = st.text_input("Columna Debe", value="Debe", disabled=not usar_debe_haber)
+                col_haber = st.text_input("Columna Haber", value="Haber", disabled=not usar_debe_haber)
+                naturaleza_contable = st.checkbox("Créditos en negativo (Ventas con signo contable)")
+                archivo_mapeo = st.file_uploader("Mapeo de cuentas (CSV Cuenta,Categoria)", type=['csv'], key="mapeo_cuentas")
         
-        if archivo_subido is not None:
+        if archivo_subido is not None or (origen_datos == "Cliente guardado" and cliente_elegido):
             try:
-                df_historico = pd.read_csv(archivo_subido)
+                # Caché por contenido: el archivo se procesa una sola vez (no en cada rerun)
+                if origen_datos == "Cliente guardado":
+                    with latencias.fase("Lectura de histórico"):
+                        historico = almacen.cargar_historico(cliente_elegido)
+                        planilla_cliente = almacen.cargar_planilla(cliente_elegido)
+                    # Planilla importada del cliente: alimenta "Realidad de Nómina" y el PDF
+                    if planilla_cliente is not None:
+                        detalles_nomina = detalle_por_rol(planilla_cliente)
+                        st.caption(f"👥 Planilla guardada: {int(detalles_nomina['Empleados'].sum()):,} empleados, "
+                                   f"costo empresa ${detalles_nomina['Costo Empresa'].sum():,.2f}/mes")
+                elif origen_datos == "Plantilla mensual":
+                    with latencias.fase("Lectura de histórico"):
+                        historico = cargar_historico(archivo_subido.getvalue())
+                else:
+                    # El libro se agrega una sola vez por archivo y configuración (no en cada rerun)
+                    config_libro = (archivo_subido.file_id, col_fecha, col_cuenta, col_monto, usar_debe_haber,
+                                    col_debe, col_haber, naturaleza_contable,
+                                    archivo_mapeo.file_id if archivo_mapeo is not None else None)
+                    if st.session_state.get("libro_config") != config_libro:
+                        with st.spinner("Agregando transacciones por mes..."), latencias.fase("Lectura de libro mayor"):
+                            ingesta = agregar_libro(
+                                archivo_subido, col_fecha, col_cuenta, col_monto,
+                                col_debe if usar_debe_haber else None, col_haber if usar_debe_haber else None,
+                                mapeo=leer_mapeo(archivo_mapeo) if archivo_mapeo is not None else None,
+                                naturaleza_contable=naturaleza_contable,
+                            )
+                        st.session_state["libro_config"] = config_libro
+                        st.session_state["libro_ingesta"] = ingesta
+                    ingesta = st.session_state["libro_ingesta"]
+                    st.caption(f"📚 {ingesta.filas_leidas:,} líneas → {len(ingesta.df_historico)} meses "
+                               f"({ingesta.filas_ignoradas:,} ignoradas)")
+                    if ingesta.cuentas_sin_clasificar:
+                        st.warning("Cuentas sin clasificar (no entran al P&L): "
+                                   + ", ".join(ingesta.cuentas_sin_clasificar[:10]))
+                    with latencias.fase("Lectura de histórico"):
+                        historico = cargar_historico(ingesta.df_historico.to_csv(index=False).encode('utf-8'))
+                df_historico = historico.df
                 st.success("✅ Datos cargados exitosamente")
                 
-                # CÁLCULO DE PROMEDIOS PARA ALIMENTAR LA CASCADA
-                ventas_mes = df_historico['Ventas'].mean()
-                costo_ventas_mes = df_historico['Costo_Ventas'].mean()
-                gasto_alquiler_mes = df_historico['Alquiler'].mean()
-                gasto_planilla_mes = df_historico['Planilla'].mean()
-                gasto_otros_mes = df_historico['Otros_Gastos'].mean()
-                depreciacion_mes = df_historico['Depreciacion'].mean()
-                intereses_mes = df_historico['Intereses'].mean()
-                impuestos_mes = df_historico['Impuestos'].mean()
+                if origen_datos != "Cliente guardado":
+                    with st.expander("💾 Guardar en el almacén de clientes"):
+                        nombre_cliente = st.text_input("Nombre del cliente", key="nombre_cliente_guardar")
+                        if st.button("Guardar histórico", disabled=not nombre_cliente.strip()):
+                            # Se guarda junto con el Balance General, que se captura más abajo
+                            cliente_por_guardar = nombre_cliente.strip()
+                
+                # VENTANA DE ANÁLISIS: Cascada, Mandíbulas e informe usan los últimos N meses
+                opciones_ventana = [v for v in VENTANAS_MOVILES if v < historico.meses] + [None]
+                ventana_meses = st.selectbox(
+                    "Ventana de análisis", opciones_ventana,
+                    index=opciones_ventana.index(VENTANA_DEFECTO) if VENTANA_DEFECTO in opciones_ventana else len(opciones_ventana) - 1,
+                    format_func=lambda v: f"Últimos {v} meses" if v else f"Todo el histórico ({historico.meses} meses)",
+                )
+                tendencia = tendencia_ventana(historico, ventana_meses)
+                st.caption(f"📅 Analizando {tendencia['desde']} a {tendencia['hasta']} ({tendencia['meses']} meses).")
+                
+                # CÁLCULO DE PROMEDIOS PARA ALIMENTAR LA CASCADA (precalculados por ventana)
+                promedios = historico.promedios_ventana(ventana_meses)
+                ventas_mes = promedios['ventas_mes']
+                costo_ventas_mes = promedios['costo_ventas_mes']
+                gasto_alquiler_mes = promedios['gasto_alquiler_mes']
+                gasto_planilla_mes = promedios['gasto_planilla_mes']
+                gasto_otros_mes = promedios['gasto_otros_mes']
+                depreciacion_mes = promedios['depreciacion_mes']
+                intereses_mes = promedios['intereses_mes']
+                impuestos_mes = promedios['impuestos_mes']
                 
             except Exception as e:
                 st.error(f"Error leyendo el archivo: {e}")
@@ -253,57 +318,41 @@ with st.sidebar:
     # --- MULTIPLO PARA SIMULADOR GLOBAL ---
     multiplo_global = st.number_input("Múltiplo EBITDA (Ref. Global)", value=3.0, step=0.5)
 
+    if cliente_por_guardar:
+        almacen.guardar(cliente_por_guardar, df_historico, balance={
+            'caja': caja, 'cuentas_cobrar': cuentas_cobrar, 'inventario': inventario,
+            'cuentas_pagar': cuentas_pagar, 'deuda_bancaria': deuda_bancaria, 'multiplo_global': multiplo_global,
+        })
+        st.toast(f"Histórico de {cliente_por_guardar} guardado")
+
+    # --- RENDIMIENTO ---
+    pestanas_bajo_demanda = st.toggle("⚡ Pestañas bajo demanda", value=True, help="Solo se calcula y dibuja la pestaña que estás viendo.")
+    mostrar_latencias = st.toggle("🩺 Diagnóstico de latencia", value=False, help="Tiempo de cada fase de este rerun y p50/p95 de la sesión y del servidor.")
+
 # ==========================================
 # CÁLCULOS CENTRALES (BACKEND)
 # ==========================================
-gastos_operativos_mes = gasto_alquiler_mes + gasto_planilla_mes + gasto_otros_mes
-
-# 1. Potencia
-utilidad_bruta_mes = ventas_mes - costo_ventas_mes
-margen_bruto = (utilidad_bruta_mes / ventas_mes) * 100 if ventas_mes > 0 else 0
-
-ebitda_mes = utilidad_bruta_mes - gastos_operativos_mes
-margen_ebitda = (ebitda_mes / ventas_mes) * 100 if ventas_mes > 0 else 0
-
-ebit_mes = ebitda_mes - depreciacion_mes
-utilidad_neta_mes = ebit_mes - intereses_mes - impuestos_mes
-margen_neto = (utilidad_neta_mes / ventas_mes) * 100 if ventas_mes > 0 else 0
-
-# 2. Ratios
-ratio_alquiler = (gasto_alquiler_mes / ventas_mes) * 100 if ventas_mes > 0 else 0
-ratio_planilla = (gasto_planilla_mes / utilidad_bruta_mes) * 100 if utilidad_bruta_mes > 0 else 0
-
-# 3. Supervivencia
-costos_fijos_totales_mes = gastos_operativos_mes + intereses_mes
-margen_contribucion_pct = (utilidad_bruta_mes / ventas_mes) if ventas_mes > 0 else 0
-punto_equilibrio_mes = costos_fijos_totales_mes / margen_contribucion_pct if margen_contribucion_pct > 0 else 0
-margen_seguridad_mes = ventas_mes - punto_equilibrio_mes
-
-# 4. Oxígeno (CCC)
-dias_calle = (cuentas_cobrar / ventas_mes) * 30 if ventas_mes > 0 else 0
-dias_inventario = (inventario / costo_ventas_mes) * 30 if costo_ventas_mes > 0 else 0
-dias_proveedor = (cuentas_pagar / costo_ventas_mes) * 30 if costo_ventas_mes > 0 else 0
-ccc = dias_calle + dias_inventario - dias_proveedor
-dinero_atrapado_total = cuentas_cobrar + inventario
-
-# 5. Valoración Actual Base
-valor_empresa_actual_base = (ebitda_mes * 12) * multiplo_global
-
-# 6. Juez Digital
-veredicto_final = ""
-icono_veredicto = "⚖️"
-if ebitda_mes < 0:
-    veredicto_final = "INTERVENCIÓN DE EMERGENCIA. El negocio consume capital. Problema estructural."
-    icono_veredicto = "🚨"
-elif ccc > 60:
-    veredicto_final = "AGUJERO NEGRO. Rentable pero insolvente. Prioridad: Cobrar."
-    icono_veredicto = "🕳️"
-elif ratio_alquiler > 15:
-    veredicto_final = "RIESGO INMOBILIARIO. Trabajas para pagar el local."
-    icono_veredicto = "🏢"
-else:
-    veredicto_final = "EMPRESA SALUDABLE Y ESCALABLE. Listo para crecer."
-    icono_veredicto = "✅"
+with latencias.fase("Cálculos centrales (KPIs)"):
+    entradas = EntradasFinancieras(
+        ventas_mes=ventas_mes, costo_ventas_mes=costo_ventas_mes,
+        gasto_alquiler_mes=gasto_alquiler_mes, gasto_planilla_mes=gasto_planilla_mes, gasto_otros_mes=gasto_otros_mes,
+        depreciacion_mes=depreciacion_mes, intereses_mes=intereses_mes, impuestos_mes=impuestos_mes,
+        caja=caja, cuentas_cobrar=cuentas_cobrar, inventario=inventario,
+        cuentas_pagar=cuentas_pagar, deuda_bancaria=deuda_bancaria, multiplo_global=multiplo_global
+    )
+    kpis = calcular_diagnostico(entradas)
+
+# Alias para las pestañas (mismos nombres que antes del motor)
+gastos_operativos_mes = kpis.gastos_operativos_mes
+utilidad_bruta_mes = kpis.utilidad_bruta_mes
+ebitda_mes = kpis.ebitda_mes
+margen_ebitda = kpis.margen_ebitda
+utilidad_neta_mes = kpis.utilidad_neta_mes
+costos_fijos_totales_mes = kpis.costos_fijos_totales_mes
+punto_equilibrio_mes = kpis.punto_equilibrio_mes
+dias_calle, dias_inventario, dias_proveedor = kpis.dias_calle, kpis.dias_inventario, kpis.dias_proveedor
+veredicto_final = kpis.veredicto_final
+icono_veredicto = kpis.icono_veredicto
 
 # ==========================================
 # DASHBOARD VISUAL (TABS)
@@ -321,424 +370,330 @@ tabs = st.tabs([
     "⚖️ Supervivencia",          # Index 4
     "🫁 Oxígeno",                # Index 5
     "🧪 Lab Precios (Unitario)", # Index 6
-    "🏆 Valoración"              # Index 7
-])
+    "🏆 Valoración",             # Index 7
+    "🗂️ Portafolio"              # Index 8
+], key="pestana_activa", on_change="rerun" if pestanas_bajo_demanda else "ignore")
+
+# .open es None cuando las pestañas no rastrean estado (se dibujan todas)
+def pestana_visible(i):
+    return tabs[i].open is not False
+
+# Widgets dentro de pestañas: una pestaña oculta no dibuja sus widgets y
+# Streamlit borraría su valor. Re-asignarlos en session_state los conserva.
+CLAVES_WIDGETS_PESTANAS = {
+    2: ["rescate_alquiler", "rescate_planilla"],
+    3: ["sim_delta_precio", "sim_delta_costos", "sim_delta_volumen", "mc_tipo", "mc_escenarios",
+        "mc_precio_min", "mc_precio_probable", "mc_precio_max", "mc_costos_min", "mc_costos_probable",
+        "mc_costos_max", "mc_volumen_min", "mc_volumen_probable", "mc_volumen_max", "sens_recorte"],
+    4: ["ganancia_deseada"],
+    6: ["lab_producto", "lab_salario", "lab_minutos", "lab_capacidad", "lab_margen", "lab_comision"],
+    7: ["val_es_dueno", "val_alquiler_virtual", "val_valor_edificio", "val_multiplo", "val_deuda"],
+    8: ["portafolio_veredictos", "portafolio_buscar", "portafolio_acciones", "portafolio_orden",
+        "portafolio_desc", "portafolio_cliente"],
+}
+for indice, claves in CLAVES_WIDGETS_PESTANAS.items():
+    if not pestana_visible(indice):
+        for clave in claves:
+            if clave in st.session_state:
+                st.session_state[clave] = st.session_state[clave]
 
 # --- TAB 1: CASCADA MAESTRA & DIAGNÓSTICO (ACTUALIZADO) ---
-with tabs[0]:
-    st.subheader("💎 Cascada de Rentabilidad: La Ruta del Dinero")
-    
-    # 1. PREPARACIÓN DE DATOS PARA CASCADA
-    # Calculamos valores absolutos para graficar
-    val_ventas = ventas_mes
-    val_cogs = -costo_ventas_mes
-    val_bruta = utilidades_bruta_mes = val_ventas + val_cogs
-    val_opex = -(gasto_alquiler_mes + gasto_planilla_mes + gasto_otros_mes)
-    val_ebitda = val_bruta + val_opex
-    val_fin_tax = -(intereses_mes + impuestos_mes + depreciacion_mes) # Agrupamos para simplificar gráfico
-    val_neta = val_ebitda + val_fin_tax
-    
-    # Lógica de colores dinámica
-    color_ebitda = "#2e7d32" if val_ebitda > 0 else "#ef6c00" # Verde o Naranja
-    color_neta = "#1565c0" if val_neta > 0 else "#c62828"    # Azul o Rojo
-
-    col_chart, col_text = st.columns([2, 1])
-
-    with col_chart:
-        # 2. GRÁFICO CASCADA (WATERFALL) - CORREGIDO
-        fig_waterfall = go.Figure(go.Waterfall(
-            name = "Flujo de Caja", 
-            orientation = "v",
-            measure = ["relative", "relative", "total", "relative", "total", "relative", "total"],
-            x = ["Ventas", "Costo Ventas", "Ut. Bruta", "Gastos Op. (OPEX)", "EBITDA (Motor)", "Intereses/Imp", "Ut. Neta"],
-            textposition = "outside",
-            text = [f"${val_ventas/1000:.1f}k", f"${val_cogs/1000:.1f}k", f"${val_bruta/1000:.1f}k", 
-                    f"${val_opex/1000:.1f}k", f"${val_ebitda/1000:.1f}k", f"${val_fin_tax/1000:.1f}k", f"${val_neta/1000:.1f}k"],
-            y = [val_ventas, val_cogs, 0, val_opex, 0, val_fin_tax, 0],
-            connector = {"line":{"color":"rgb(63, 63, 63)"}},
-            
-            # --- CORRECCIÓN DE COLORES ---
-            decreasing = {"marker":{"color":"#ef5350"}}, # Rojo suave para salidas de dinero
-            increasing = {"marker":{"color":"#1565c0"}}, # Azul para entradas
-            totals = {"marker":{"color":"#37474f"}}      # Gris Oscuro (Charcoal) para todos los Totales
-        ))
+with tabs[0], latencias.fase("Pestaña Cascada", pestana_visible(0)):
+    if pestana_visible(0):
+        st.subheader("💎 Cascada de Rentabilidad: La Ruta del Dinero")
+    
+        # 1. PREPARACIÓN DE DATOS PARA CASCADA
+        # Calculamos valores absolutos para graficar
+        val_ventas = ventas_mes
+        val_cogs = -costo_ventas_mes
+        val_bruta = utilidades_bruta_mes = val_ventas + val_cogs
+        val_opex = -(gasto_alquiler_mes + gasto_planilla_mes + gasto_otros_mes)
+        val_ebitda = val_bruta + val_opex
+        val_fin_tax = -(intereses_mes + impuestos_mes + depreciacion_mes) # Agrupamos para simplificar gráfico
+        val_neta = val_ebitda + val_fin_tax
+    
+        # Lógica de colores dinámica
+        color_ebitda = "#2e7d32" if val_ebitda > 0 else "#ef6c00" # Verde o Naranja
+        color_neta = "#1565c0" if val_neta > 0 else "#c62828"    # Azul o Rojo
+
+        col_chart, col_text = st.columns([2, 1])
+
+        with col_chart:
+            # 2. GRÁFICO CASCADA (WATERFALL) - CORREGIDO
+            fig_waterfall = figura_cascada(val_ventas, val_cogs, val_bruta, val_opex, val_ebitda, val_fin_tax, val_neta)
+            st.plotly_chart(fig_waterfall, use_container_width=True)
+
+        with col_text:
+            st.markdown("### 🩺 Diagnóstico Automático")
         
-        fig_waterfall.update_layout(
-            title="De la Venta a la Bolsa (P&L)",
-            showlegend=False,
-            height=550,
-            waterfallgap=0.1
-        )
-        st.plotly_chart(fig_waterfall, use_container_width=True)
-
-    with col_text:
-        st.markdown("### 🩺 Diagnóstico Automático")
+            # --- LÓGICA DE DIAGNÓSTICO (CORREGIDA) ---
+            mensaje_motor = ""
+            margen_ebitda_actual = (val_ebitda / val_ventas) * 100 if val_ventas > 0 else 0
         
-        # --- LÓGICA DE DIAGNÓSTICO (CORREGIDA) ---
-        mensaje_motor = ""
-        margen_ebitda_actual = (val_ebitda / val_ventas) * 100 if val_ventas > 0 else 0
-        
-        # A. Análisis del Motor (EBITDA)
-        if df_historico is not None:
-            # CORRECCIÓN: Calculamos EBITDA usando las columnas que SÍ existen
-            # EBITDA = Ventas - Costos Variables - Gastos Fijos (Sin contar impuestos/intereses)
-            
-            # 1. EBITDA del Último Mes (Final)
-            ebitda_ultimo = df_historico['Ventas'].iloc[-1] - (
-                df_historico['Costo_Ventas'].iloc[-1] + 
-                df_historico['Alquiler'].iloc[-1] + 
-                df_historico['Planilla'].iloc[-1] + 
-                df_historico['Otros_Gastos'].iloc[-1]
-            )
+            # A. Análisis del Motor (EBITDA)
+            if df_historico is not None:
+                # EBITDA = Ventas - Costos Variables - Gastos Fijos (Sin contar impuestos/intereses)
+                # Primer vs. último mes de la ventana elegida (calculado en la barra lateral)
+                crecimiento_ventas = tendencia['crecimiento_ventas']
+                crecimiento_ebitda = tendencia['crecimiento_ebitda']
+                referencia = f"a {tendencia['desde']} (inicio de la ventana de {tendencia['meses']} meses)"
             
-            # 2. EBITDA del Primer Mes (Inicio)
-            ebitda_primero = df_historico['Ventas'].iloc[0] - (
-                df_historico['Costo_Ventas'].iloc[0] + 
-                df_historico['Alquiler'].iloc[0] + 
-                df_historico['Planilla'].iloc[0] + 
-                df_historico['Otros_Gastos'].iloc[0]
-            )
-
-            crecimiento_ventas = (df_historico['Ventas'].iloc[-1] - df_historico['Ventas'].iloc[0])
-            crecimiento_ebitda = ebitda_ultimo - ebitda_primero
-            
-            # Lógica de comparación
-            if crecimiento_ventas > 0 and crecimiento_ebitda <= 0:
-                 mensaje_motor = "⚠️ **Tu motor pierde potencia.** Estás vendiendo más, pero ganas menos (EBITDA decreciente). Revisa fugas en costos variables."
-            elif crecimiento_ebitda > 0:
-                 mensaje_motor = f"🚀 **Motor Acelerando.** Tu EBITDA creció en ${crecimiento_ebitda:,.0f} respecto al inicio del año."
+                # Lógica de comparación
+                if crecimiento_ventas > 0 and crecimiento_ebitda <= 0:
+                     mensaje_motor = "⚠️ **Tu motor pierde potencia.** Estás vendiendo más, pero ganas menos (EBITDA decreciente). Revisa fugas en costos variables."
+                elif crecimiento_ebitda > 0:
+                     mensaje_motor = f"🚀 **Motor Acelerando.** Tu EBITDA creció en ${crecimiento_ebitda:,.0f} respecto {referencia}."
+                else:
+                     mensaje_motor = f"ℹ️ **Estado del Motor:** Tu margen EBITDA actual es del {margen_ebitda_actual:.1f}%."
+                
+                # Interanual (solo si el histórico tiene al menos 13 / 24 meses)
+                if pd.notna(tendencia['ventas_12m_yoy_pct']):
+                    mensaje_motor += (f" Últimos 12 meses vs. los 12 anteriores: ventas {tendencia['ventas_12m_yoy_pct']:+.1f}%, "
+                                      f"EBITDA {tendencia['ebitda_12m_yoy']:+,.0f}.")
+                elif pd.notna(tendencia['ventas_yoy_pct']):
+                    mensaje_motor += (f" {tendencia['hasta']} vs. mismo mes del año anterior: ventas {tendencia['ventas_yoy_pct']:+.1f}%, "
+                                      f"EBITDA {tendencia['ebitda_yoy']:+,.0f}.")
             else:
-                 mensaje_motor = f"ℹ️ **Estado del Motor:** Tu margen EBITDA actual es del {margen_ebitda_actual:.1f}%."
-        else:
-            # Lógica Flash (Estática - Sin cambios)
-            if margen_ebitda_actual < 10:
-                mensaje_motor = "⚠️ **Motor débil.** Tu margen operativo es muy bajo (<10%). Cualquier error te lleva a pérdidas."
+                # Lógica Flash (Estática - Sin cambios)
+                if MOTOR_REGLAS.cumple('motor_debil', {'margen_ebitda': margen_ebitda_actual}):
+                    mensaje_motor = f"⚠️ **Motor débil.** Tu margen operativo es muy bajo (<{MOTOR_REGLAS.umbral('motor_debil'):.0f}%). Cualquier error te lleva a pérdidas."
+                else:
+                    mensaje_motor = "✅ **Motor estable.** La operación genera flujo positivo por sí misma."
+
+            # B. Alerta de la Mandíbula (Sin cambios)
+            costos_totales_reales = abs(val_cogs) + abs(val_opex)
+            mensaje_mandibula = ""
+            if costos_totales_reales > val_ventas:
+                mensaje_mandibula = "🚨 **ALERTA DE LA MORDIDA:** Estás en la 'Zona de Mordida'. Cada dólar que vendes te cuesta más de un dólar producirlo. **ACCIÓN:** Ve al Lab de Precios YA."
+                style_m = "background-color: #ffebee; color: #b71c1c; border-left: 5px solid red;"
             else:
-                mensaje_motor = "✅ **Motor estable.** La operación genera flujo positivo por sí misma."
-
-        # B. Alerta de la Mandíbula (Sin cambios)
-        costos_totales_reales = abs(val_cogs) + abs(val_opex)
-        mensaje_mandibula = ""
-        if costos_totales_reales > val_ventas:
-            mensaje_mandibula = "🚨 **ALERTA DE LA MORDIDA:** Estás en la 'Zona de Mordida'. Cada dólar que vendes te cuesta más de un dólar producirlo. **ACCIÓN:** Ve al Lab de Precios YA."
-            style_m = "background-color: #ffebee; color: #b71c1c; border-left: 5px solid red;"
-        else:
-            mensaje_mandibula = "🛡️ **Zona Segura:** Tus ventas cubren tus costos operativos. Mantén la vigilancia en el OPEX."
-            style_m = "background-color: #e8f5e9; color: #1b5e20; border-left: 5px solid green;"
-
-        # C. Recomendación de Legado (Sin cambios)
-        mensaje_legado = ""
-        if margen_ebitda_actual > 15:
-            mensaje_legado = "🚀 **EMPRESA ESCALABLE:** Tu negocio es saludable (>15% EBITDA). Tienes capacidad para reinvertir sin desangrar la caja."
-        elif val_neta > 0:
-            mensaje_legado = "🌱 **EMPRESA EN CRECIMIENTO:** Eres rentable, pero necesitas optimizar antes de escalar agresivamente."
-        else:
-            mensaje_legado = "🚑 **EMPRESA EN TERAPIA:** Prioridad absoluta: Detener el sangrado de caja. No inviertas en nada nuevo."
+                mensaje_mandibula = "🛡️ **Zona Segura:** Tus ventas cubren tus costos operativos. Mantén la vigilancia en el OPEX."
+                style_m = "background-color: #e8f5e9; color: #1b5e20; border-left: 5px solid green;"
+
+            # C. Recomendación de Legado (Sin cambios)
+            mensaje_legado = ""
+            if MOTOR_REGLAS.cumple('escalable', {'margen_ebitda': margen_ebitda_actual}):
+                mensaje_legado = f"🚀 **EMPRESA ESCALABLE:** Tu negocio es saludable (>{MOTOR_REGLAS.umbral('escalable'):.0f}% EBITDA). Tienes capacidad para reinvertir sin desangrar la caja."
+            elif val_neta > 0:
+                mensaje_legado = "🌱 **EMPRESA EN CRECIMIENTO:** Eres rentable, pero necesitas optimizar antes de escalar agresivamente."
+            else:
+                mensaje_legado = "🚑 **EMPRESA EN TERAPIA:** Prioridad absoluta: Detener el sangrado de caja. No inviertas en nada nuevo."
 
-        # RENDERIZADO DEL TEXTO
-        st.markdown(f"""
-        <div style="padding:15px; border-radius:5px; margin-bottom:10px; background-color: #f5f5f5;">
-            <strong>1. Análisis del Motor (EBITDA):</strong><br>{mensaje_motor}
-        </div>
+            # RENDERIZADO DEL TEXTO
+            st.markdown(f"""
+            <div style="padding:15px; border-radius:5px; margin-bottom:10px; background-color: #f5f5f5;">
+                <strong>1. Análisis del Motor (EBITDA):</strong><br>{mensaje_motor}
+            </div>
         
-        <div style="padding:15px; border-radius:5px; margin-bottom:10px; {style_m}">
-            <strong>2. Alerta de Mandíbula:</strong><br>{mensaje_mandibula}
-        </div>
+            <div style="padding:15px; border-radius:5px; margin-bottom:10px; {style_m}">
+                <strong>2. Alerta de Mandíbula:</strong><br>{mensaje_mandibula}
+            </div>
         
-        <div style="padding:15px; border-radius:5px; margin-bottom:10px; background-color: #e3f2fd; border-left: 5px solid #1565c0;">
-            <strong>3. Veredicto de Legado:</strong><br>{mensaje_legado}
-        </div>
-        """, unsafe_allow_html=True)
+            <div style="padding:15px; border-radius:5px; margin-bottom:10px; background-color: #e3f2fd; border-left: 5px solid #1565c0;">
+                <strong>3. Veredicto de Legado:</strong><br>{mensaje_legado}
+            </div>
+            """, unsafe_allow_html=True)
         
-        # Guardamos en session state para el PDF
-        st.session_state['reporte_motor'] = mensaje_motor
-        st.session_state['reporte_mandibula'] = mensaje_mandibula
-        st.session_state['reporte_legado'] = mensaje_legado
+            # Guardamos en session state para el PDF
+            st.session_state['reporte_motor'] = mensaje_motor
+            st.session_state['reporte_mandibula'] = mensaje_mandibula
+            st.session_state['reporte_legado'] = mensaje_legado
 
 # --- TAB 2: LAS MANDÍBULAS (TENDENCIAS ACTUALIZADAS V2.5) ---
-with tabs[1]:
-    st.subheader("🦈 Diagnóstico de Divergencia: Ventas vs Costos vs Utilidad")
-    
-    if modo_operacion == "Modo A: Diagnóstico Flash (Foto)":
-        st.warning("⚠️ Esta visualización requiere datos históricos. Por favor, usa el 'Modo B: Estratega' subiendo un archivo CSV.")
-    elif df_historico is not None:
-        # 1. Preparación de Datos
-        df = df_historico.copy()
-        df['Costos_Totales'] = df['Costo_Ventas'] + df['Alquiler'] + df['Planilla'] + df['Otros_Gastos']
-        df['Utilidad_Neta'] = df['Ventas'] - df['Costos_Totales']
-        
-        # 2. Lógica para el sombreado de "Ineficiencia" (Red > Blue)
-        # Creamos una serie que solo contenga valores cuando los costos superan las ventas
-        df['Costos_Exceso'] = df.apply(lambda x: x['Costos_Totales'] if x['Costos_Totales'] > x['Ventas'] else x['Ventas'], axis=1)
-
-        fig_jaws = go.Figure()
-
-        # A. BARRAS DE UTILIDAD (Base)
-        fig_jaws.add_trace(go.Bar(
-            x=df['Mes'], 
-            y=df['Utilidad_Neta'],
-            name='Spread (Utilidad)',
-            marker_color=['#66bb6a' if u > 0 else '#ffa726' for u in df['Utilidad_Neta']],
-            opacity=0.6,
-            hovertemplate='Mes: %{x}<br>Utilidad: $%{y:,.2f}<extra></extra>'
-        ))
-
-        # B. LÍNEA DE VENTAS (Top Line)
-        fig_jaws.add_trace(go.Scatter(
-            x=df['Mes'], y=df['Ventas'],
-            mode='lines+markers',
-            name='Ventas',
-            line=dict(color='#1565c0', width=4),
-            hovertemplate='Ventas: $%{y:,.2f}'
-        ))
-
-        # C. LÍNEA DE COSTOS CON SOMBREADO
-        fig_jaws.add_trace(go.Scatter(
-            x=df['Mes'], y=df['Costos_Totales'],
-            mode='lines+markers',
-            name='Costos Totales',
-            line=dict(color='#c62828', width=4),
-            fill='tonexty', # Sombrea hacia la línea de ventas (que debe estar antes en el código)
-            fillcolor='rgba(198, 40, 40, 0.2)', 
-            hovertemplate='Costos: $%{y:,.2f}'
-        ))
-
-        # 3. DETECCIÓN DEL PUNTO DE INEFICIENCIA
-        # Buscamos el primer mes donde Costos > Ventas
-        punto_quiebre = df[df['Costos_Totales'] > df['Ventas']].first_valid_index()
-        
-        if punto_quiebre is not None:
-            mes_q = df.loc[punto_quiebre, 'Mes']
-            valor_q = df.loc[punto_quiebre, 'Costos_Totales']
+with tabs[1], latencias.fase("Pestaña Mandíbulas", pestana_visible(1)):
+    if pestana_visible(1):
+        st.subheader("🦈 Diagnóstico de Divergencia: Ventas vs Costos vs Utilidad")
+    
+        if modo_operacion == "Modo A: Diagnóstico Flash (Foto)":
+            st.warning("⚠️ Esta visualización requiere datos históricos. Por favor, usa el 'Modo B: Estratega' subiendo un archivo CSV.")
+        elif df_historico is not None:
+            # Preparación de Datos (Costos_Totales, Utilidad_Neta y Costos_Exceso) y gráfico
+            # Ya vienen cacheados desde la carga del archivo / por huella del histórico
+            fig_jaws = figura_mandibulas(historico, ventana_meses)
+
+            st.plotly_chart(fig_jaws, use_container_width=True)
             
-            fig_jaws.add_annotation(
-                x=mes_q, y=valor_q,
-                text="⚠️ Punto de Ineficiencia",
-                showarrow=True,
-                arrowhead=2,
-                arrowcolor="#c62828",
-                ax=0, ay=-40,
-                font=dict(color="#ffffff", size=12),
-                bgcolor="#c62828"
-            )
-
-        # Configuración del Layout
-        fig_jaws.update_layout(
-            height=600,
-            template="plotly_white",
-            legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
-            margin=dict(l=20, r=20, t=80, b=20),
-            hovermode="x unified",
-            yaxis_title="Monto Financiero ($)"
-        )
-
-        st.plotly_chart(fig_jaws, use_container_width=True)
+            if historico.meses > 3:
+                st.markdown("##### 📈 Margen EBITDA móvil (3 / 6 / 12 meses)")
+                st.plotly_chart(figura_tendencia(historico, ventana_meses), use_container_width=True)
         
-        st.info("""
-        **Guía de Lectura:**
-        * **Barras Verdes/Naranjas:** Representan el 'oxígeno' real que queda después de pagar todo.
-        * **Sombreado Rojo:** Es la 'zona de quema'. Si las líneas se cruzan, estás en deseconomía de escala: vender más te está haciendo más pobre.
-        """)
+            st.info("""
+            **Guía de Lectura:**
+            * **Barras Verdes/Naranjas:** Representan el 'oxígeno' real que queda después de pagar todo.
+            * **Sombreado Rojo:** Es la 'zona de quema'. Si las líneas se cruzan, estás en deseconomía de escala: vender más te está haciendo más pobre.
+            """)
 
 
-# --- TAB 3: SEMÁFORO INTEGRAL (FISCAL + OPERATIVO + FINANCIERO) ---
-with tabs[2]:
-    st.subheader("🚦 Tablero de Control Maestro")
-    
-    # --- CÁLCULOS PREVIOS (Backend) ---
-    ratio_alquiler = (gasto_alquiler_mes / ventas_mes) * 100 if ventas_mes > 0 else 0
-    ratio_planilla_ub = (gasto_planilla_mes / utilidad_bruta_mes) * 100 if utilidad_bruta_mes > 0 else 0
-    
-    if intereses_mes > 0:
-        cobertura_bancaria = ebitda_mes / intereses_mes
-    else:
-        cobertura_bancaria = 10.0
-        
-    pasivo_circulante = cuentas_pagar + deuda_bancaria
-    prueba_acida = (caja + cuentas_cobrar) / pasivo_circulante if pasivo_circulante > 0 else 0
-    
-    ventas_anual_proy = ventas_mes * 12
+# --- SIMULADOR DE RESCATE (SEMÁFORO, BLOQUE C) ---
+# Fragmento: los sliders de reducción solo recalculan esta tarjeta
+@st.fragment
+def render_simulador_rescate(gasto_alquiler_mes, gasto_planilla_mes, ebitda_mes):
+    col_sim_controls, col_sim_results = st.columns([1, 1.2])
 
-    # =========================================================
-    # BLOQUE 0: RADAR FISCAL & TALENTO (LO QUE FALTABA)
-    # =========================================================
-    col_radar, col_gap = st.columns([1, 1.5])
+    with col_sim_controls:
+        st.write("Objetivos de Reducción:")
+        meta_alquiler = st.slider("📉 Bajar Alquiler (%)", 0, 50, 0, step=5, key="rescate_alquiler")
+        meta_planilla = st.slider("✂️ Ajustar Nómina (%)", 0, 50, 0, step=5, key="rescate_planilla")
     
-    with col_radar:
-        st.markdown("### 📡 1. Radar Fiscal (ITBMS)")
-        st.caption("Proyección Anual de Ventas")
+    with col_sim_results:
+        ahorro = (gasto_alquiler_mes * meta_alquiler/100) + (gasto_planilla_mes * meta_planilla/100)
+        nuevo_ebitda = ebitda_mes + ahorro
+        st.markdown(f"""
+        <div style="background-color: #f1f8e9; padding: 15px; border-radius: 10px; border: 2px solid #43a047; text-align: center;">
+            <h4 style="margin:0; color: #2e7d32;">Dinero Recuperado (Mes)</h4>
+            <h2 style="margin: 5px 0; color: #1b5e20;">+${ahorro:,.2f}</h2>
+            <p>Nuevo EBITDA: <strong>${nuevo_ebitda:,.2f}</strong></p>
+        </div>
+        """, unsafe_allow_html=True)
+
+
+# --- TAB 3: SEMÁFORO INTEGRAL (FISCAL + OPERATIVO + FINANCIERO) ---
+with tabs[2], latencias.fase("Pestaña Semáforo", pestana_visible(2)):
+    if pestana_visible(2):
+        st.subheader("🚦 Tablero de Control Maestro")
+    
+        # --- CÁLCULOS PREVIOS (Backend) ---
+        ratio_alquiler = kpis.ratio_alquiler
+        ratio_planilla_ub = kpis.ratio_planilla
+        cobertura_bancaria = kpis.cobertura_bancaria
+        prueba_acida = kpis.prueba_acida
+        ventas_anual_proy = kpis.ventas_anual_proy
+
+        # =========================================================
+        # BLOQUE 0: RADAR FISCAL & TALENTO (LO QUE FALTABA)
+        # =========================================================
+        col_radar, col_gap = st.columns([1, 1.5])
+    
+        with col_radar:
+            st.markdown("### 📡 1. Radar Fiscal (ITBMS)")
+            st.caption("Proyección Anual de Ventas")
         
-        # Métrica Visual
-        st.metric("Ventas Proyectadas", f"${ventas_anual_proy:,.0f}", help="Venta Mensual x 12")
+            # Métrica Visual
+            st.metric("Ventas Proyectadas", f"${ventas_anual_proy:,.0f}", help="Venta Mensual x 12")
         
-        if ventas_anual_proy >= 36000:
-            st.error("⚠️ **OBLIGATORIO:** Superaste los $36k/año.")
-            st.markdown("""
-            <div style="font-size: 12px; background-color: #ffebee; padding: 5px; border-radius: 5px; color: #b71c1c;">
-                Debes cobrar el <strong>7% de ITBMS</strong>. Ajusta tus precios.
-            </div>
-            """, unsafe_allow_html=True)
-        elif ventas_anual_proy >= 30000:
-            st.warning("⚠️ **PRECAUCIÓN:** Zona Amarilla.")
-            st.caption("Estás cerca del límite de $36k.")
-        else:
-            st.success("✅ **LIBRE:** Régimen Simplificado.")
-            st.caption("No cobras ITBMS aún.")
+            if ventas_anual_proy >= 36000:
+                st.error("⚠️ **OBLIGATORIO:** Superaste los $36k/año.")
+                st.markdown("""
+                <div style="font-size: 12px; background-color: #ffebee; padding: 5px; border-radius: 5px; color: #b71c1c;">
+                    Debes cobrar el <strong>7% de ITBMS</strong>. Ajusta tus precios.
+                </div>
+                """, unsafe_allow_html=True)
+            elif ventas_anual_proy >= 30000:
+                st.warning("⚠️ **PRECAUCIÓN:** Zona Amarilla.")
+                st.caption("Estás cerca del límite de $36k.")
+            else:
+                st.success("✅ **LIBRE:** Régimen Simplificado.")
+                st.caption("No cobras ITBMS aún.")
 
-    with col_gap:
-        st.markdown("### 👥 2. Realidad de Nómina")
-        st.caption("Brecha: Costo Empresa vs. Bolsillo Empleado")
+        with col_gap:
+            st.markdown("### 👥 2. Realidad de Nómina")
+            st.caption("Brecha: Costo Empresa vs. Bolsillo Empleado")
         
-        # Recuperamos los detalles de nómina si existen (Modo A)
-        # Si estamos en Modo B (CSV), usamos datos simulados para el gráfico
-        datos_grafico = []
-        if 'detalles_nomina' in locals() and detalles_nomina:
-             datos_grafico = detalles_nomina
-        else:
-             # Simulacion visual para Modo Estratega si no hay detalle
-             datos_grafico = [
-                 {"Rol": "Equipo (Promedio)", "Costo Empresa": gasto_planilla_mes, "Bolsillo Empleado": gasto_planilla_mes * 0.75}
-             ]
+            # Recuperamos los detalles de nómina si existen (Modo A)
+            # Si estamos en Modo B (CSV), usamos datos simulados para el gráfico
+            datos_grafico = []
+            if detalles_nomina is not None and not detalles_nomina.empty:
+                 datos_grafico = detalles_nomina
+                 if len(detalles_nomina) > MAX_ROLES_GRAFICO_TALENTO:
+                     st.caption(f"Los {MAX_ROLES_GRAFICO_TALENTO} roles de mayor costo (de {len(detalles_nomina):,}).")
+                     datos_grafico = detalles_nomina.nlargest(MAX_ROLES_GRAFICO_TALENTO, "Costo Empresa")
+            else:
+                 # Simulacion visual para Modo Estratega si no hay detalle
+                 datos_grafico = [
+                     {"Rol": "Equipo (Promedio)", "Costo Empresa": gasto_planilla_mes, "Bolsillo Empleado": gasto_planilla_mes * 0.75}
+                 ]
         
-        df_chart_talento = pd.DataFrame(datos_grafico)
+            df_chart_talento = pd.DataFrame(datos_grafico)
         
-        if not df_chart_talento.empty:
-            fig_talento = go.Figure()
-            # Barra Costo Real
-            fig_talento.add_trace(go.Bar(
-                y=df_chart_talento['Rol'], x=df_chart_talento['Costo Empresa'],
-                name='Costo Real (Tu Gasto)', orientation='h', marker_color='#ef5350'
-            ))
-            # Barra Neto
-            fig_talento.add_trace(go.Bar(
-                y=df_chart_talento['Rol'], x=df_chart_talento['Bolsillo Empleado'],
-                name='Neto (Su Bolsillo)', orientation='h', marker_color='#66bb6a',
-                text=df_chart_talento['Bolsillo Empleado'].apply(lambda x: f"${x:,.0f}"), textposition='auto'
-            ))
-            fig_talento.update_layout(barmode='group', height=200, margin=dict(l=0, r=0, t=0, b=0), legend=dict(orientation="h", y=-0.2))
-            st.plotly_chart(fig_talento, use_container_width=True)
+            if not df_chart_talento.empty:
+                fig_talento = figura_talento(df_chart_talento)
+                st.plotly_chart(fig_talento, use_container_width=True)
 
-    st.markdown("---")
+        st.markdown("---")
 
-    # =========================================================
-    # BLOQUE A: EFICIENCIA OPERATIVA (GAUGES / RELOJES)
-    # =========================================================
-    st.markdown("### ⚙️ 3. Eficiencia Operativa (Estructura de Costos)")
+        # =========================================================
+        # BLOQUE A: EFICIENCIA OPERATIVA (GAUGES / RELOJES)
+        # =========================================================
+        st.markdown("### ⚙️ 3. Eficiencia Operativa (Estructura de Costos)")
     
-    col_gauge1, col_gauge2 = st.columns(2)
-
-    # --- RELOJ DE ALQUILER ---
-    with col_gauge1:
-        color_renta = "#43a047" if ratio_alquiler <= 10 else "#fb8c00" if ratio_alquiler <= 15 else "#e53935"
-        fig_renta = go.Figure(go.Indicator(
-            mode = "gauge+number", value = ratio_alquiler,
-            title = {'text': "Eficiencia Inmobiliaria (% Ventas)"},
-            gauge = {
-                'axis': {'range': [None, 30]}, 'bar': {'color': color_renta},
-                'steps': [{'range': [0, 15], 'color': "#f1f8e9"}, {'range': [15, 30], 'color': "#ffebee"}],
-                'threshold': {'line': {'color': "red", 'width': 4}, 'thickness': 0.75, 'value': 15}
-            }
-        ))
-        fig_renta.update_layout(height=250, margin=dict(l=30, r=30, t=40, b=20))
-        st.plotly_chart(fig_renta, use_container_width=True)
-        if ratio_alquiler > 15: st.warning(f"⚠️ Trabajas para el local ({ratio_alquiler:.1f}%).")
-
-    # --- RELOJ DE NÓMINA ---
-    with col_gauge2:
-        color_nomina = "#43a047" if ratio_planilla_ub <= 35 else "#fb8c00" if ratio_planilla_ub <= 45 else "#e53935"
-        fig_nomina = go.Figure(go.Indicator(
-            mode = "gauge+number", value = ratio_planilla_ub,
-            title = {'text': "Peso de Nómina (% Ut. Bruta)"},
-            gauge = {
-                'axis': {'range': [None, 60]}, 'bar': {'color': color_nomina},
-                'steps': [{'range': [0, 45], 'color': "#f1f8e9"}, {'range': [45, 60], 'color': "#ffebee"}],
-                'threshold': {'line': {'color': "red", 'width': 4}, 'thickness': 0.75, 'value': 45}
-            }
-        ))
-        fig_nomina.update_layout(height=250, margin=dict(l=30, r=30, t=40, b=20))
-        st.plotly_chart(fig_nomina, use_container_width=True)
-        if ratio_planilla_ub > 45: st.warning(f"⚠️ Equipo costoso ({ratio_planilla_ub:.1f}% de UB).")
+        col_gauge1, col_gauge2 = st.columns(2)
 
-    st.markdown("---")
+        # --- RELOJ DE ALQUILER ---
+        with col_gauge1:
+            fig_renta = figura_reloj_alquiler(ratio_alquiler)
+            st.plotly_chart(fig_renta, use_container_width=True)
+            if MOTOR_REGLAS.cumple('alquiler_alto', kpis): st.warning(f"⚠️ Trabajas para el local ({ratio_alquiler:.1f}%).")
+
+        # --- RELOJ DE NÓMINA ---
+        with col_gauge2:
+            fig_nomina = figura_reloj_nomina(ratio_planilla_ub)
+            st.plotly_chart(fig_nomina, use_container_width=True)
+            if MOTOR_REGLAS.cumple('nomina_alta', kpis): st.warning(f"⚠️ Equipo costoso ({ratio_planilla_ub:.1f}% de UB).")
 
-    # =========================================================
-    # BLOQUE B: SALUD FINANCIERA (TARJETAS)
-    # =========================================================
-    st.markdown("### 🏦 4. Salud Financiera (Solvencia)")
+        st.markdown("---")
+
+        # =========================================================
+        # BLOQUE B: SALUD FINANCIERA (TARJETAS)
+        # =========================================================
+        st.markdown("### 🏦 4. Salud Financiera (Solvencia)")
     
-    col_fin1, col_fin2 = st.columns(2)
+        col_fin1, col_fin2 = st.columns(2)
     
-    with col_fin1: # Cobertura Bancaria
-        estado_banco = "🟢 Saludable" if cobertura_bancaria >= 1.5 else "🔴 Riesgo Default"
-        bg_banco = "#e8f5e9" if cobertura_bancaria >= 1.5 else "#ffebee"
-        border_banco = "#2e7d32" if cobertura_bancaria >= 1.5 else "#c62828"
+        with col_fin1: # Cobertura Bancaria
+            banco_ok = not MOTOR_REGLAS.cumple('cobertura_baja', kpis)
+            estado_banco = "🟢 Saludable" if banco_ok else "🔴 Riesgo Default"
+            bg_banco = "#e8f5e9" if banco_ok else "#ffebee"
+            border_banco = "#2e7d32" if banco_ok else "#c62828"
         
-        st.markdown(f"""
-        <div style="background-color: {bg_banco}; padding: 15px; border-radius: 10px; border-left: 6px solid {border_banco};">
-            <h5 style="margin:0; color:#555;">Cobertura Bancaria</h5>
-            <h2 style="margin:5px 0; color: #333;">{cobertura_bancaria:.1f}x</h2>
-            <small>{estado_banco} (Meta > 1.5x)</small>
-        </div>
-        """, unsafe_allow_html=True)
+            st.markdown(f"""
+            <div style="background-color: {bg_banco}; padding: 15px; border-radius: 10px; border-left: 6px solid {border_banco};">
+                <h5 style="margin:0; color:#555;">Cobertura Bancaria</h5>
+                <h2 style="margin:5px 0; color: #333;">{cobertura_bancaria:.1f}x</h2>
+                <small>{estado_banco} (Meta > {MOTOR_REGLAS.umbral('cobertura_baja'):.1f}x)</small>
+            </div>
+            """, unsafe_allow_html=True)
 
-    with col_fin2: # Prueba Ácida
-        estado_acida = "🟢 Oxígeno OK" if prueba_acida >= 1.0 else "🔴 Asfixia"
-        bg_acida = "#e8f5e9" if prueba_acida >= 1.0 else "#ffebee"
-        border_acida = "#2e7d32" if prueba_acida >= 1.0 else "#c62828"
+        with col_fin2: # Prueba Ácida
+            acida_ok = not MOTOR_REGLAS.cumple('liquidez_baja', kpis)
+            estado_acida = "🟢 Oxígeno OK" if acida_ok else "🔴 Asfixia"
+            bg_acida = "#e8f5e9" if acida_ok else "#ffebee"
+            border_acida = "#2e7d32" if acida_ok else "#c62828"
         
-        st.markdown(f"""
-        <div style="background-color: {bg_acida}; padding: 15px; border-radius: 10px; border-left: 6px solid {border_acida};">
-            <h5 style="margin:0; color:#555;">Prueba Ácida (Liquidez)</h5>
-            <h2 style="margin:5px 0; color: #333;">{prueba_acida:.2f}x</h2>
-            <small>{estado_acida} (Meta > 1.0x)</small>
-        </div>
-        """, unsafe_allow_html=True)
-
-    st.markdown("---")
+            st.markdown(f"""
+            <div style="background-color: {bg_acida}; padding: 15px; border-radius: 10px; border-left: 6px solid {border_acida};">
+                <h5 style="margin:0; color:#555;">Prueba Ácida (Liquidez)</h5>
+                <h2 style="margin:5px 0; color: #333;">{prueba_acida:.2f}x</h2>
+                <small>{estado_acida} (Meta > {MOTOR_REGLAS.umbral('liquidez_baja'):.1f}x)</small>
+            </div>
+            """, unsafe_allow_html=True)
 
-    # =========================================================
-    # BLOQUE C: LABORATORIO DE ACCIÓN
-    # =========================================================
-    st.markdown("### 🔮 5. Simulador de Rescate")
-    
-    col_sim_controls, col_sim_results = st.columns([1, 1.2])
+        st.markdown("---")
 
-    with col_sim_controls:
-        st.write("Objetivos de Reducción:")
-        meta_alquiler = st.slider("📉 Bajar Alquiler (%)", 0, 50, 0, step=5)
-        meta_planilla = st.slider("✂️ Ajustar Nómina (%)", 0, 50, 0, step=5)
+        # =========================================================
+        # BLOQUE C: LABORATORIO DE ACCIÓN
+        # =========================================================
+        st.markdown("### 🔮 5. Simulador de Rescate")
     
-    with col_sim_results:
-        ahorro = (gasto_alquiler_mes * meta_alquiler/100) + (gasto_planilla_mes * meta_planilla/100)
-        nuevo_ebitda = ebitda_mes + ahorro
-        st.markdown(f"""
-        <div style="background-color: #f1f8e9; padding: 15px; border-radius: 10px; border: 2px solid #43a047; text-align: center;">
-            <h4 style="margin:0; color: #2e7d32;">Dinero Recuperado (Mes)</h4>
-            <h2 style="margin: 5px 0; color: #1b5e20;">+${ahorro:,.2f}</h2>
-            <p>Nuevo EBITDA: <strong>${nuevo_ebitda:,.2f}</strong></p>
-        </div>
-        """, unsafe_allow_html=True)
+        render_simulador_rescate(gasto_alquiler_mes, gasto_planilla_mes, ebitda_mes)
 
-    # PLAN DE CHOQUE
-    st.write("")
-    st.markdown("#### 🛡️ Acciones Inmediatas")
+        # PLAN DE CHOQUE
+        st.write("")
+        st.markdown("#### 🛡️ Acciones Inmediatas")
     
-    acciones_choque = []
-    if ratio_alquiler > 15: acciones_choque.append("🏢 **ALQUILER:** Renegociar contrato o subarrendar.")
-    if ratio_planilla_ub > 45: acciones_choque.append("👥 **NÓMINA:** Revisar eficiencia y turnos.")
-    if cobertura_bancaria < 1.5: acciones_choque.append("🏦 **DEUDA:** Detener deuda nueva.")
-    if prueba_acida < 1.0: acciones_choque.append("🩸 **LIQUIDEZ:** Ejecutar rescate de caja.")
+        acciones_choque = kpis.acciones_choque
 
-    st.session_state['plan_choque'] = acciones_choque 
+        st.session_state['plan_choque'] = acciones_choque 
     
-    if not acciones_choque:
-        st.success("✅ ESTRUCTURA SÓLIDA. Enfócate en crecer.")
-    else:
-        for accion in acciones_choque:
-            st.error(accion)
+        if not acciones_choque:
+            st.success("✅ ESTRUCTURA SÓLIDA. Enfócate en crecer.")
+        else:
+            for accion in acciones_choque:
+                st.error(accion)
 
 # --- TAB 5: SUPERVIVENCIA (MAPA GRÁFICO CON META) ---
-with tabs[4]:
+# Fragmento: cambiar la meta de ganancia solo redibuja este mapa
+@st.fragment
+def render_supervivencia(ventas_mes, costo_ventas_mes, costos_fijos_totales_mes, punto_equilibrio_mes):
     st.subheader("⚖️ Mapa de Supervivencia & Metas")
 
     # 1. PREPARACIÓN DE DATOS
@@ -756,7 +711,7 @@ with tabs[4]:
     with col_kpi:
         # --- INPUT DE META (NUEVO) ---
         st.markdown("### 🎯 Define tu Objetivo")
-        ganancia_deseada = st.number_input("¿Cuánto quieres ganar al mes? ($)", value=0.0, step=500.0)
+        ganancia_deseada = st.number_input("¿Cuánto quieres ganar al mes? ($)", value=0.0, step=500.0, key="ganancia_deseada")
         
         # CÁLCULO DE VENTA NECESARIA
         # Fórmula: (Fijos + Ganancia) / Margen Contribución
@@ -786,303 +741,255 @@ with tabs[4]:
 
     with col_graph:
         # 3. LÓGICA DEL GRÁFICO
-        # Definir Rango de Proyección (Eje X) para incluir la Meta
-        max_x = max(ventas_mes, punto_equilibrio_mes, ventas_meta) * 1.25
-        if max_x == 0: max_x = 1000
-
-        # Coordenadas
-        eje_x = [0, max_x]
-        y_ventas = [0, max_x]
-        y_fijos = [costos_fijos_totales_mes, costos_fijos_totales_mes]
-        y_totales = [costos_fijos_totales_mes, costos_fijos_totales_mes + (max_x * cv_ratio)]
-
-        fig_be = go.Figure()
-
-        # A. ZONAS DE SOMBRA (Pérdida/Ganancia)
-        if punto_equilibrio_mes > 0:
-            # Zona Roja
-            fig_be.add_trace(go.Scatter(
-                x=[0, punto_equilibrio_mes, punto_equilibrio_mes, 0],
-                y=[costos_fijos_totales_mes, punto_equilibrio_mes, 0, 0],
-                fill='toself', mode='none', name='Zona Pérdida',
-                fillcolor='rgba(239, 83, 80, 0.1)', hoverinfo='skip'
-            ))
-            # Zona Verde
-            y_fin_ventas = max_x
-            y_fin_costos = costos_fijos_totales_mes + (max_x * cv_ratio)
-            fig_be.add_trace(go.Scatter(
-                x=[punto_equilibrio_mes, max_x, max_x, punto_equilibrio_mes],
-                y=[punto_equilibrio_mes, y_fin_ventas, y_fin_costos, punto_equilibrio_mes],
-                fill='toself', mode='none', name='Zona Ganancia',
-                fillcolor='rgba(102, 187, 106, 0.1)', hoverinfo='skip'
-            ))
-
-        # B. LÍNEAS ESTRUCTURALES
-        fig_be.add_trace(go.Scatter(x=eje_x, y=y_fijos, mode='lines', name='Costos Fijos', line=dict(color='firebrick', width=2, dash='dash')))
-        fig_be.add_trace(go.Scatter(x=eje_x, y=y_totales, mode='lines', name='Costo Total', line=dict(color='orange', width=3)))
-        fig_be.add_trace(go.Scatter(x=eje_x, y=y_ventas, mode='lines', name='Ventas', line=dict(color='royalblue', width=4)))
-
-        # C. MARCADORES
-        # 1. Punto de Equilibrio
-        if punto_equilibrio_mes > 0:
-            fig_be.add_trace(go.Scatter(
-                x=[punto_equilibrio_mes], y=[punto_equilibrio_mes],
-                mode='markers', name='Punto de Equilibrio',
-                marker=dict(size=10, color='white', line=dict(color='black', width=2))
-            ))
-
-        # 2. Realidad Actual
-        fig_be.add_trace(go.Scatter(
-            x=[ventas_mes], y=[ventas_mes],
-            mode='markers', name='Tu Realidad',
-            marker=dict(size=15, color='green' if ventas_mes >= punto_equilibrio_mes else 'red', symbol='diamond'),
-            hovertemplate='Hoy: $%{x:,.0f}<extra></extra>'
-        ))
-
-        # D. LÍNEA DE META (NUEVO FEATURE)
-        if ganancia_deseada > 0 and ventas_meta > 0:
-            # Línea Vertical
-            fig_be.add_vline(x=ventas_meta, line_width=2, line_dash="dot", line_color="purple")
-            
-            # Marcador de Meta
-            fig_be.add_trace(go.Scatter(
-                x=[ventas_meta], y=[ventas_meta],
-                mode='markers+text', name='META DESEADA',
-                text=["🏆"], textposition="top center",
-                marker=dict(size=15, color='purple', symbol='star'),
-                hovertemplate='Meta: $%{x:,.0f}<br>Ganancia: $' + f'{ganancia_deseada:,.0f}<extra></extra>'
-            ))
-            
-            # Anotación
-            fig_be.add_annotation(
-                x=ventas_meta, y=0,
-                text=f"Meta: ${ventas_meta:,.0f}",
-                showarrow=False, yshift=10, font=dict(color="purple")
-            )
-
-        # Configuración Final
-        fig_be.update_layout(
-            title="Mapa de Navegación Financiera",
-            xaxis_title="Ventas ($)", yaxis_title="Dinero ($)",
-            height=500, template="plotly_white",
-            legend=dict(orientation="h", y=1.1)
-        )
+        fig_be = figura_equilibrio(ventas_mes, punto_equilibrio_mes, costos_fijos_totales_mes, cv_ratio, ventas_meta, ganancia_deseada)
 
         st.plotly_chart(fig_be, use_container_width=True)
-        
+
+with tabs[4], latencias.fase("Pestaña Supervivencia", pestana_visible(4)):
+    if pestana_visible(4):
+        render_supervivencia(ventas_mes, costo_ventas_mes, costos_fijos_totales_mes, punto_equilibrio_mes)
+
 # --- TAB 6: MONITOR DE OXÍGENO (VERSIÓN NATIVA ESTABLE) ---
-with tabs[5]:
-    st.header("1. Monitor de Oxígeno: Liquidez y Solvencia")
+with tabs[5], latencias.fase("Pestaña Oxígeno", pestana_visible(5)):
+    if pestana_visible(5):
+        st.header("1. Monitor de Oxígeno: Liquidez y Solvencia")
 
-    # A. RATIO DE LIQUIDEZ (PRUEBA ÁCIDA)
-    # Usamos las variables globales de la app
-    total_liquido = caja + cuentas_cobrar
-    pasivo_corto_plazo = cuentas_pagar + deuda_bancaria # Deuda Total CP
-    
-    # Evitar división por cero
-    prueba_acida = total_liquido / pasivo_corto_plazo if pasivo_corto_plazo > 0 else 0
+        # A. RATIO DE LIQUIDEZ (PRUEBA ÁCIDA)
+        # Usamos las variables globales de la app
+        prueba_acida = kpis.prueba_acida # (Caja + Cobrar) / Deuda Total CP
 
-    st.subheader("1. Ratio de Liquidez (Prueba Ácida)")
-    col1, col2 = st.columns([1, 2])
+        st.subheader("1. Ratio de Liquidez (Prueba Ácida)")
+        col1, col2 = st.columns([1, 2])
 
-    with col1:
-        st.metric(label="Prueba Ácida", value=f"{prueba_acida:.2f}x")
+        with col1:
+            st.metric(label="Prueba Ácida", value=f"{prueba_acida:.2f}x")
 
-    with col2:
-        if prueba_acida >= 1.0:
-            st.success("✅ **TIENES OXÍGENO:** Cubres tus deudas hoy sin problemas.")
-        else:
-            st.error("⚠️ **ALERTA DE ASFIXIA:** No cubres tus deudas de corto plazo. Riesgo de impago.")
+        with col2:
+            if not MOTOR_REGLAS.cumple('liquidez_baja', kpis):
+                st.success("✅ **TIENES OXÍGENO:** Cubres tus deudas hoy sin problemas.")
+            else:
+                st.error("⚠️ **ALERTA DE ASFIXIA:** No cubres tus deudas de corto plazo. Riesgo de impago.")
             
-            # Botón de Plan de Rescate (Solo aparece en emergencia)
-            with st.expander("🚑 VER PLAN DE RESCATE DE CAJA"):
-                st.markdown("""
-                1. 🛑 **Stop Pagos:** Congela pagos a proveedores no críticos por 7 días.
-                2. 📞 **Cobranza Flash:** Llama a clientes vencidos y ofrece 5% desc. por pago hoy.
-                3. 📉 **Remate:** Liquida inventario de baja rotación al costo.
-                """)
+                # Botón de Plan de Rescate (Solo aparece en emergencia)
+                with st.expander("🚑 VER PLAN DE RESCATE DE CAJA"):
+                    st.markdown("""
+                    1. 🛑 **Stop Pagos:** Congela pagos a proveedores no críticos por 7 días.
+                    2. 📞 **Cobranza Flash:** Llama a clientes vencidos y ofrece 5% desc. por pago hoy.
+                    3. 📉 **Remate:** Liquida inventario de baja rotación al costo.
+                    """)
 
-    st.markdown("---")
+        st.markdown("---")
 
-    # B. CICLO DE CONVERSIÓN DE EFECTIVO (CCC)
-    st.header("2. Ciclo de Conversión de Efectivo (CCC)")
+        # B. CICLO DE CONVERSIÓN DE EFECTIVO (CCC)
+        st.header("2. Ciclo de Conversión de Efectivo (CCC)")
 
-    # Usamos los días calculados previamente en el backend
-    # dias_calle, dias_inventario, dias_proveedor ya existen
-    ccc = dias_calle + dias_inventario - dias_proveedor
+        # Usamos los días calculados previamente en el backend
+        ccc = kpis.ccc
 
-    col3, col4, col5 = st.columns(3)
-    col3.metric("Calle (Clientes)", f"{dias_calle:.0f} días")
-    col4.metric("Inv. (Bodega)", f"{dias_inventario:.0f} días")
-    col5.metric("Prov. (Pago)", f"{dias_proveedor:.0f} días")
+        col3, col4, col5 = st.columns(3)
+        col3.metric("Calle (Clientes)", f"{dias_calle:.0f} días")
+        col4.metric("Inv. (Bodega)", f"{dias_inventario:.0f} días")
+        col5.metric("Prov. (Pago)", f"{dias_proveedor:.0f} días")
 
-    if ccc > 60:
-        st.warning(f"⚠️ **LENTO:** Tardas **{ccc:.0f} días** en recuperar tu dinero. Tu negocio consume mucha caja.")
-    elif ccc < 0:
-        st.success(f"🚀 **NEGATIVO:** ¡Excelente! Te financias con proveedores ({ccc:.0f} días).")
-    else:
-        st.info(f"ℹ️ **NORMAL:** Tardas **{ccc:.0f} días** en recuperar tu dinero.")
+        if MOTOR_REGLAS.cumple('ccc_lento', kpis):
+            st.warning(f"⚠️ **LENTO:** Tardas **{ccc:.0f} días** en recuperar tu dinero. Tu negocio consume mucha caja.")
+        elif MOTOR_REGLAS.cumple('ccc_negativo', kpis):
+            st.success(f"🚀 **NEGATIVO:** ¡Excelente! Te financias con proveedores ({ccc:.0f} días).")
+        else:
+            st.info(f"ℹ️ **NORMAL:** Tardas **{ccc:.0f} días** en recuperar tu dinero.")
 
-    st.markdown("---")
+        st.markdown("---")
 
-    # C. VISUALIZACIÓN DE DINERO ATRAPADO
-    st.subheader("¿Dónde está tu dinero? (Efectivo Atrapado)")
+        # C. VISUALIZACIÓN DE DINERO ATRAPADO
+        st.subheader("¿Dónde está tu dinero? (Efectivo Atrapado)")
     
-    total_atrapado = cuentas_cobrar + inventario
+        total_atrapado = kpis.dinero_atrapado_total
 
-    # Usamos st.warning para destacar el monto total (Estilo nativo limpio)
-    st.warning(f"💸 **Total Atrapado:** ${total_atrapado:,.2f}")
+        # Usamos st.warning para destacar el monto total (Estilo nativo limpio)
+        st.warning(f"💸 **Total Atrapado:** ${total_atrapado:,.2f}")
     
-    # Desglose simple
-    c_trap1, c_trap2 = st.columns(2)
-    with c_trap1:
-        st.write(f"**📉 En la Calle (Clientes):**")
-        st.write(f"### ${cuentas_cobrar:,.2f}")
-    with c_trap2:
-        st.write(f"**📦 En Bodega (Inventario):**")
-        st.write(f"### ${inventario:,.2f}")
+        # Desglose simple
+        c_trap1, c_trap2 = st.columns(2)
+        with c_trap1:
+            st.write(f"**📉 En la Calle (Clientes):**")
+            st.write(f"### ${cuentas_cobrar:,.2f}")
+        with c_trap2:
+            st.write(f"**📦 En Bodega (Inventario):**")
+            st.write(f"### ${inventario:,.2f}")
 
-    st.caption("💡 **Consultor:** No necesitas vender más para tener liquidez, necesitas liberar estos fondos (Factoring o Remates).")
+        st.caption("💡 **Consultor:** No necesitas vender más para tener liquidez, necesitas liberar estos fondos (Factoring o Remates).")
 
 # --- TAB 8: VALORACIÓN V2.5 (PATRIMONIO NETO) ---
-with tabs[7]:
-    st.subheader("🏆 Motor de Riqueza: Valoración & Legado")
+with tabs[7], latencias.fase("Pestaña Valoración", pestana_visible(7)):
+    if pestana_visible(7):
+        st.subheader("🏆 Motor de Riqueza: Valoración & Legado")
     
-    col_prop_1, col_prop_2 = st.columns(2)
-    with col_prop_1:
-        es_dueno = st.checkbox("¿Cliente es dueño del local?", value=False)
+        col_prop_1, col_prop_2 = st.columns(2)
+        with col_prop_1:
+            es_dueno = st.checkbox("¿Cliente es dueño del local?", value=False, key="val_es_dueno")
     
-    alquiler_virtual = 0.0
-    valor_edificio = 0.0
+        alquiler_virtual = 0.0
+        valor_edificio = 0.0
     
-    if es_dueno:
-        with col_prop_2:
-            alquiler_virtual = st.number_input("Alquiler Virtual de Mercado ($)", value=2000.0)
-            valor_edificio = st.number_input("Valor Comercial del Edificio ($)", value=250000.0)
+        if es_dueno:
+            with col_prop_2:
+                alquiler_virtual = st.number_input("Alquiler Virtual de Mercado ($)", value=2000.0, key="val_alquiler_virtual")
+                valor_edificio = st.number_input("Valor Comercial del Edificio ($)", value=250000.0, key="val_valor_edificio")
     
-    ebitda_ajustado = (ebitda_mes - alquiler_virtual) * 12 
+        ebitda_ajustado = (ebitda_mes - alquiler_virtual) * 12 
     
-    st.markdown("---")
+        st.markdown("---")
     
-    col_val_1, col_val_2 = st.columns(2)
-    with col_val_1:
-        multiplo = st.selectbox("Calidad del Negocio (Múltiplo)", [2, 3, 4, 5, 6], index=1)
-        valor_operativo = ebitda_ajustado * multiplo
-    with col_val_2:
-        if valor_operativo > 0:
-            st.markdown(f"""<div class="metric-card"><h4>Valor Operativo (OpCo)</h4><h2 style="color:green">${valor_operativo:,.2f}</h2></div>""", unsafe_allow_html=True)
-        else:
-            st.error("🚨 El negocio no vale nada (EBITDA Ajustado Negativo).")
-            valor_operativo = 0
+        col_val_1, col_val_2 = st.columns(2)
+        with col_val_1:
+            multiplo = st.selectbox("Calidad del Negocio (Múltiplo)", [2, 3, 4, 5, 6], index=1, key="val_multiplo")
+            valor_operativo = ebitda_ajustado * multiplo
+        with col_val_2:
+            if valor_operativo > 0:
+                st.markdown(f"""<div class="metric-card"><h4>Valor Operativo (OpCo)</h4><h2 style="color:green">${valor_operativo:,.2f}</h2></div>""", unsafe_allow_html=True)
+            else:
+                st.error("🚨 El negocio no vale nada (EBITDA Ajustado Negativo).")
+                valor_operativo = 0
 
-    st.markdown("---")
-    st.subheader("💎 Tu Patrimonio Real (Net Worth)")
-    deuda = st.number_input("Deuda Bancaria Total ($)", value=0.0)
-    patrimonio = valor_operativo + valor_edificio - deuda
+        st.markdown("---")
+        st.subheader("💎 Tu Patrimonio Real (Net Worth)")
+        deuda = st.number_input("Deuda Bancaria Total ($)", value=0.0, key="val_deuda")
+        patrimonio = valor_operativo + valor_edificio - deuda
     
-    st.markdown(f"""<div class="valuation-box"><h1 style="color: #0d47a1; text-align: center;">${patrimonio:,.2f}</h1><p style="text-align: center;">(Negocio + Edificio - Deuda)</p></div>""", unsafe_allow_html=True)
+        st.markdown(f"""<div class="valuation-box"><h1 style="color: #0d47a1; text-align: center;">${patrimonio:,.2f}</h1><p style="text-align: center;">(Negocio + Edificio - Deuda)</p></div>""", unsafe_allow_html=True)
 
 # --- TAB 7: LAB DE PRECIOS (CÁLCULO UNITARIO) ---
-with tabs[6]:
-    st.subheader("🧪 Laboratorio de Precios: Ingeniería Inversa")
-    st.caption("Calcula el precio exacto de un producto basándote en tus costos reales y el margen que deseas.")
+with tabs[6], latencias.fase("Pestaña Lab Precios", pestana_visible(6)):
+    if pestana_visible(6):
+        st.subheader("🧪 Laboratorio de Precios: Ingeniería Inversa")
+        st.caption("Calcula el precio exacto de un producto basándote en tus costos reales y el margen que deseas.")
 
-    col_prod_izq, col_prod_der = st.columns(2)
+        col_prod_izq, col_prod_der = st.columns(2)
     
-    with col_prod_izq:
-        st.markdown("#### 1. Costos Directos (Receta)")
-        producto_nombre = st.text_input("Nombre del Producto:", "Ej. Pastel de Bodas")
+        with col_prod_izq:
+            st.markdown("#### 1. Costos Directos (Receta)")
+            producto_nombre = st.text_input("Nombre del Producto:", "Ej. Pastel de Bodas", key="lab_producto")
         
-        # Tabla de Insumos
-        st.write("Lista de Materiales:")
-        if 'df_insumos' not in st.session_state:
-            st.session_state.df_insumos = pd.DataFrame([
-                {"Ingrediente": "Harina", "Costo": 5.00},
-                {"Ingrediente": "Huevos", "Costo": 2.50},
-                {"Ingrediente": "Packaging", "Costo": 1.50}
-            ])
+            # Tabla de Insumos
+            st.write("Lista de Materiales:")
+            if 'df_insumos' not in st.session_state:
+                st.session_state.df_insumos = pd.DataFrame([
+                    {"Ingrediente": "Harina", "Costo": 5.00},
+                    {"Ingrediente": "Huevos", "Costo": 2.50},
+                    {"Ingrediente": "Packaging", "Costo": 1.50}
+                ])
             
-        edited_df = st.data_editor(st.session_state.df_insumos, num_rows="dynamic", use_container_width=True)
-        costo_materiales = edited_df["Costo"].sum()
+            # Los cambios se consolidan en session_state para no perderlos al cambiar de pestaña
+            def _consolidar_insumos():
+                st.session_state.df_insumos = aplicar_cambios_editor(st.session_state.df_insumos, st.session_state.editor_insumos)
+
+            edited_df = st.data_editor(st.session_state.df_insumos, num_rows="dynamic", use_container_width=True, key="editor_insumos", on_change=_consolidar_insumos)
+            costo_materiales = edited_df["Costo"].sum()
         
-        st.markdown(f"**Subtotal Materiales:** :red[${costo_materiales:,.2f}]")
+            st.markdown(f"**Subtotal Materiales:** :red[${costo_materiales:,.2f}]")
 
-    with col_prod_der:
-        st.markdown("#### 2. Mano de Obra y Fijos")
+        with col_prod_der:
+            st.markdown("#### 2. Mano de Obra y Fijos")
         
-        # Mano de Obra Directa (MOD)
-        salario_base = st.number_input("Salario Mensual Pastelero ($)", value=600.0)
-        minutos_elabaracion = st.number_input("Tiempo de Elaboración (Minutos)", value=120)
-        # Costo por minuto (asumiendo 192 horas al mes -> 11,520 minutos)
-        costo_minuto = salario_base / 11520
-        costo_mod = costo_minuto * minutos_elabaracion
+            # Mano de Obra Directa (MOD)
+            salario_base = st.number_input("Salario Mensual Pastelero ($)", value=600.0, key="lab_salario")
+            minutos_elabaracion = st.number_input("Tiempo de Elaboración (Minutos)", value=120, key="lab_minutos")
+            # Costo por minuto (asumiendo 192 horas al mes -> 11,520 minutos)
+            costo_mod = costo_mano_obra(salario_base, minutos_elabaracion)
         
-        st.write(f"Costo Mano de Obra: **${costo_mod:,.2f}**")
+            st.write(f"Costo Mano de Obra: **${costo_mod:,.2f}**")
         
-        # Asignación de Gastos Fijos (Carga Fabril)
-        st.markdown("---")
-        capacidad_mensual = st.number_input("Capacidad de Producción (Unidades/Mes)", value=100, help="¿Cuántos de estos puedes hacer al mes si te dedicas solo a esto?")
+            # Asignación de Gastos Fijos (Carga Fabril)
+            st.markdown("---")
+            capacidad_mensual = st.number_input("Capacidad de Producción (Unidades/Mes)", value=100, help="¿Cuántos de estos puedes hacer al mes si te dedicas solo a esto?", key="lab_capacidad")
         
-        # Traemos el OPEX total calculado en la App
-        costo_fijo_unitario = gastos_operativos_mes / capacidad_mensual if capacidad_mensual > 0 else 0
+            # Traemos el OPEX total calculado en la App
+            costo_fijo_unitario = carga_fijos_unitaria(gastos_operativos_mes, capacidad_mensual)
         
-        st.write(f"Carga de Fijos (Alquiler/Luz) por unidad: **${costo_fijo_unitario:,.2f}**")
+            st.write(f"Carga de Fijos (Alquiler/Luz) por unidad: **${costo_fijo_unitario:,.2f}**")
 
-    # CÁLCULO FINAL DEL COSTO UNITARIO
-    costo_total_unitario = costo_materiales + costo_mod + costo_fijo_unitario
+        # CÁLCULO FINAL DEL COSTO UNITARIO
+        costo_total_unitario = costo_materiales + costo_mod + costo_fijo_unitario
     
-    st.markdown("---")
-    st.markdown(f"### 📦 Costo Real Unitario: :red[${costo_total_unitario:,.2f}]")
+        st.markdown("---")
+        st.markdown(f"### 📦 Costo Real Unitario: :red[${costo_total_unitario:,.2f}]")
     
-    # SECCIÓN DE PRECIO DE VENTA
-    st.subheader("3. Definición de Precio y Ganancia")
+        # SECCIÓN DE PRECIO DE VENTA
+        st.subheader("3. Definición de Precio y Ganancia")
     
-    c_margin, c_price = st.columns(2)
+        c_margin, c_price = st.columns(2)
     
-    with c_margin:
-        margen_deseado = st.slider("Margen de Ganancia Deseado (%)", 10, 90, 30)
-        comision_platform = st.slider("Comisión Plataforma/Tarjeta (%)", 0, 30, 0)
+        with c_margin:
+            margen_deseado = st.slider("Margen de Ganancia Deseado (%)", 10, 90, 30, key="lab_margen")
+            comision_platform = st.slider("Comisión Plataforma/Tarjeta (%)", 0, 30, 0, key="lab_comision")
         
-    with c_price:
-        # Fórmula Correcta: Precio = Costo / (1 - %Margen)
-        denominador = 1 - ((margen_deseado + comision_platform) / 100)
+        with c_price:
+            # Fórmula Correcta: Precio = Costo / (1 - %Margen)
+            precio = precio_venta(costo_total_unitario, margen_deseado, comision_platform)
         
-        if denominador > 0:
-            precio_sugerido = costo_total_unitario / denominador
-            itbms_item = precio_sugerido * 0.07
-            precio_final_cliente = precio_sugerido + itbms_item
+            if precio is not None:
+                precio_sugerido, itbms_item, precio_final_cliente = precio
             
-            st.markdown(f"""
-            <div style="background-color: #e8f5e9; padding: 20px; border-radius: 10px; border: 2px solid #2e7d32; text-align: center;">
-                <small>Deberías cobrar (antes de impuestos):</small>
-                <h1 style="color: #2e7d32; margin: 0;">${precio_sugerido:,.2f}</h1>
-                <p>+ ITBMS (7%): ${itbms_item:,.2f}</p>
-                <hr>
-                <h3 style="color: #1b5e20;">Precio Final: ${precio_final_cliente:,.2f}</h3>
-            </div>
-            """, unsafe_allow_html=True)
+                st.markdown(f"""
+                <div style="background-color: #e8f5e9; padding: 20px; border-radius: 10px; border: 2px solid #2e7d32; text-align: center;">
+                    <small>Deberías cobrar (antes de impuestos):</small>
+                    <h1 style="color: #2e7d32; margin: 0;">${precio_sugerido:,.2f}</h1>
+                    <p>+ ITBMS (7%): ${itbms_item:,.2f}</p>
+                    <hr>
+                    <h3 style="color: #1b5e20;">Precio Final: ${precio_final_cliente:,.2f}</h3>
+                </div>
+                """, unsafe_allow_html=True)
             
-            # Botón para guardar en historial
-            if st.button("➕ Guardar en Historial"):
-                st.session_state.lab_precios.append({
-                    "Producto": producto_nombre,
-                    "Costo Unitario": f"${costo_total_unitario:,.2f}",
-                    "Precio Venta": f"${precio_sugerido:,.2f}",
-                    "Margen %": f"{margen_deseado}%",
-                    "Ganancia Neta": f"${precio_sugerido - costo_total_unitario:,.2f}"
-                })
-        else:
-            st.error("🚨 Matemáticamente imposible: Margen + Comisión supera el 100%.")
+                # Botón para guardar en historial
+                if st.button("➕ Guardar en Historial"):
+                    st.session_state.lab_precios.append({
+                        "Producto": producto_nombre,
+                        "Costo Unitario": f"${costo_total_unitario:,.2f}",
+                        "Precio Venta": f"${precio_sugerido:,.2f}",
+                        "Margen %": f"{margen_deseado}%",
+                        "Ganancia Neta": f"${precio_sugerido - costo_total_unitario:,.2f}"
+                    })
+            else:
+                st.error("🚨 Matemáticamente imposible: Margen + Comisión supera el 100%.")
 
-    # VISUALIZAR HISTORIAL
-    if st.session_state.lab_precios:
-        st.markdown("### 📋 Historial de Productos")
-        st.table(pd.DataFrame(st.session_state.lab_precios))
-        if st.button("🗑️ Limpiar Historial"):
-            st.session_state.lab_precios = []
+        # VISUALIZAR HISTORIAL
+        if st.session_state.lab_precios:
+            st.markdown("### 📋 Historial de Productos")
+            st.table(pd.DataFrame(st.session_state.lab_precios))
+            if st.button("🗑️ Limpiar Historial"):
+                st.session_state.lab_precios = []
+
+        # MODO CATÁLOGO: mismas fórmulas para todos los productos de un archivo
+        st.markdown("---")
+        st.subheader("4. Catálogo Completo (Precios en Lote)")
+        st.caption(f"Sube un CSV o Parquet con una fila por producto: {', '.join(COLUMNAS_CATALOGO)} y, opcionales, "
+                   f"{', '.join(COLUMNAS_OPCIONALES)} (si faltan se usan el salario, el margen y la comisión de arriba). "
+                   "Cada producto absorbe el OPEX según su capacidad, igual que en el cálculo unitario.")
+        archivo_catalogo = st.file_uploader("Catálogo de productos", type=['csv', 'parquet'], key="lab_catalogo")
+        if archivo_catalogo is not None:
+            try:
+                catalogo = cargar_catalogo(archivo_catalogo.getvalue())
+            except Exception as e:
+                st.error(f"Error leyendo el archivo: {e}")
+            else:
+                with latencias.fase("Precios de catálogo"):
+                    df_precios = precios_catalogo(catalogo, gastos_operativos_mes, salario_base, margen_deseado, comision_platform)
+                sin_precio = int(df_precios['Precio Sugerido'].isna().sum())
+                col_c1, col_c2, col_c3 = st.columns(3)
+                col_c1.metric("Productos", f"{len(df_precios):,}")
+                col_c2.metric("Precio Final Promedio", f"${df_precios['Precio Final'].mean():,.2f}")
+                col_c3.metric("Sin precio posible", f"{sin_precio:,}", "Margen + Comisión ≥ 100%" if sin_precio else None, delta_color="inverse" if sin_precio else "off")
+                st.dataframe(
+                    df_precios, hide_index=True, use_container_width=True,
+                    column_config={c: st.column_config.NumberColumn(c, format="$%,.2f") for c in ('Costo Materiales', 'Salario Base', *COLUMNAS_PRECIO)},
+                )
+                st.download_button("⬇️ Descargar precios (CSV)", data=lambda: df_precios.to_csv(index=False).encode('utf-8'),
+                                   file_name="precios_catalogo.csv", mime="text/csv", key="lab_descargar_catalogo")
 
 # --- TAB 4: SIMULADOR ESTRATÉGICO (MACRO) ---
-with tabs[3]:
+# Fragmento: mover las palancas solo re-ejecuta esta sección, no toda la app
+@st.fragment
+def render_simulador(base_ventas, base_cv, base_fijos, base_ebitda, margen_ebitda):
     st.subheader("🧪 Simulador Estratégico: '¿Qué pasaría si...?'")
     
     # 1. VISUALIZACIÓN DE CONTROLES (SLIDERS)
@@ -1098,13 +1005,13 @@ with tabs[3]:
         st.markdown("### 🎛️ Palancas de Mando")
         
         # SLIDER A: PRECIO
-        delta_precio = st.slider("💰 A. Subir Precios (%)", 0, 50, 0, step=1, help="Incremento directo al precio de venta.")
+        delta_precio = st.slider("💰 A. Subir Precios (%)", 0, 50, 0, step=1, help="Incremento directo al precio de venta.", key="sim_delta_precio")
         
         # SLIDER B: COSTOS (EFICIENCIA)
-        delta_costos = st.slider("✂️ B. Recortar Gastos Fijos (%)", 0, 50, 0, step=1, help="Optimización de Alquiler, Planilla y Otros Gastos.")
+        delta_costos = st.slider("✂️ B. Recortar Gastos Fijos (%)", 0, 50, 0, step=1, help="Optimización de Alquiler, Planilla y Otros Gastos.", key="sim_delta_costos")
         
         # SLIDER C: VOLUMEN
-        delta_volumen = st.slider("📦 C. Variación de Volumen (%)", -50, 50, 0, step=1, help="¿Qué pasa si vendes más o menos unidades?")
+        delta_volumen = st.slider("📦 C. Variación de Volumen (%)", -50, 50, 0, step=1, help="¿Qué pasa si vendes más o menos unidades?", key="sim_delta_volumen")
 
     # 2. MOTOR DE CÁLCULO (SIMULACIÓN)
     # Definimos Factores
@@ -1112,11 +1019,7 @@ with tabs[3]:
     f_costos_fijos = 1 - (delta_costos / 100)
     f_volumen = 1 + (delta_volumen / 100)
 
-    # Escenario Actual (Base)
-    base_ventas = ventas_mes
-    base_cv = costo_ventas_mes
-    base_fijos = gastos_operativos_mes
-    base_ebitda = ebitda_mes
+    # Escenario Actual (Base): llega como parámetro desde el backend
 
     # Escenario Simulado
     # Ventas: Afectadas por Precio y Volumen
@@ -1136,45 +1039,7 @@ with tabs[3]:
     with col_impact:
         st.markdown("### 🦈 Efecto en la Mandíbula")
         
-        # Datos para el gráfico comparativo
-        x_stages = ["Actual", "Simulado"]
-        y_ventas = [base_ventas, sim_ventas]
-        y_costos = [base_cv + base_fijos, sim_cv + sim_fijos]
-        
-        fig_sim = go.Figure()
-        
-        # Línea Ventas
-        fig_sim.add_trace(go.Scatter(
-            x=x_stages, y=y_ventas, mode='lines+markers+text', name='Ventas',
-            text=[f"${v/1000:.1f}k" for v in y_ventas], textposition="top center",
-            line=dict(color='#1565c0', width=4)
-        ))
-        
-        # Línea Costos
-        fig_sim.add_trace(go.Scatter(
-            x=x_stages, y=y_costos, mode='lines+markers+text', name='Costos Totales',
-            text=[f"${v/1000:.1f}k" for v in y_costos], textposition="bottom center",
-            line=dict(color='#c62828', width=4)
-        ))
-        
-        # Sombreado de Utilidad (Area entre líneas)
-        fig_sim.add_trace(go.Scatter(
-            x=x_stages, y=y_ventas,
-            fill=None, mode='none', showlegend=False
-        ))
-        fig_sim.add_trace(go.Scatter(
-            x=x_stages, y=y_costos,
-            fill='tonexty', mode='none', showlegend=False,
-            fillcolor='rgba(76, 175, 80, 0.2)' if sim_ebitda > base_ebitda else 'rgba(239, 83, 80, 0.2)'
-        ))
-
-        fig_sim.update_layout(
-            title="Apertura de la Mandíbula (Rentabilidad)",
-            yaxis_title="Dinero ($)",
-            height=300,
-            margin=dict(l=20, r=20, t=40, b=20),
-            showlegend=True
-        )
+        fig_sim = figura_simulador(base_ventas, sim_ventas, base_cv + base_fijos, sim_cv + sim_fijos, sim_ebitda > base_ebitda)
         st.plotly_chart(fig_sim, use_container_width=True)
 
     # 4. METRICAS DE RESULTADO (VERDE SI LOGRA EL LEGADO)
@@ -1265,276 +1130,266 @@ with tabs[3]:
     else:
         st.error("Tu estructura de costos variables es demasiado alta. Incluso con precios infinitos, el margen variable no cubre el 15% de rentabilidad. ¡Optimiza costos variables primero!")
 
-# ==========================================
-# 📊 GENERADOR DE REPORTE "ULTIMATE CONSULTANT" (V FINAL)
-# ==========================================
-# Este motor genera un informe de 4-5 páginas con calidad de auditoría.
-
-def create_ultimate_report():
-    class PDF(FPDF):
-        def header(self):
-            # Banner Superior Azul Oscuro
-            self.set_fill_color(26, 35, 126) # Azul Navy
-            self.rect(0, 0, 210, 35, 'F')
-            
-            # Títulos
-            self.set_y(10)
-            self.set_font('Arial', 'B', 20)
-            self.set_text_color(255)
-            self.cell(0, 10, 'INFORME DE SALUD FINANCIERA', 0, 1, 'R')
-            self.set_font('Arial', '', 10)
-            self.cell(0, 5, 'SG CONSULTING | DIVISIÓN DE ESTRATEGIA', 0, 1, 'R')
-            self.ln(15)
-
-        def footer(self):
-            self.set_y(-15)
-            self.set_font('Arial', 'I', 8)
-            self.set_text_color(128)
-            fecha = datetime.now().strftime("%d/%m/%Y")
-            self.cell(0, 10, f'Confidencial - Generado el {fecha} | Página {self.page_no()}', 0, 0, 'C')
-
-        # --- UTILIDADES GRÁFICAS ---
-        def chapter_title(self, num, label):
-            self.set_font('Arial', 'B', 14)
-            self.set_fill_color(230, 230, 230)
-            self.set_text_color(0)
-            self.ln(5)
-            self.cell(0, 10, f"  {num}. {label.upper()}", 0, 1, 'L', 1)
-            self.ln(5)
-
-        def draw_kpi_box(self, x, y, title, value, status_color, subtitle):
-            self.set_xy(x, y)
-            self.set_fill_color(255, 255, 255)
-            self.set_draw_color(200, 200, 200)
-            self.rect(x, y, 45, 30) # Caja
-            
-            # Título
-            self.set_xy(x, y+2)
-            self.set_font('Arial', 'B', 8)
-            self.set_text_color(100)
-            self.cell(45, 5, title, 0, 1, 'C')
-            
-            # Valor
-            self.set_xy(x, y+8)
-            self.set_font('Arial', 'B', 14)
-            # Color del Texto según Estado
-            if status_color == 'R': self.set_text_color(198, 40, 40)
-            elif status_color == 'A': self.set_text_color(255, 143, 0)
-            else: self.set_text_color(46, 125, 50)
-            self.cell(45, 10, value, 0, 1, 'C')
-            
-            # Subtítulo (Diagnóstico corto)
-            self.set_xy(x, y+20)
-            self.set_font('Arial', '', 7)
-            self.set_text_color(80)
-            self.cell(45, 5, subtitle, 0, 1, 'C')
-
-        def draw_bar_chart_row(self, label, value, max_val, color_rgb):
-            # Simula una barra de gráfico horizontal
-            self.set_font('Arial', '', 10)
-            self.set_text_color(0)
-            self.cell(50, 8, label, 0, 0)
-            
-            # Calcular ancho barra
-            if max_val > 0:
-                bar_w = (value / max_val) * 100 # 100mm max width
-            else:
-                bar_w = 1
-            
-            # Dibujar barra
-            self.set_fill_color(color_rgb[0], color_rgb[1], color_rgb[2])
-            current_y = self.get_y()
-            current_x = self.get_x()
-            self.rect(current_x, current_y+1, bar_w, 6, 'F')
-            
-            # Valor texto al final
-            self.set_xy(current_x + bar_w + 2, current_y)
-            self.cell(30, 8, f"${value:,.0f}", 0, 1)
+# --- TAB 4 (CONT.): MODO ESTOCÁSTICO (MONTE CARLO) ---
+@st.fragment
+def render_montecarlo(base_ventas, base_cv, base_fijos):
+    st.markdown("---")
+    st.subheader("🎲 Modo Estocástico: ¿Qué tan probable es lograrlo?")
+    st.caption("En vez de un solo escenario, define un rango para cada palanca y simulamos miles de futuros posibles.")
+
+    col_mc_controles, col_mc_precio, col_mc_costos, col_mc_volumen = st.columns([1, 1, 1, 1])
+
+    with col_mc_controles:
+        tipo_dist = st.radio("Distribución", TIPOS_DISTRIBUCION, key="mc_tipo",
+                             help="Triangular: mín / más probable / máx. Normal: media = más probable, rango = ±3σ.")
+        n_escenarios = st.select_slider("Escenarios", [10_000, 100_000, 250_000, 1_000_000], value=100_000, key="mc_escenarios")
+
+    palancas = {}
+    for col, nombre, etiqueta, rango, defecto in [
+        (col_mc_precio, "precio", "💰 Precio (%)", (-50.0, 100.0), (0.0, 5.0, 15.0)),
+        (col_mc_costos, "costos", "✂️ Recorte Fijos (%)", (-50.0, 100.0), (0.0, 5.0, 10.0)),
+        (col_mc_volumen, "volumen", "📦 Volumen (%)", (-100.0, 100.0), (-20.0, 0.0, 10.0)),
+    ]:
+        with col:
+            st.markdown(f"**{etiqueta}**")
+            minimo = st.number_input("Mínimo", rango[0], rango[1], defecto[0], step=1.0, key=f"mc_{nombre}_min")
+            probable = st.number_input("Más probable", rango[0], rango[1], defecto[1], step=1.0, key=f"mc_{nombre}_probable")
+            maximo = st.number_input("Máximo", rango[0], rango[1], defecto[2], step=1.0, key=f"mc_{nombre}_max")
+            palancas[nombre] = Palanca(minimo, probable, maximo)
+
+    resultado = simular_montecarlo(base_ventas, base_cv, base_fijos, palancas["precio"], palancas["costos"], palancas["volumen"],
+                                   tipo=tipo_dist, n_escenarios=n_escenarios)
+
+    col_mc1, col_mc2, col_mc3, col_mc4 = st.columns(4)
+    col_mc1.metric("EBITDA P5 (Pesimista)", f"${resultado.percentiles_ebitda['P5']:,.0f}")
+    col_mc2.metric("EBITDA P50 (Mediana)", f"${resultado.percentiles_ebitda['P50']:,.0f}")
+    col_mc3.metric("EBITDA P95 (Optimista)", f"${resultado.percentiles_ebitda['P95']:,.0f}")
+    col_mc4.metric(f"Probabilidad Legado (≥{META_LEGADO:.0f}%)", f"{resultado.prob_legado:.1%}",
+                   f"{resultado.prob_perdida:.1%} con pérdida", delta_color="off")
+
+    col_mc_g1, col_mc_g2 = st.columns(2)
+    with col_mc_g1:
+        centros, conteos = resultado.histograma_ebitda
+        st.plotly_chart(figura_distribucion(centros, conteos, resultado.percentiles_ebitda, "Distribución del EBITDA Mensual", "EBITDA ($)"), use_container_width=True)
+    with col_mc_g2:
+        centros, conteos = resultado.histograma_margen
+        st.plotly_chart(figura_distribucion(centros, conteos, resultado.percentiles_margen, "Distribución del Margen EBITDA", "Margen (%)",
+                                            formato="%{x:.1f}%", meta=META_LEGADO), use_container_width=True)
+
+# --- TAB 4 (CONT.): SUPERFICIE DE SENSIBILIDAD ---
+@st.fragment
+def render_sensibilidad(base_ventas, base_cv, base_fijos):
+    st.markdown("---")
+    st.subheader("🗺️ Mapa de Sensibilidad: Todas las Combinaciones")
+    st.caption("Evaluamos todas las combinaciones de Precio (0–50%), Recorte de Fijos (0–50%) y Volumen (−50% a +50%) de una sola vez.")
 
-    pdf = PDF()
-    pdf.add_page()
+    superficie = superficie_sensibilidad(base_ventas, base_cv, base_fijos)
+    minima = combinacion_minima(superficie)
 
-    # ===================== PÁGINA 1: RESUMEN EJECUTIVO =====================
-    
-    # 1.1 INTRODUCCIÓN
-    pdf.set_font('Arial', '', 11)
-    pdf.multi_cell(0, 6, "El siguiente informe presenta un diagnóstico profundo de la salud operativa, financiera y de solvencia de la empresa. Los datos han sido sometidos a pruebas de estrés para identificar riesgos ocultos.")
-    
-    # 1.2 EL VEREDICTO (TEXTO GRANDE)
-    pdf.ln(5)
-    pdf.set_font('Arial', 'B', 12)
-    pdf.set_fill_color(255, 235, 238) # Fondo suave alerta
-    pdf.cell(0, 10, "  VEREDICTO DEL ANALISTA:", 0, 1, 'L', 1)
-    
-    pdf.set_font('Arial', 'I', 12)
-    pdf.set_text_color(50)
-    pdf.multi_cell(0, 8, f"\"{veredicto_final}\"")
-    pdf.ln(5)
+    if minima is None:
+        st.error(f"Ninguna combinación de las palancas alcanza el {META_LEGADO:.0f}% de margen. Optimiza costos variables primero.")
+    elif minima['precio'] == minima['costos'] == minima['volumen'] == 0:
+        st.success(f"✅ Tu estructura actual ya es de Legado ({minima['margen']:.1f}%). "
+                   f"El {minima['cobertura']:.0%} de las combinaciones mantiene la meta: usa el mapa para ver tu colchón.")
+    else:
+        st.success(f"🎯 **Ruta de menor esfuerzo al Legado:** Precio +{minima['precio']}%, Fijos −{minima['costos']}%, "
+                   f"Volumen {minima['volumen']:+d}% → Margen {minima['margen']:.1f}% (EBITDA ${minima['ebitda']:,.0f}). "
+                   f"El {minima['cobertura']:.0%} de las combinaciones llega a la meta.")
+
+    recorte_mapa = st.slider("✂️ Recorte de Gastos Fijos para el mapa (%)", 0, 50, 0, step=1, key="sens_recorte")
+    ic = superficie.indice(superficie.costos, recorte_mapa)
+    # Ejes del mapa: X = precio, Y = volumen (por eso se transpone el corte)
+    corte_ebitda = superficie.ebitda[:, ic, :].T
+    corte_margen = superficie.margen[:, ic, :].T
+
+    col_mapa1, col_mapa2 = st.columns(2)
+    with col_mapa1:
+        st.plotly_chart(figura_mapa_sensibilidad(superficie.precios, superficie.volumenes, corte_ebitda,
+                                                 "EBITDA Mensual ($)", "EBITDA", "$%{z:,.0f}"), use_container_width=True)
+    with col_mapa2:
+        st.plotly_chart(figura_mapa_sensibilidad(superficie.precios, superficie.volumenes, corte_margen,
+                                                 "Margen EBITDA (%) e Iso-Márgenes", "Margen %", "%{z:.1f}%",
+                                                 niveles=(-20, 40, 5), meta=META_LEGADO), use_container_width=True)
+
+    base_tornado, impactos = impacto_palancas(superficie)
+    st.plotly_chart(figura_tornado(base_tornado, impactos), use_container_width=True)
+
+with tabs[3], latencias.fase("Pestaña Simulador", pestana_visible(3)):
+    if pestana_visible(3):
+        render_simulador(ventas_mes, costo_ventas_mes, gastos_operativos_mes, ebitda_mes, margen_ebitda)
+        render_montecarlo(ventas_mes, costo_ventas_mes, gastos_operativos_mes)
+        render_sensibilidad(ventas_mes, costo_ventas_mes, gastos_operativos_mes)
+
+# --- TAB 9: PORTAFOLIO DE CLIENTES (TAMIZAJE) ---
+# Columnas visibles de la tabla del portafolio -> (título, formato)
+COLUMNAS_PORTAFOLIO = {
+    'ventas_mes': ("Ventas/mes", "$%,.0f"),
+    'ebitda_mes': ("EBITDA/mes", "$%,.0f"),
+    'margen_ebitda': ("Margen EBITDA", "%.1f%%"),
+    'punto_equilibrio_mes': ("P. Equilibrio", "$%,.0f"),
+    'ccc': ("CCC (días)", "%.0f"),
+    'prueba_acida': ("Prueba Ácida", "%.2fx"),
+    'cobertura_bancaria': ("Cobertura", "%.1fx"),
+    'valor_empresa_actual_base': ("Valor Empresa", "$%,.0f"),
+    'n_acciones': ("Acciones", "%d"),
+}
+
+@st.fragment
+def render_portafolio():
+    # Fragmento: filtrar, ordenar y elegir cliente solo recalcula esta pestaña
+    with st.expander("👥 Importar planillas de clientes (CSV/Parquet)"):
+        st.caption(f"Una fila por empleado con las columnas {', '.join(COLUMNAS_IMPORTACION)}. La planilla de cada "
+                   "cliente queda en el almacén para el gráfico 'Realidad de Nómina' y el informe PDF.")
+        archivo_planillas = st.file_uploader("Archivo de planillas", type=['csv', 'parquet'], key="archivo_planillas")
+        if archivo_planillas is not None:
+            try:
+                planillas = cargar_planillas(archivo_planillas.getvalue())
+            except Exception as e:
+                st.error(f"Error leyendo el archivo: {e}")
+            else:
+                for aviso in planillas.avisos:
+                    st.warning(aviso)
+                st.dataframe(planillas.por_cliente, hide_index=True, use_container_width=True,
+                             column_config={c: st.column_config.NumberColumn(c, format="$%,.2f") for c in ('Salario Bruto', *COLUMNAS_RESULTADO)})
+                if st.button(f"💾 Guardar {len(planillas.por_cliente):,} planillas en el almacén", key="guardar_planillas"):
+                    st.success(f"✅ {guardar_planillas(AlmacenHistoricos(), planillas):,} planillas guardadas.")
+
+    portafolio = cargar_portafolio(AlmacenHistoricos())
+    tabla = portafolio.tabla
+    if tabla.empty:
+        st.info("Aún no hay clientes guardados. En el 'Modo B: Estratega', carga un histórico y usa '💾 Guardar en el almacén de clientes'.")
+        return
+
+    st.caption(f"{len(tabla):,} clientes · promedios de los últimos {portafolio.meses} meses de cada uno · "
+               "Balance General guardado con cada cliente (o los valores por defecto).")
+    if portafolio.omitidos:
+        st.warning("Clientes omitidos: " + "; ".join(f"{c} ({motivo})" for c, motivo in portafolio.omitidos[:10]))
+
+    conteo = tabla['veredicto'].value_counts()
+    for col, (veredicto, icono) in zip(st.columns(len(MOTOR_REGLAS.veredictos)), MOTOR_REGLAS.veredictos):
+        col.metric(f"{icono} {veredicto.split('.')[0].capitalize()}", f"{int(conteo.get(veredicto, 0)):,}")
+
+    col_f1, col_f2, col_f3, col_f4 = st.columns([2, 1.2, 1.2, 0.8])
+    with col_f1:
+        filtro_veredictos = st.multiselect("Veredicto", [v for v, _ in MOTOR_REGLAS.veredictos], key="portafolio_veredictos",
+                                           placeholder="Todos los veredictos")
+    with col_f2:
+        buscar = st.text_input("Buscar cliente", key="portafolio_buscar")
+    with col_f3:
+        orden = st.selectbox("Ordenar por", list(COLUMNAS_PORTAFOLIO), format_func=lambda c: COLUMNAS_PORTAFOLIO[c][0],
+                             index=1, key="portafolio_orden")
+    with col_f4:
+        descendente = st.toggle("Mayor primero", key="portafolio_desc")
+        solo_acciones = st.toggle("Con alertas", key="portafolio_acciones")
+
+    vista = filtrar_portafolio(tabla, filtro_veredictos, buscar, solo_acciones, orden, not descendente)
+    st.dataframe(
+        vista[['icono', 'cliente', 'hasta', *COLUMNAS_PORTAFOLIO]],
+        hide_index=True, use_container_width=True,
+        column_config={
+            'icono': st.column_config.TextColumn("", width="small"),
+            'cliente': st.column_config.TextColumn("Cliente"),
+            'hasta': st.column_config.TextColumn("Último mes"),
+            **{c: st.column_config.NumberColumn(titulo, format=fmt) for c, (titulo, fmt) in COLUMNAS_PORTAFOLIO.items()},
+        },
+    )
 
-    # 1.3 TABLERO DE CONTROL (KPIs SEMÁFORO)
-    pdf.chapter_title(1, "Signos Vitales (KPIs)")
-    
-    # Recalculamos estados rápidos para el PDF
-    r_alq = (gasto_alquiler_mes / ventas_mes) * 100 if ventas_mes > 0 else 0
-    r_nom = (gasto_planilla_mes / utilidad_bruta_mes) * 100 if utilidad_bruta_mes > 0 else 0
-    pasivo_c = cuentas_pagar if cuentas_pagar > 0 else 1
-    r_acid = (caja + cuentas_cobrar) / pasivo_c
-    
-    # Fila de 4 Cajas
-    y_start = pdf.get_y() + 5
-    pdf.draw_kpi_box(10, y_start, "Eficiencia Renta", f"{r_alq:.1f}%", 'R' if r_alq > 15 else 'V', "Meta: <15%")
-    pdf.draw_kpi_box(60, y_start, "Peso Nómina", f"{r_nom:.1f}%", 'R' if r_nom > 45 else 'V', "Meta: <45% (UB)")
-    pdf.draw_kpi_box(110, y_start, "Prueba Ácida", f"{r_acid:.2f}x", 'R' if r_acid < 0.8 else 'V', "Liquidez Real")
-    pdf.draw_kpi_box(160, y_start, "Margen EBITDA", f"{margen_ebitda:.1f}%", 'R' if margen_ebitda < 10 else 'V', "Potencia Operativa")
-    
-    pdf.set_y(y_start + 35)
+    # Detalle de un cliente
+    cliente = st.selectbox("🔎 Ver detalle", vista['cliente'], index=None, placeholder="Elige un cliente de la lista...",
+                           key="portafolio_cliente")
+    if cliente is None:
+        return
+    fila = tabla.loc[tabla['cliente'] == cliente].iloc[0]
+    entradas_cliente = EntradasFinancieras(**{f: float(fila[f]) for f in EntradasFinancieras.__dataclass_fields__})
+    kpis_cliente = calcular_diagnostico(entradas_cliente)
+
+    st.markdown(f"#### {kpis_cliente.icono_veredicto} {cliente}: {kpis_cliente.veredicto_final}")
+    col_d1, col_d2, col_d3, col_d4 = st.columns(4)
+    col_d1.metric("EBITDA/mes", f"${kpis_cliente.ebitda_mes:,.0f}", f"{kpis_cliente.margen_ebitda:.1f}%")
+    col_d2.metric("Punto de Equilibrio", f"${kpis_cliente.punto_equilibrio_mes:,.0f}",
+                  f"${kpis_cliente.margen_seguridad_mes:,.0f} de colchón")
+    col_d3.metric("CCC", f"{kpis_cliente.ccc:.0f} días", f"Prueba ácida {kpis_cliente.prueba_acida:.2f}x", delta_color="off")
+    col_d4.metric("Valor Empresa", f"${kpis_cliente.valor_empresa_actual_base:,.0f}",
+                  f"Patrimonio ${kpis_cliente.patrimonio_estimado:,.0f}", delta_color="off")
+    for accion in kpis_cliente.acciones_choque:
+        st.error(accion)
+    historico_cliente = AlmacenHistoricos().cargar_historico(cliente)
+    st.plotly_chart(figura_mandibulas(historico_cliente, VENTANA_PORTAFOLIO), use_container_width=True)
+
+with tabs[8], latencias.fase("Pestaña Portafolio", pestana_visible(8)):
+    if pestana_visible(8):
+        st.subheader("🗂️ Portafolio de Clientes: ¿Quién necesita ayuda hoy?")
+        render_portafolio()
 
-    # ===================== PÁGINA 1 (Cont): CASCADA =====================
-    pdf.chapter_title(2, "Estructura de Resultados (P&L)")
-    
-    # Dibujamos "Gráfico" de Barras nativo
-    pdf.draw_bar_chart_row("Ventas Totales", ventas_mes, ventas_mes, (33, 150, 243)) # Azul
-    pdf.draw_bar_chart_row("Utilidad Bruta", utilidad_bruta_mes, ventas_mes, (100, 100, 100)) # Gris
-    pdf.draw_bar_chart_row("Gastos Operativos", gastos_operativos_mes, ventas_mes, (239, 83, 80)) # Rojo
-    pdf.draw_bar_chart_row("EBITDA (Caja)", ebitda_mes, ventas_mes, (76, 175, 80) if ebitda_mes > 0 else (255, 152, 0)) # Verde/Naranja
-    pdf.draw_bar_chart_row("Utilidad Neta", utilidad_neta_mes, ventas_mes, (21, 101, 192)) # Azul Oscuro
-    
-    pdf.ln(5)
-    # Tabla Detallada
-    pdf.set_font('Arial', 'B', 10)
-    pdf.cell(100, 8, "Concepto", 1); pdf.cell(50, 8, "Monto ($)", 1, 1, 'C')
-    pdf.set_font('Arial', '', 10)
-    pdf.cell(100, 6, "Ingresos Operativos", 1); pdf.cell(50, 6, f"${ventas_mes:,.2f}", 1, 1, 'R')
-    pdf.cell(100, 6, "(-) Costos Variables", 1); pdf.cell(50, 6, f"${costo_ventas_mes:,.2f}", 1, 1, 'R')
-    pdf.cell(100, 6, "(-) Gastos Estructurales", 1); pdf.cell(50, 6, f"${gastos_operativos_mes:,.2f}", 1, 1, 'R')
-    pdf.set_font('Arial', 'B', 10)
-    pdf.cell(100, 6, "(=) EBITDA Normalizado", 1); pdf.cell(50, 6, f"${ebitda_mes:,.2f}", 1, 1, 'R')
-
-    # ===================== PÁGINA 2: ANÁLISIS PROFUNDO =====================
-    pdf.add_page()
-    pdf.chapter_title(3, "Diagnóstico de Solvencia & Caja")
-    
-    # 3.1 DINERO ATRAPADO
-    dinero_atrapado = cuentas_cobrar + inventario
-    pdf.set_font('Arial', '', 11)
-    pdf.cell(0, 10, "Análisis del Ciclo de Conversión de Efectivo (CCC):", 0, 1)
-    
-    # Caja de Dinero Atrapado
-    pdf.set_fill_color(245, 245, 245)
-    pdf.rect(10, pdf.get_y(), 190, 25, 'F')
-    pdf.set_x(15)
-    pdf.set_font('Arial', 'B', 12); pdf.set_text_color(198, 40, 40)
-    pdf.cell(90, 10, "CAPITAL INMOVILIZADO:", 0, 0)
-    pdf.set_font('Arial', 'B', 16)
-    pdf.cell(50, 10, f"${dinero_atrapado:,.2f}", 0, 1)
-    
-    pdf.set_x(15); pdf.set_font('Arial', 'I', 10); pdf.set_text_color(80)
-    pdf.cell(0, 8, f"Desglose: ${cuentas_cobrar:,.0f} en Clientes + ${inventario:,.0f} en Inventario.", 0, 1)
-    pdf.ln(10)
-    
-    # 3.2 PUNTO DE EQUILIBRIO
-    pdf.set_text_color(0)
-    pdf.cell(0, 8, f"Punto de Equilibrio Mensual: ${punto_equilibrio_mes:,.2f}", 0, 1)
-    pdf.set_font('Arial', '', 10)
-    if ventas_mes > punto_equilibrio_mes:
-        diff = ventas_mes - punto_equilibrio_mes
-        pdf.multi_cell(0, 5, f"STATUS: SUPERAVIT. Usted vende ${diff:,.0f} por encima de su necesidad mínima. La empresa genera valor.")
+
+# ==========================================
+# 📊 REPORTE PDF (EN SEGUNDO PLANO)
+# ==========================================
+# El informe se arma en motor.reporte, en la cola de trabajos del proceso:
+# la app sigue respondiendo mientras se genera y pedir dos veces el mismo
+# informe (mismos datos) devuelve el PDF ya generado.
+
+@st.fragment(run_every=0.5)
+def seguir_reporte(id_reporte):
+    trabajo = COLA_REPORTES.estado(id_reporte)
+    if trabajo is None or not trabajo.activo:
+        # Terminó: una corrida completa muestra el botón de descarga
+        st.rerun()
+    if trabajo.estado == EN_COLA:
+        st.progress(0.0, text=f"⏳ En cola ({trabajo.espera_s:.0f} s)...")
     else:
-        diff = punto_equilibrio_mes - ventas_mes
-        pdf.multi_cell(0, 5, f"STATUS: DEFICIT. Usted necesita vender ${diff:,.0f} adicionales solo para no perder dinero.")
+        st.progress(trabajo.progreso, text=f"🖨️ {trabajo.etapa or 'Generando'}...")
 
-    # 3.3 VALORACIÓN
-    pdf.ln(5)
-    pdf.chapter_title(4, "Valoración Estimada de Mercado")
-    
-    valor_negocio_est = ebitda_mes * 12 * multiplo_global
-    patrimonio_est = valor_negocio_est - deuda_bancaria # Simplificado
-    if patrimonio_est < 0: patrimonio_est = 0
-    
-    pdf.set_font('Arial', '', 11)
-    pdf.cell(0, 8, f"Basado en un múltiplo de mercado de {multiplo_global}x EBITDA Anualizado:", 0, 1)
-    
-    # Tabla Valoración
-    pdf.set_fill_color(227, 242, 253) # Azul muy claro
-    pdf.rect(60, pdf.get_y()+2, 90, 30, 'F')
-    pdf.set_y(pdf.get_y()+5)
-    
-    pdf.set_x(60)
-    pdf.set_font('Arial', 'B', 12)
-    pdf.cell(90, 8, f"VALOR OPERATIVO: ${valor_negocio_est:,.0f}", 0, 1, 'C')
-    pdf.set_x(60)
-    pdf.set_font('Arial', '', 10)
-    pdf.cell(90, 6, f"(-) Deuda Bancaria: ${deuda_bancaria:,.0f}", 0, 1, 'C')
-    pdf.set_x(60)
-    pdf.set_font('Arial', 'B', 14); pdf.set_text_color(21, 101, 192)
-    pdf.cell(90, 10, f"PATRIMONIO NETO: ${patrimonio_est:,.0f}", 0, 1, 'C')
-    pdf.set_text_color(0)
-    pdf.ln(10)
-
-    # ===================== PÁGINA 3: PLAN DE ACCIÓN =====================
-    pdf.add_page()
-    pdf.set_fill_color(183, 28, 28) # Rojo
-    pdf.rect(0, 0, 210, 30, 'F')
-    pdf.set_y(10)
-    pdf.set_font('Arial', 'B', 16); pdf.set_text_color(255)
-    pdf.cell(0, 10, "PLAN DE CHOQUE ESTRATÉGICO", 0, 1, 'C')
-    pdf.ln(25)
-    
-    pdf.set_text_color(0)
-    pdf.set_font('Arial', 'I', 11)
-    pdf.multi_cell(0, 8, "Basado en las alertas detectadas, se prescriben las siguientes acciones inmediatas de cumplimiento obligatorio para garantizar la continuidad del negocio.")
-    pdf.ln(5)
-    
-    # Recuperar Plan de Choque
-    acciones = st.session_state.get('plan_choque', ["Ejecute el análisis en la app primero."])
-    
-    for i, accion in enumerate(acciones, 1):
-        # Limpieza Markdown
-        txt = accion.replace("**", "").replace("🔴", "").replace("⚠️", "[ALERTA]").replace("🏢", "").replace("👥", "").replace("✨", "").replace("🏦", "").replace("🩸", "")
-        txt = txt.encode('latin-1', 'replace').decode('latin-1')
-        
-        # Caja de Acción
-        pdf.set_fill_color(255, 255, 255)
-        pdf.set_draw_color(0)
-        pdf.set_line_width(0.5)
-        
-        current_y = pdf.get_y()
-        # Icono numérico
-        pdf.set_font('Arial', 'B', 16); pdf.set_text_color(183, 28, 28)
-        pdf.text(10, current_y + 8, f"{i}")
-        
-        # Texto
-        pdf.set_x(20)
-        pdf.set_font('Arial', '', 11); pdf.set_text_color(0)
-        pdf.multi_cell(180, 6, txt)
-        pdf.ln(5)
-        
-        # Línea separadora
-        pdf.set_draw_color(200, 200, 200)
-        pdf.line(10, pdf.get_y(), 200, pdf.get_y())
-        pdf.ln(5)
-
-    # ===================== FIRMA Y DISCLAIMER =====================
-    pdf.ln(15)
-    pdf.set_font('Arial', 'I', 8); pdf.set_text_color(100)
-    pdf.multi_cell(0, 4, "AVISO LEGAL: Este reporte es un diagnóstico automatizado basado en la información provista. SG Consulting no se hace responsable por decisiones tomadas sin la validación de un contador público autorizado.")
-    
-    return pdf.output(dest='S').encode('latin-1', 'replace')
+periodo_reporte = ""
+if tendencia is not None:
+    periodo_reporte = f"Período analizado: {tendencia['desde']} a {tendencia['hasta']} ({tendencia['meses']} meses, promedios mensuales)."
+datos_reporte = DatosReporte(entradas, periodo=periodo_reporte, fecha=datetime.now().strftime("%d/%m/%Y"),
+                             nomina=resumen_reporte(detalles_nomina))
 
 # --- BOTÓN DE DESCARGA ---
 st.sidebar.markdown("---")
 if st.sidebar.button("🖨️ Generar Reporte Auditoría (PDF)"):
-    try:
-        pdf_bytes = create_ultimate_report()
+    st.session_state['reporte_id'] = COLA_REPORTES.enviar(datos_reporte)
+
+id_reporte = st.session_state.get('reporte_id')
+trabajo_reporte = COLA_REPORTES.estado(id_reporte) if id_reporte else None
+if trabajo_reporte is not None:
+    if trabajo_reporte.activo:
+        with st.sidebar:
+            seguir_reporte(id_reporte)
+    elif trabajo_reporte.estado == LISTO:
         st.sidebar.download_button(
             label="💾 Descargar Informe Oficial",
-            data=pdf_bytes,
+            data=trabajo_reporte.resultado,
             file_name=f"SG_Consulting_Auditoria_{datetime.now().strftime('%Y%m%d')}.pdf",
             mime="application/pdf"
         )
         st.sidebar.success("✅ Informe generado correctamente.")
-    except Exception as e:
-        st.sidebar.error(f"Error al generar PDF: {e}")
+        if id_reporte not in st.session_state.setdefault('reportes_medidos', set()):
+            st.session_state.reportes_medidos.add(id_reporte)
+            latencias.agregar("Reporte PDF (segundo plano)", trabajo_reporte.duracion_s * 1000)
+        if id_reporte != huella_entradas(datos_reporte):
+            st.sidebar.caption("⚠️ Los datos cambiaron desde que se generó este informe. Vuelve a generarlo para actualizarlo.")
+    else:
+        st.sidebar.error(f"Error al generar PDF: {trabajo_reporte.error}")
+
+# ==========================================
+# 🩺 DIAGNÓSTICO DE LATENCIA
+# ==========================================
+registro_latencias = latencias.cerrar(modo=modo_operacion, pestana=st.session_state.get("pestana_activa"))
+st.session_state.latencias_sesion.agregar(registro_latencias)
+LATENCIAS_PROCESO.agregar(registro_latencias)
+escribir_registro(registro_latencias)
+
+if mostrar_latencias:
+    with st.sidebar.expander("🩺 Diagnóstico de latencia", expanded=True):
+        st.caption(f"Sesión {registro_latencias['sesion']} · este rerun: {registro_latencias['fases_ms'][FASE_TOTAL]:,.0f} ms "
+                   "(la barra lateral incluye nómina y lectura)")
+        st.dataframe(pd.DataFrame(list(registro_latencias['fases_ms'].items()), columns=['Fase', 'ms']).round(1),
+                     hide_index=True, use_container_width=True)
+        for titulo, agregador in (("Esta sesión", st.session_state.latencias_sesion), ("Servidor (todas las sesiones)", LATENCIAS_PROCESO)):
+            st.markdown(f"**{titulo}**")
+            st.dataframe(pd.DataFrame(agregador.resumen()).round(1), hide_index=True, use_container_width=True)
 
 
 
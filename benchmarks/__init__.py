@@ -0,0 +1,7 @@
+# ==========================================
+# ⏱️ BENCHMARKS DE SG CONSULTING
+# ==========================================
+# Generadores de datos sintéticos (generadores.py) y suite de rutas
+# calientes con líneas base y comparación entre corridas (suite.py).
+# Se ejecutan desde la raíz del repositorio:
+#     python -m benchmarks.suite --guardar benchmarks/linea_base.json
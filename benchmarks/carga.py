@@ -0,0 +1,240 @@
+# ==========================================
+# 👥 PRUEBA DE CARGA (SESIONES CONCURRENTES)
+# ==========================================
+"""
+Simula N consultores usando la app a la vez, para dimensionar servidores
+con datos.
+
+Cada sesión es un AppTest (el arnés sin navegador de Streamlit) que
+recorre el GUION: abrir la app, editar la nómina, mover el Simulador,
+pasar al Modo B, subir su propio histórico y generar el PDF.
+
+AppTest reemplaza estado global de Streamlit en cada corrida (runtime,
+configuración), así que dos sesiones no pueden correr a la vez en el
+mismo proceso: cada sesión simulada vive en su propio proceso y todas
+arrancan juntas (barrera). Compiten por los mismos núcleos que en un
+servidor real, pero no comparten cachés de proceso (cada consultor sube
+sus propios datos, así que casi no los compartirían).
+
+La latencia de rerun es la que mide la propia app (motor.latencias:
+"Total rerun" del script), sin el costo del arnés. Por cada nivel de
+concurrencia se reporta:
+- latencia de rerun p50/p95/p99 (todas las sesiones),
+- tiempo hasta tener el PDF (clic -> informe listo),
+- rendimiento: reruns por segundo del conjunto de sesiones,
+- memoria por sesión: RSS que agrega la sesión sobre un proceso con la
+  app ya importada.
+
+Uso:
+    python -m benchmarks.carga --sesiones 1,2,4,8 --vueltas 2
+    python -m benchmarks.carga --sesiones 4 --guardar carga.json
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import statistics
+import sys
+import time
+import traceback
+from pathlib import Path
+
+from motor.latencias import FASE_TOTAL, percentil
+
+APP_DEFECTO = Path(__file__).resolve().parent.parent / "SG_Consulting_App.py"
+
+MODO_A = "Modo A: Diagnóstico Flash (Foto)"
+MODO_B = "Modo B: Estratega (Película)"
+PESTANA_SIMULADOR = "🔮 Simulador (Estrategia)"
+PESTANA_CASCADA = "💎 Cascada"
+
+# Espera máxima por un PDF (s) y pausa entre consultas de progreso
+ESPERA_MAX_PDF = 60.0
+PAUSA_SONDEO_PDF = 0.1
+
+
+def _rss_mb():
+    """RSS actual del proceso (MB); pico si /proc no está disponible."""
+    try:
+        with open("/proc/self/statm") as archivo:
+            paginas = int(archivo.read().split()[1])
+        return paginas * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError):
+        import resource
+        pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return pico / (1024 * 1024) if sys.platform == "darwin" else pico / 1024
+
+
+class Sesion:
+    """Un consultor simulado: su AppTest, sus datos y sus tiempos."""
+
+    def __init__(self, app, numero):
+        from streamlit.testing.v1 import AppTest
+
+        from benchmarks.generadores import historico_sintetico, planilla_sintetica
+        self.numero = numero
+        self.at = AppTest.from_file(str(app), default_timeout=ESPERA_MAX_PDF)
+        # Datos propios de cada consultor
+        self.historico_csv = historico_sintetico(24, semilla=numero).to_csv(index=False).encode("utf-8")
+        self.planilla = planilla_sintetica(8 + numero % 5, semilla=numero)
+        self.script_ms = {}
+        self.arnes_s = 0.0
+        self.tiempos_pdf = []
+        self.errores = []
+
+    def correr(self, paso):
+        inicio = time.perf_counter()
+        self.at.run()
+        self.arnes_s += time.perf_counter() - inicio
+        if self.at.exception:
+            self.errores.append(f"{paso}: {self.at.exception[0].value}")
+            return
+        # Último "Total rerun" registrado por la app para esta sesión
+        muestras = self.at.session_state["latencias_sesion"].muestras(FASE_TOTAL)
+        self.script_ms.setdefault(paso, []).append(muestras[-1])
+
+    # --- GUION ---
+    def abrir(self):
+        self.correr("abrir")
+
+    def editar_nomina(self):
+        # El editor de nómina consolida sus cambios en session_state.df_nomina
+        self.at.session_state["df_nomina"] = self.planilla
+        self.correr("editar_nomina")
+
+    def mover_simulador(self):
+        self.at.session_state["pestana_activa"] = PESTANA_SIMULADOR
+        self.correr("pestana_simulador")
+        for valor in (5, 10, 15):
+            self.at.slider(key="sim_delta_precio").set_value(valor)
+            self.correr("slider_simulador")
+        self.at.session_state["pestana_activa"] = PESTANA_CASCADA
+        self.correr("pestana_cascada")
+
+    def modo_b_con_historico(self):
+        self.at.sidebar.radio[0].set_value(MODO_B)
+        self.correr("cambiar_modo")
+        self.at.sidebar.file_uploader[0].set_value(("historico.csv", self.historico_csv, "text/csv"))
+        self.correr("subir_historico")
+
+    def generar_pdf(self):
+        inicio = time.perf_counter()
+        next(b for b in self.at.sidebar.button if "PDF" in b.label).click()
+        self.correr("clic_pdf")
+        while not self.at.sidebar.success and not self.at.sidebar.error:
+            if time.perf_counter() - inicio > ESPERA_MAX_PDF:
+                self.errores.append("pdf: tiempo de espera agotado")
+                return
+            time.sleep(PAUSA_SONDEO_PDF)
+            self.correr("sondeo_pdf")
+        self.tiempos_pdf.append(time.perf_counter() - inicio)
+
+    def volver_modo_a(self):
+        self.at.sidebar.radio[0].set_value(MODO_A)
+        self.correr("cambiar_modo")
+
+    GUION = (abrir, editar_nomina, mover_simulador, modo_b_con_historico, generar_pdf, volver_modo_a)
+
+    def recorrer(self, vueltas):
+        for _ in range(vueltas):
+            for paso in self.GUION:
+                if self.errores:
+                    return
+                paso(self)
+
+
+def _proceso_sesion(app, numero, vueltas, barrera, resultados):
+    # Sin archivo de latencias: la sesión lee sus tiempos de session_state
+    os.environ["SG_CONSULTING_LATENCIAS"] = ""
+    try:
+        # Librerías de la app ya cargadas: la memoria medida es la de la sesión
+        import pandas, plotly.graph_objects, streamlit  # noqa: F401,E401
+        sesion = Sesion(app, numero)
+        rss_base = _rss_mb()
+        barrera.wait()
+        inicio = time.perf_counter()
+        sesion.recorrer(vueltas)
+        resultados.put({
+            'numero': numero,
+            'segundos': time.perf_counter() - inicio,
+            'script_ms': sesion.script_ms,
+            'arnes_s': sesion.arnes_s,
+            'tiempos_pdf': sesion.tiempos_pdf,
+            'errores': sesion.errores,
+            'memoria_mb': _rss_mb() - rss_base,
+        })
+    except Exception:
+        resultados.put({'numero': numero, 'errores': [traceback.format_exc(limit=3)]})
+
+
+def correr_nivel(app, n_sesiones, vueltas):
+    """Corre `n_sesiones` sesiones a la vez (un proceso cada una) y devuelve las métricas."""
+    contexto = multiprocessing.get_context("spawn")
+    barrera = contexto.Barrier(n_sesiones + 1)
+    cola = contexto.Queue()
+    procesos = [contexto.Process(target=_proceso_sesion, args=(str(app), i, vueltas, barrera, cola), name=f"sesion-{i}")
+                for i in range(n_sesiones)]
+    for proceso in procesos:
+        proceso.start()
+    barrera.wait()
+    inicio = time.perf_counter()
+    sesiones = [cola.get() for _ in procesos]
+    duracion = time.perf_counter() - inicio
+    for proceso in procesos:
+        proceso.join()
+
+    por_paso = {}
+    for s in sesiones:
+        for paso, tiempos in s.get('script_ms', {}).items():
+            por_paso.setdefault(paso, []).extend(tiempos)
+    todas = [t for tiempos in por_paso.values() for t in tiempos]
+    pdf = [t for s in sesiones for t in s.get('tiempos_pdf', [])]
+    memoria = [s['memoria_mb'] for s in sesiones if 'memoria_mb' in s]
+    return {
+        'sesiones': n_sesiones,
+        'reruns': len(todas),
+        'segundos': duracion,
+        'reruns_por_s': len(todas) / duracion if duracion else float('nan'),
+        'rerun_p50_ms': percentil(sorted(todas), 50),
+        'rerun_p95_ms': percentil(sorted(todas), 95),
+        'rerun_p99_ms': percentil(sorted(todas), 99),
+        'pdf_p50_s': percentil(sorted(pdf), 50),
+        'pdf_p95_s': percentil(sorted(pdf), 95),
+        'memoria_por_sesion_mb': statistics.mean(memoria) if memoria else float('nan'),
+        'pasos_p50_ms': {paso: statistics.median(t) for paso, t in sorted(por_paso.items())},
+        'errores': [e for s in sesiones for e in s['errores']],
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Prueba de carga con sesiones simuladas de la app.")
+    parser.add_argument("--app", default=str(APP_DEFECTO), help="Script de Streamlit a probar")
+    parser.add_argument("--sesiones", default="1,2,4,8", help="Niveles de concurrencia, separados por coma")
+    parser.add_argument("--vueltas", type=int, default=1, help="Veces que cada sesión recorre el guion")
+    parser.add_argument("--guardar", default=None, help="Escribir los resultados en JSON")
+    args = parser.parse_args(argv)
+
+    niveles = [int(n) for n in args.sesiones.split(",") if n.strip()]
+    resultados = []
+    print(f"{'Sesiones':>8} {'Reruns':>7} {'Rerun/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+          f"{'PDF p95 s':>9} {'MB/sesión':>9}")
+    for n in niveles:
+        r = correr_nivel(args.app, n, args.vueltas)
+        resultados.append(r)
+        print(f"{n:>8} {r['reruns']:>7} {r['reruns_por_s']:>8.1f} {r['rerun_p50_ms']:>8.0f} {r['rerun_p95_ms']:>8.0f} "
+              f"{r['rerun_p99_ms']:>8.0f} {r['pdf_p95_s']:>9.2f} {r['memoria_por_sesion_mb']:>9.1f}")
+        for error in r['errores'][:5]:
+            print(f"  ❌ {error}", file=sys.stderr)
+
+    print("\nLatencia de rerun p50 por paso (último nivel):")
+    for paso, ms in resultados[-1]['pasos_p50_ms'].items():
+        print(f"  {paso:<20} {ms:8.1f} ms")
+
+    if args.guardar:
+        Path(args.guardar).write_text(json.dumps(resultados, indent=2, ensure_ascii=False), encoding="utf-8")
+        print(f"\n💾 Resultados -> {args.guardar}")
+    return 2 if any(r['errores'] for r in resultados) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
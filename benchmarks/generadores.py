@@ -0,0 +1,89 @@
+# ==========================================
+# 🧪 DATOS SINTÉTICOS PARA BENCHMARKS
+# ==========================================
+"""
+Generadores reproducibles (misma semilla -> mismos datos) con el formato
+exacto que consume la app: planilla del editor de nómina, plantilla
+mensual del Modo B, catálogo de productos del Lab de Precios y almacén de
+clientes del Portafolio.
+"""
+import numpy as np
+import pandas as pd
+
+from motor.almacen import AlmacenHistoricos
+from motor.historico import MESES
+from motor.lote_diagnostico import BALANCE_DEFECTO
+from motor.nomina import TIPO_FREELANCE, TIPO_PLANILLA
+
+# Proporciones del mes de ejemplo de la plantilla (Ventas = 1)
+PROPORCIONES_PLANTILLA = {
+    'Ventas': 1.0, 'Costo_Ventas': 0.60,
+    'Alquiler': 0.10, 'Planilla': 0.16, 'Otros_Gastos': 0.04,
+    'Depreciacion': 0.04, 'Intereses': 0.02, 'Impuestos': 0.03,
+}
+
+
+def planilla_sintetica(n, semilla=0):
+    """Planilla de `n` empleados (Nombre, Tipo, Salario Pactado); ~20% freelance."""
+    rng = np.random.default_rng(semilla)
+    salarios = np.round(rng.lognormal(np.log(1200), 0.5, n), -1)
+    tipos = np.where(rng.random(n) < 0.8, TIPO_PLANILLA, TIPO_FREELANCE)
+    return pd.DataFrame({
+        "Nombre": [f"Empleado {i + 1}" for i in range(n)],
+        "Tipo": tipos,
+        "Salario Pactado": salarios,
+    })
+
+
+def historico_sintetico(meses, semilla=0, ventas_base=50000.0, anio_inicio=2006):
+    """
+    `meses` meses en formato plantilla_sg_consulting.csv: tendencia,
+    estacionalidad y ruido sobre las proporciones del mes de ejemplo. Los
+    costos crecen algo más rápido que las ventas, así que los históricos
+    largos terminan con las "mandíbulas" cruzadas.
+    """
+    rng = np.random.default_rng(semilla)
+    t = np.arange(meses)
+    estacion = 1 + 0.08 * np.sin(2 * np.pi * t / 12)
+    ventas = ventas_base * (1 + 0.004) ** t * estacion * rng.normal(1, 0.03, meses)
+    columnas = {'Mes': [f"{MESES[i % 12]} {anio_inicio + i // 12}" for i in t]}
+    for columna, proporcion in PROPORCIONES_PLANTILLA.items():
+        if columna == 'Ventas':
+            columnas[columna] = ventas
+        else:
+            deriva = (1 + 0.0015) ** t if columna in ('Costo_Ventas', 'Planilla') else 1.0
+            columnas[columna] = ventas_base * proporcion * deriva * rng.normal(1, 0.02, meses)
+    return pd.DataFrame(columnas).round(2)
+
+
+def catalogo_sintetico(n, semilla=0):
+    """
+    `n` productos con las entradas del Lab de Precios: materiales, salario
+    y minutos de elaboración, capacidad mensual, margen y comisión (%).
+    """
+    rng = np.random.default_rng(semilla)
+    return pd.DataFrame({
+        "Producto": [f"Producto {i + 1}" for i in range(n)],
+        "Costo Materiales": np.round(rng.lognormal(np.log(8), 0.8, n), 2),
+        "Salario Base": np.round(rng.uniform(600, 1500, n), -1),
+        "Minutos": rng.integers(5, 240, n),
+        "Capacidad": rng.integers(20, 2000, n),
+        "Margen %": rng.integers(10, 60, n),
+        "Comision %": rng.choice([0, 0, 3, 5, 15], n),
+    })
+
+
+def portafolio_sintetico(directorio, n_clientes, meses=24, semilla=0):
+    """
+    Almacén con `n_clientes` clientes de `meses` meses cada uno (tamaños y
+    balances distintos por cliente). Devuelve el AlmacenHistoricos.
+    """
+    rng = np.random.default_rng(semilla)
+    almacen = AlmacenHistoricos(directorio)
+    for i in range(n_clientes):
+        escala = float(rng.lognormal(0, 0.8))
+        df = historico_sintetico(meses, semilla=semilla + i + 1, ventas_base=50000.0 * escala)
+        balance = {campo: round(valor * escala, 2) if campo != 'multiplo_global' else valor
+                   for campo, valor in BALANCE_DEFECTO.items()}
+        almacen.guardar(f"Cliente {i + 1:05d}", df, balance)
+    return almacen
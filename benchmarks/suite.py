@@ -0,0 +1,381 @@
+# ==========================================
+# ⏱️ SUITE DE BENCHMARKS (RUTAS CALIENTES DE LA APP)
+# ==========================================
+"""
+Mide las rutas calientes de la app a distintas escalas de datos:
+
+- nómina: calcular_carga_panama fila por fila y la versión vectorizada,
+  planillas de 10 a 100k empleados.
+- kpis: el bloque de cálculos centrales (calcular_diagnostico) y su
+  versión matricial sobre portafolios.
+- historico: carga completa y preparación de Mandíbulas, 12 a 240 meses.
+- graficos: la figura de cada pestaña (sin el caché de figuras).
+- reporte: el informe PDF completo.
+- portafolio: tamizaje del almacén completo.
+- catalogo: precio sugerido del Lab de Precios para catálogos completos.
+
+Cada caso se repite hasta acumular `--min-segundos` (mínimo 3 veces) y se
+guardan la mediana y el mínimo. Los resultados van a un JSON (línea base)
+y con --comparar se contrastan con una línea base anterior: un caso es
+regresión si su mejor tiempo (el menos afectado por el ruido de la
+máquina) supera al anterior en más de `--tolerancia`.
+
+Uso:
+    python -m benchmarks.suite --guardar benchmarks/linea_base.json
+    python -m benchmarks.suite --comparar benchmarks/linea_base.json
+    python -m benchmarks.suite --rapido --filtro nomina
+"""
+import argparse
+import itertools
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import asdict
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+from benchmarks.generadores import catalogo_sintetico, historico_sintetico, planilla_sintetica, portafolio_sintetico
+from motor import graficos
+from motor.contratos import optimizar_contratos
+from motor.financiero import EntradasFinancieras, calcular_diagnostico, calcular_diagnostico_matriz
+from motor.historico import historico_desde_df, preparar_mandibulas, promedios_mensuales
+from motor.lote_diagnostico import BALANCE_DEFECTO
+from motor.nomina import NominaIncremental, calcular_carga_panama, calcular_nomina_vectorizada, detalle_nomina, proyectar_nomina
+from motor.planillas import calcular_planillas
+from motor.portafolio import _construir_portafolio
+from motor.precios import carga_fijos_unitaria, costo_mano_obra, precio_venta, precios_catalogo
+from motor.reporte import DatosReporte, generar_reporte_pdf
+from motor.simulacion import Palanca, impacto_palancas, simular_montecarlo, superficie_sensibilidad
+
+TOLERANCIA_DEFECTO = 0.25
+
+# Diferencias menores a esto (ms) no cuentan como regresión: es ruido del reloj
+MINIMO_MS_REGRESION = 0.1
+
+_CASOS = []
+
+
+def caso(grupo, tamanos=(None,)):
+    """
+    Registra un caso. La función decorada recibe el tamaño, prepara los
+    datos (fuera del cronómetro) y devuelve la función sin argumentos que
+    se mide.
+    """
+    def decorador(preparar):
+        _CASOS.append((grupo, preparar.__name__, tuple(tamanos), preparar))
+        return preparar
+    return decorador
+
+
+def _entradas(df_historico, balance=BALANCE_DEFECTO):
+    return EntradasFinancieras(**promedios_mensuales(df_historico), **balance)
+
+
+# --- NÓMINA ---
+@caso("nomina", (10, 1_000, 100_000))
+def calcular_carga_panama_por_fila(n):
+    df = planilla_sintetica(n)
+    filas = list(zip(df['Salario Pactado'], df['Tipo']))
+    return lambda: [calcular_carga_panama(salario, tipo) for salario, tipo in filas]
+
+
+@caso("nomina", (10, 1_000, 100_000))
+def nomina_vectorizada(n):
+    df = planilla_sintetica(n)
+    return lambda: calcular_nomina_vectorizada(df['Salario Pactado'], df['Tipo'])
+
+
+@caso("nomina", (10, 1_000, 100_000))
+def detalle_nomina_editor(n):
+    df = planilla_sintetica(n)
+    return lambda: detalle_nomina(df)
+
+
+@caso("nomina", (10, 1_000, 100_000))
+def editar_una_fila_incremental(n):
+    nomina = NominaIncremental(planilla_sintetica(n))
+    cambios = {"edited_rows": {0: {"Salario Pactado": 1500.0}}}
+    return lambda: nomina.aplicar_cambios(cambios)
+
+
+@caso("nomina", (10, 1_000, 100_000))
+def optimizar_contratos_planilla(n):
+    df = planilla_sintetica(n)
+    return lambda: optimizar_contratos(df, 30, protegidos=["Empleado 1"])
+
+
+@caso("nomina", (1_000, 100_000))
+def planillas_portafolio_50_clientes(n):
+    df = planilla_sintetica(n)
+    df.insert(0, 'Cliente', [f"Cliente {i % 50:02d}" for i in range(n)])
+    return lambda: calcular_planillas(df)
+
+
+@caso("nomina", (10, 1_000, 100_000))
+def proyeccion_12_meses(n):
+    df = planilla_sintetica(n)
+    return lambda: proyectar_nomina(df['Salario Pactado'], df['Tipo'], meses=12)
+
+
+# --- KPIs (CÁLCULOS CENTRALES) ---
+@caso("kpis")
+def calcular_diagnostico_unico(_):
+    entradas = _entradas(historico_sintetico(12))
+    return lambda: calcular_diagnostico(entradas)
+
+
+@caso("kpis", (100, 10_000, 100_000))
+def diagnostico_matriz(n):
+    rng = np.random.default_rng(0)
+    base = _entradas(historico_sintetico(12))
+    entradas = {campo: valor * rng.lognormal(0, 0.5, n) for campo, valor in asdict(base).items()}
+    return lambda: calcular_diagnostico_matriz(entradas)
+
+
+# --- HISTÓRICO (MODO B) ---
+_contador = itertools.count()
+
+
+@caso("historico", (12, 60, 240))
+def cargar_historico_completo(meses):
+    df = historico_sintetico(meses)
+    # Huella nueva en cada llamada: mide el procesamiento, no el caché
+    return lambda: historico_desde_df(f"benchmark:{next(_contador)}", lambda: df)
+
+
+@caso("historico", (12, 60, 240))
+def preparar_mandibulas_serie(meses):
+    df = historico_sintetico(meses)
+    return lambda: preparar_mandibulas(df)
+
+
+# --- GRÁFICOS (una figura por pestaña, sin el caché de figuras) ---
+def _sin_cache(funcion):
+    return funcion.__wrapped__
+
+
+@caso("graficos")
+def figura_cascada(_):
+    e = _entradas(historico_sintetico(12))
+    # Mismos valores que arma la pestaña Cascada
+    val_bruta = e.ventas_mes - e.costo_ventas_mes
+    val_opex = -(e.gasto_alquiler_mes + e.gasto_planilla_mes + e.gasto_otros_mes)
+    val_fin_tax = -(e.intereses_mes + e.impuestos_mes + e.depreciacion_mes)
+    valores = (e.ventas_mes, -e.costo_ventas_mes, val_bruta, val_opex, val_bruta + val_opex, val_fin_tax,
+               val_bruta + val_opex + val_fin_tax)
+    return lambda: _sin_cache(graficos.figura_cascada)(*valores)
+
+
+@caso("graficos", (12, 60, 240))
+def figura_mandibulas(meses):
+    historico = historico_desde_df(f"benchmark:mandibulas:{meses}", lambda: historico_sintetico(meses))
+    return lambda: _sin_cache(graficos.figura_mandibulas)(historico)
+
+
+@caso("graficos", (12, 60, 240))
+def figura_tendencia(meses):
+    historico = historico_desde_df(f"benchmark:tendencia:{meses}", lambda: historico_sintetico(meses))
+    return lambda: _sin_cache(graficos.figura_tendencia)(historico)
+
+
+@caso("graficos", (10, 1_000))
+def figura_talento(n):
+    detalle, _ = detalle_nomina(planilla_sintetica(n))
+    return lambda: _sin_cache(graficos.figura_talento)(detalle)
+
+
+@caso("graficos")
+def figura_relojes(_):
+    return lambda: (_sin_cache(graficos.figura_reloj_alquiler)(12.5), _sin_cache(graficos.figura_reloj_nomina)(41.0))
+
+
+@caso("graficos")
+def figura_equilibrio(_):
+    kpis = calcular_diagnostico(_entradas(historico_sintetico(12)))
+    cv_ratio = 0.6
+    ventas_meta = (kpis.costos_fijos_totales_mes + 5000) / (1 - cv_ratio)
+    argumentos = (50000.0, kpis.punto_equilibrio_mes, kpis.costos_fijos_totales_mes, cv_ratio, ventas_meta, 5000.0)
+    return lambda: _sin_cache(graficos.figura_equilibrio)(*argumentos)
+
+
+@caso("graficos")
+def figura_simulador(_):
+    return lambda: _sin_cache(graficos.figura_simulador)(50000.0, 57750.0, 44500.0, 47000.0, True)
+
+
+@caso("graficos")
+def figura_montecarlo(_):
+    resultado = simular_montecarlo(50000.0, 30000.0, 14500.0, Palanca(-5, 5, 15), Palanca(0, 5, 10), Palanca(-10, 0, 10))
+    centros, conteos = resultado.histograma_ebitda
+    return lambda: _sin_cache(graficos.figura_distribucion)(centros, conteos, resultado.percentiles_ebitda, "EBITDA", "EBITDA ($)")
+
+
+@caso("graficos")
+def figura_sensibilidad(_):
+    superficie = superficie_sensibilidad(50000.0, 30000.0, 14500.0)
+    corte = superficie.margen[:, 0, :].T
+    base, impactos = impacto_palancas(superficie)
+
+    def construir():
+        _sin_cache(graficos.figura_mapa_sensibilidad)(superficie.precios, superficie.volumenes, corte,
+                                                       "Margen", "Margen %", "%{z:.1f}%", niveles=(-20, 40, 5), meta=15.0)
+        _sin_cache(graficos.figura_tornado)(base, impactos)
+    return construir
+
+
+# --- REPORTE PDF ---
+@caso("reporte")
+def generar_reporte(_):
+    datos = DatosReporte(_entradas(historico_sintetico(24)), periodo="Período analizado: benchmark.", fecha="01/01/2026")
+    return lambda: generar_reporte_pdf(datos)
+
+
+# --- PORTAFOLIO ---
+_temporales = []
+
+
+@caso("portafolio", (100, 1_000))
+def construir_portafolio(n):
+    temporal = tempfile.TemporaryDirectory(prefix="sg_benchmark_")
+    _temporales.append(temporal)
+    almacen = portafolio_sintetico(temporal.name, n)
+    return lambda: _construir_portafolio(str(almacen.directorio), 12, BALANCE_DEFECTO)
+
+
+# --- CATÁLOGO (LAB DE PRECIOS) ---
+def precio_sugerido_lab(costo_materiales, salario_base, minutos, capacidad, margen, comision, gastos_operativos_mes):
+    """Un producto con las funciones escalares que usa la pestaña Lab de Precios."""
+    costo_total_unitario = (costo_materiales + costo_mano_obra(salario_base, minutos)
+                            + carga_fijos_unitaria(gastos_operativos_mes, capacidad))
+    precio = precio_venta(costo_total_unitario, margen, comision)
+    return precio[0] if precio else float('nan')
+
+
+@caso("catalogo", (10, 1_000, 100_000))
+def precio_catalogo_por_producto(n):
+    catalogo = catalogo_sintetico(n)
+    filas = list(catalogo[["Costo Materiales", "Salario Base", "Minutos", "Capacidad", "Margen %", "Comision %"]]
+                 .itertuples(index=False, name=None))
+    return lambda: [precio_sugerido_lab(*fila, 15000.0) for fila in filas]
+
+
+@caso("catalogo", (10, 1_000, 100_000))
+def precio_catalogo_vectorizado(n):
+    catalogo = catalogo_sintetico(n)
+    return lambda: precios_catalogo(catalogo, 15000.0)
+
+
+# --- EJECUCIÓN ---
+def cronometrar(funcion, min_segundos=0.2, max_repeticiones=200):
+    """Tiempos (s) de llamadas sucesivas tras una llamada de calentamiento."""
+    funcion()
+    tiempos = []
+    inicio = time.perf_counter()
+    while len(tiempos) < 3 or (time.perf_counter() - inicio < min_segundos and len(tiempos) < max_repeticiones):
+        t = time.perf_counter()
+        funcion()
+        tiempos.append(time.perf_counter() - t)
+    return tiempos
+
+
+def clave_caso(grupo, nombre, tamano):
+    return f"{grupo}/{nombre}" + (f"[{tamano}]" if tamano is not None else "")
+
+
+def ejecutar(filtro="", rapido=False, min_segundos=0.2, informar=print):
+    """{clave: {'mediana_ms', 'min_ms', 'repeticiones'}} de los casos seleccionados."""
+    resultados = {}
+    for grupo, nombre, tamanos, preparar in _CASOS:
+        for tamano in (tamanos[:2] if rapido else tamanos):
+            clave = clave_caso(grupo, nombre, tamano)
+            if filtro and filtro not in clave:
+                continue
+            tiempos = cronometrar(preparar(tamano), min_segundos)
+            resultados[clave] = {
+                'mediana_ms': statistics.median(tiempos) * 1000,
+                'min_ms': min(tiempos) * 1000,
+                'repeticiones': len(tiempos),
+            }
+            informar(f"  {clave:<58} {resultados[clave]['mediana_ms']:11.3f} ms  (x{len(tiempos)})")
+    for temporal in _temporales:
+        temporal.cleanup()
+    _temporales.clear()
+    return resultados
+
+
+def metadatos():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=Path(__file__).resolve().parent).stdout.strip()
+    except OSError:
+        commit = ""
+    return {
+        'fecha': datetime.now().isoformat(timespec="seconds"),
+        'commit': commit,
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': __import__('pandas').__version__,
+        'plataforma': platform.platform(),
+        'procesador': platform.processor() or platform.machine(),
+    }
+
+
+def comparar(actual, base, tolerancia=TOLERANCIA_DEFECTO):
+    """
+    Filas (clave, base_ms, actual_ms, razón, estado) con el mejor tiempo
+    de los casos en común. estado es 'REGRESION', 'MEJORA' o 'OK'.
+    """
+    filas = []
+    for clave in sorted(set(actual) & set(base)):
+        antes, ahora = base[clave]['min_ms'], actual[clave]['min_ms']
+        razon = ahora / antes if antes > 0 else float('inf')
+        if razon > 1 + tolerancia and ahora - antes > MINIMO_MS_REGRESION:
+            estado = 'REGRESION'
+        elif razon < 1 / (1 + tolerancia) and antes - ahora > MINIMO_MS_REGRESION:
+            estado = 'MEJORA'
+        else:
+            estado = 'OK'
+        filas.append((clave, antes, ahora, razon, estado))
+    return filas
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks de las rutas calientes de SG Consulting.")
+    parser.add_argument("--guardar", default=None, help="Escribir los resultados como línea base (JSON)")
+    parser.add_argument("--comparar", default=None, help="Línea base (JSON) contra la que comparar")
+    parser.add_argument("--tolerancia", type=float, default=TOLERANCIA_DEFECTO, help="Aumento relativo tolerado (0.25 = 25%%)")
+    parser.add_argument("--filtro", default="", help="Solo los casos cuya clave contenga este texto")
+    parser.add_argument("--rapido", action="store_true", help="Solo los dos tamaños más chicos de cada caso")
+    parser.add_argument("--min-segundos", type=float, default=0.2, help="Tiempo mínimo medido por caso")
+    args = parser.parse_args(argv)
+
+    print("Benchmarks (mediana por llamada):")
+    resultados = ejecutar(args.filtro, args.rapido, args.min_segundos)
+
+    if args.guardar:
+        Path(args.guardar).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.guardar).write_text(json.dumps({'metadatos': metadatos(), 'resultados': resultados}, indent=2), encoding="utf-8")
+        print(f"\n💾 Línea base -> {args.guardar}")
+
+    if not args.comparar:
+        return 0
+
+    base = json.loads(Path(args.comparar).read_text(encoding="utf-8"))
+    filas = comparar(resultados, base['resultados'], args.tolerancia)
+    print(f"\nComparación (mejor tiempo) contra {args.comparar} ({base['metadatos'].get('commit') or 's/commit'}, {base['metadatos'].get('fecha')}):")
+    for clave, antes, ahora, razon, estado in filas:
+        marca = {'REGRESION': '❌', 'MEJORA': '🚀', 'OK': '  '}[estado]
+        print(f"{marca} {clave:<58} {antes:11.3f} -> {ahora:11.3f} ms  x{razon:5.2f}")
+    regresiones = [f for f in filas if f[4] == 'REGRESION']
+    print(f"\n{len(regresiones)} regresión(es) sobre {len(filas)} casos (tolerancia {args.tolerancia:.0%}).")
+    return 3 if regresiones else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,66 @@
+"""
+Motores de cálculo de SG Consulting, separados de la interfaz Streamlit.
+
+Los submódulos se cargan bajo demanda: importar `motor.financiero` no
+arrastra numpy ni pandas.
+"""
+import importlib
+
+_EXPORTS = {
+    "TIPO_PLANILLA": "motor.nomina",
+    "TIPO_FREELANCE": "motor.nomina",
+    "TIPOS_CONTRATO": "motor.nomina",
+    "calcular_carga_panama": "motor.nomina",
+    "calcular_nomina_vectorizada": "motor.nomina",
+    "detalle_nomina": "motor.nomina",
+    "ResultadoNomina": "motor.nomina",
+    "proyectar_nomina": "motor.nomina",
+    "NominaIncremental": "motor.nomina",
+    "tabla_fiscal": "motor.nomina",
+    "ReglasFiscales": "motor.nomina",
+    "REGLAS_FISCALES": "motor.nomina",
+    "OptimizacionContratos": "motor.contratos",
+    "optimizar_contratos": "motor.contratos",
+    "EntradasFinancieras": "motor.financiero",
+    "ResultadosFinancieros": "motor.financiero",
+    "calcular_diagnostico": "motor.financiero",
+    "calcular_diagnostico_matriz": "motor.financiero",
+    "MOTOR_REGLAS": "motor.reglas",
+    "MotorReglas": "motor.reglas",
+    "Regla": "motor.reglas",
+    "CacheLRU": "motor.cache",
+    "lttb": "motor.submuestreo",
+    "COLUMNAS_PLANTILLA": "motor.historico",
+    "HistoricoCargado": "motor.historico",
+    "cargar_historico": "motor.historico",
+    "leer_historico": "motor.historico",
+    "indicadores_moviles": "motor.historico",
+    "tendencia_ventana": "motor.historico",
+    "promedios_mensuales": "motor.historico",
+    "ResultadoIngesta": "motor.ingesta_libro",
+    "agregar_libro": "motor.ingesta_libro",
+    "AlmacenHistoricos": "motor.almacen",
+    "PlanillasPortafolio": "motor.planillas",
+    "leer_planillas": "motor.planillas",
+    "calcular_planillas": "motor.planillas",
+    "cargar_planillas": "motor.planillas",
+    "Portafolio": "motor.portafolio",
+    "cargar_portafolio": "motor.portafolio",
+    "filtrar_portafolio": "motor.portafolio",
+    "precio_venta": "motor.precios",
+    "precios_catalogo": "motor.precios",
+    "leer_catalogo": "motor.precios",
+    "ColaTrabajos": "motor.trabajos",
+    "Trabajo": "motor.trabajos",
+    "DatosReporte": "motor.reporte",
+    "generar_reporte_pdf": "motor.reporte",
+    "COLA_REPORTES": "motor.reporte",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(nombre):
+    if nombre in _EXPORTS:
+        return getattr(importlib.import_module(_EXPORTS[nombre]), nombre)
+    raise AttributeError(f"module 'motor' has no attribute {nombre!r}")
@@ -0,0 +1,148 @@
+# ==========================================
+# 💾 ALMACÉN LOCAL DE HISTÓRICOS (ARROW IPC)
+# ==========================================
+"""
+Guarda el histórico de cada cliente en disco para reabrirlo en sesiones
+posteriores sin volver a parsear el CSV.
+
+Cada cliente es un archivo Arrow IPC sin compresión: se abre con memoria
+mapeada y solo se materializan las columnas pedidas, así que reabrir
+años de meses cuesta milisegundos y casi no consume memoria propia.
+
+La planilla de cada cliente (motor.planillas) se guarda aparte, en el
+subdirectorio planillas/, con el mismo nombre de archivo.
+
+El directorio se toma de la variable de entorno SG_CONSULTING_ALMACEN
+(por defecto ~/.sg_consulting/historicos).
+"""
+import json
+import os
+import re
+import unicodedata
+from pathlib import Path
+
+import pyarrow as pa
+
+from motor.historico import COLUMNAS_LECTURA, COLUMNAS_PLANTILLA, historico_desde_df
+
+EXTENSION = ".arrow"
+SUBDIRECTORIO_PLANILLAS = "planillas"
+
+# Claves de metadatos: nombre original del cliente (el archivo usa un slug)
+# y foto del Balance General (JSON) al momento de guardar
+CLAVE_CLIENTE = b"sg_cliente"
+CLAVE_BALANCE = b"sg_balance"
+
+
+def directorio_defecto():
+    return Path(os.environ.get("SG_CONSULTING_ALMACEN", Path.home() / ".sg_consulting" / "historicos"))
+
+
+def slug_cliente(cliente):
+    """Nombre de archivo seguro para el cliente ("Café Ñandú" -> "cafe-nandu")."""
+    texto = unicodedata.normalize("NFKD", cliente).encode("ascii", "ignore").decode("ascii")
+    slug = re.sub(r"[^a-z0-9]+", "-", texto.lower()).strip("-")
+    if not slug:
+        raise ValueError("El nombre del cliente no puede estar vacío")
+    return slug
+
+
+class AlmacenHistoricos:
+    """Históricos de clientes persistidos como archivos Arrow IPC en un directorio."""
+
+    def __init__(self, directorio=None):
+        self.directorio = Path(directorio) if directorio else directorio_defecto()
+
+    def ruta(self, cliente):
+        return self.directorio / f"{slug_cliente(cliente)}{EXTENSION}"
+
+    def ruta_planilla(self, cliente):
+        return self.directorio / SUBDIRECTORIO_PLANILLAS / f"{slug_cliente(cliente)}{EXTENSION}"
+
+    @staticmethod
+    def _escribir(ruta, cliente, df, metadatos_extra=None):
+        # Archivo temporal + renombrado: un lector nunca ve un archivo a medio escribir
+        ruta.parent.mkdir(parents=True, exist_ok=True)
+        tabla = pa.Table.from_pandas(df, preserve_index=False)
+        metadatos = {**(tabla.schema.metadata or {}), CLAVE_CLIENTE: cliente.encode("utf-8"), **(metadatos_extra or {})}
+        tabla = tabla.replace_schema_metadata(metadatos)
+        temporal = ruta.with_suffix(".tmp")
+        with pa.OSFile(str(temporal), "wb") as destino, pa.ipc.new_file(destino, tabla.schema) as escritor:
+            escritor.write_table(tabla)
+        os.replace(temporal, ruta)
+        return ruta
+
+    def guardar(self, cliente, df_historico, balance=None):
+        """
+        Escribe (o reemplaza) el histórico del cliente y, opcionalmente, su
+        Balance General (dict con caja, cuentas_cobrar, ...). Las columnas
+        del motor se guardan como float64 aunque el archivo traiga enteros.
+        """
+        df_historico = df_historico.astype({c: "float64" for c in COLUMNAS_PLANTILLA if c in df_historico.columns})
+        extra = {CLAVE_BALANCE: json.dumps(balance).encode("utf-8")} if balance else None
+        return self._escribir(self.ruta(cliente), cliente, df_historico, extra)
+
+    def guardar_planilla(self, cliente, df_planilla):
+        """Escribe (o reemplaza) la planilla del cliente (una fila por empleado)."""
+        return self._escribir(self.ruta_planilla(cliente), cliente, df_planilla)
+
+    def cargar_planilla(self, cliente):
+        """Planilla guardada del cliente, o None si no tiene."""
+        ruta = self.ruta_planilla(cliente)
+        if not ruta.exists():
+            return None
+        with pa.memory_map(str(ruta)) as fuente:
+            return pa.ipc.open_file(fuente).read_all().to_pandas()
+
+    def clientes(self):
+        """Nombres de los clientes guardados, en orden alfabético."""
+        if not self.directorio.is_dir():
+            return []
+        nombres = []
+        for ruta in self.directorio.glob(f"*{EXTENSION}"):
+            # Solo se lee el esquema (unos cientos de bytes), no los datos
+            with pa.memory_map(str(ruta)) as fuente:
+                metadatos = pa.ipc.open_file(fuente).schema.metadata or {}
+            nombres.append(metadatos.get(CLAVE_CLIENTE, ruta.stem.encode("utf-8")).decode("utf-8"))
+        return sorted(nombres, key=str.lower)
+
+    def balance(self, cliente):
+        """Balance General guardado con el cliente ({} si no se guardó)."""
+        with pa.memory_map(str(self.ruta(cliente))) as fuente:
+            metadatos = pa.ipc.open_file(fuente).schema.metadata or {}
+        return json.loads(metadatos[CLAVE_BALANCE]) if CLAVE_BALANCE in metadatos else {}
+
+    def leer_tabla(self, cliente, columnas=None):
+        """
+        Tabla Arrow del cliente respaldada por memoria mapeada. Con
+        `columnas` solo se referencian esas columnas.
+        """
+        ruta = self.ruta(cliente)
+        if not ruta.exists():
+            raise FileNotFoundError(f"No hay histórico guardado para '{cliente}'")
+        with pa.memory_map(str(ruta)) as fuente:
+            tabla = pa.ipc.open_file(fuente).read_all()
+        if columnas is not None:
+            tabla = tabla.select([c for c in columnas if c in tabla.schema.names])
+        return tabla
+
+    def cargar(self, cliente, columnas=None):
+        """DataFrame del histórico del cliente (por defecto, solo las columnas del motor)."""
+        return self.leer_tabla(cliente, COLUMNAS_LECTURA if columnas is None else columnas).to_pandas()
+
+    def cargar_historico(self, cliente):
+        """
+        HistoricoCargado del cliente. La huella combina ruta, tamaño y fecha
+        de modificación: mientras el archivo no cambie, se reutiliza el
+        caché sin tocar el disco más allá de un stat().
+        """
+        ruta = self.ruta(cliente)
+        if not ruta.exists():
+            raise FileNotFoundError(f"No hay histórico guardado para '{cliente}'")
+        estado = ruta.stat()
+        huella = f"almacen:{ruta.resolve()}:{estado.st_size}:{estado.st_mtime_ns}"
+        return historico_desde_df(huella, lambda: self.cargar(cliente))
+
+    def eliminar(self, cliente):
+        self.ruta(cliente).unlink(missing_ok=True)
+        self.ruta_planilla(cliente).unlink(missing_ok=True)
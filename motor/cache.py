@@ -0,0 +1,108 @@
+# ==========================================
+# CACHÉ LRU COMPARTIDO (POR PROCESO)
+# ==========================================
+import functools
+import hashlib
+import threading
+from collections import OrderedDict
+
+
+class CacheLRU:
+    """
+    Caché acotado con desalojo LRU, seguro entre hilos.
+
+    Vive a nivel de módulo, así que lo comparten todas las sesiones del mismo
+    proceso de Streamlit; el límite evita que un servidor de larga vida crezca
+    sin control.
+    """
+
+    def __init__(self, max_entradas=32):
+        self.max_entradas = max_entradas
+        self._datos = OrderedDict()
+        self._lock = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+
+    def __len__(self):
+        return len(self._datos)
+
+    def __contains__(self, clave):
+        return clave in self._datos
+
+    def obtener(self, clave, defecto=None):
+        with self._lock:
+            if clave in self._datos:
+                self._datos.move_to_end(clave)
+                self.aciertos += 1
+                return self._datos[clave]
+            self.fallos += 1
+            return defecto
+
+    def guardar(self, clave, valor):
+        with self._lock:
+            self._datos[clave] = valor
+            self._datos.move_to_end(clave)
+            while len(self._datos) > self.max_entradas:
+                self._datos.popitem(last=False)
+
+    def obtener_o_calcular(self, clave, calcular):
+        """
+        Devuelve el valor cacheado o lo calcula con `calcular()` y lo guarda.
+        El cálculo corre fuera del lock para no bloquear a otras sesiones.
+        """
+        centinela = object()
+        valor = self.obtener(clave, centinela)
+        if valor is centinela:
+            valor = calcular()
+            self.guardar(clave, valor)
+        return valor
+
+    def limpiar(self):
+        with self._lock:
+            self._datos.clear()
+
+
+def _alimentar_huella(h, valor):
+    if hasattr(valor, 'huella'):
+        # Objetos ya identificados por contenido (ej. HistoricoCargado)
+        h.update(str(valor.huella).encode())
+    elif hasattr(valor, 'dtype') and hasattr(valor, 'tobytes'):
+        # Arreglos NumPy: repr() resume los arreglos grandes con "..."
+        h.update(str(valor.dtype).encode())
+        h.update(repr(valor.shape).encode())
+        h.update(valor.tobytes())
+    elif hasattr(valor, 'columns') and hasattr(valor, 'to_numpy'):
+        from pandas.util import hash_pandas_object
+        h.update(repr(list(valor.columns)).encode())
+        h.update(hash_pandas_object(valor, index=True).to_numpy().tobytes())
+    else:
+        h.update(repr(valor).encode())
+    h.update(b'|')
+
+
+def huella_entradas(*args, **kwargs):
+    """
+    Huella estable de los argumentos de un cálculo (números, textos,
+    DataFrames u objetos con atributo `huella`).
+    """
+    h = hashlib.sha1()
+    for valor in args:
+        _alimentar_huella(h, valor)
+    for clave in sorted(kwargs):
+        h.update(clave.encode())
+        _alimentar_huella(h, kwargs[clave])
+    return h.hexdigest()
+
+
+def memoizar(cache):
+    """
+    Decorador: guarda el resultado de la función en `cache`, indexado por la
+    huella de sus argumentos.
+    """
+    def decorador(funcion):
+        @functools.wraps(funcion)
+        def envoltura(*args, **kwargs):
+            clave = (funcion.__qualname__, huella_entradas(*args, **kwargs))
+            return cache.obtener_o_calcular(clave, lambda: funcion(*args, **kwargs))
+        return envoltura
+    return decorador
@@ -0,0 +1,102 @@
+# ==========================================
+# ⚖️ OPTIMIZADOR DE CONTRATOS (PLANILLA VS. FREELANCE)
+# ==========================================
+# Cada empleado se evalúa en los dos regímenes de una sola vez (dos
+# pasadas vectorizadas de calcular_nomina_vectorizada). El costo es
+# separable por empleado y la única restricción de conjunto es un tope de
+# contratos freelance, así que la asignación óptima es tomar los mayores
+# ahorros: ordenar una vez da la asignación y, con la suma acumulada, la
+# frontera completa de ahorro (costo óptimo para cada tope posible).
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from motor.nomina import TIPO_FREELANCE, TIPO_PLANILLA, calcular_nomina_vectorizada
+
+# Puntos de la frontera que se devuelven (planillas grandes)
+MAX_PUNTOS_FRONTERA = 200
+
+
+@dataclass(frozen=True)
+class OptimizacionContratos:
+    detalle: pd.DataFrame
+    frontera: pd.DataFrame
+    costo_actual: float
+    costo_optimo: float
+    max_freelance: int
+
+    @property
+    def ahorro(self):
+        return self.costo_actual - self.costo_optimo
+
+    @property
+    def cambios(self):
+        """Solo los empleados cuyo contrato sugerido es distinto del actual."""
+        return self.detalle[self.detalle["Tipo Sugerido"] != self.detalle["Tipo Actual"]]
+
+
+def optimizar_contratos(df_nomina, max_freelance_pct=100.0, protegidos=(), anio=None):
+    """
+    Asignación de contratos que minimiza el costo empresa de la planilla
+    del editor (columnas Nombre, Tipo y Salario Pactado).
+
+    - max_freelance_pct: tope de contratos freelance (% de la planilla,
+      contando a los protegidos que ya son freelance).
+    - protegidos: nombres de roles que conservan su contrato actual.
+    """
+    nombres = df_nomina['Nombre'].to_numpy()
+    salario = pd.to_numeric(df_nomina['Salario Pactado'], errors="coerce").fillna(0.0).to_numpy(dtype=float)
+    tipo_actual = df_nomina['Tipo'].to_numpy(dtype=object)
+    n = len(salario)
+
+    # 1. Todos los empleados en ambos regímenes
+    en_planilla = calcular_nomina_vectorizada(salario, np.full(n, TIPO_PLANILLA, dtype=object), anio)
+    en_freelance = calcular_nomina_vectorizada(salario, np.full(n, TIPO_FREELANCE, dtype=object), anio)
+
+    def segun_tipo(tipo, planilla, freelance):
+        return np.where(tipo == TIPO_FREELANCE, freelance, np.where(tipo == TIPO_PLANILLA, planilla, salario))
+
+    costo_actual = segun_tipo(tipo_actual, en_planilla.costo_empresa, en_freelance.costo_empresa)
+
+    # 2. Protegidos (o con tipo desconocido): conservan su contrato y su costo
+    fijo = np.isin(nombres, list(protegidos)) | ~np.isin(tipo_actual, [TIPO_PLANILLA, TIPO_FREELANCE])
+    freelance_fijos = int((fijo & (tipo_actual == TIPO_FREELANCE)).sum())
+    cupo = max(0, min(int(np.floor(max_freelance_pct / 100 * n + 1e-9)) - freelance_fijos, int((~fijo).sum())))
+
+    # 3. Libres: parten en planilla; pasar a freelance ahorra la diferencia de costo
+    ahorro = en_planilla.costo_empresa - en_freelance.costo_empresa
+    libres = np.flatnonzero(~fijo)
+    orden = libres[np.argsort(-ahorro[libres], kind="stable")]
+    ahorros_ordenados = np.maximum(ahorro[orden], 0.0)
+    base = float(costo_actual[fijo].sum() + en_planilla.costo_empresa[libres].sum())
+    costos_frontera = base - np.concatenate([[0.0], np.cumsum(ahorros_ordenados)])
+
+    a_freelance = orden[:cupo][ahorros_ordenados[:cupo] > 0]
+    tipo_sugerido = np.where(fijo, tipo_actual, TIPO_PLANILLA).astype(object)
+    tipo_sugerido[a_freelance] = TIPO_FREELANCE
+    costo_sugerido = segun_tipo(tipo_sugerido, en_planilla.costo_empresa, en_freelance.costo_empresa)
+    neto_sugerido = segun_tipo(tipo_sugerido, en_planilla.neto_empleado, en_freelance.neto_empleado)
+
+    detalle = pd.DataFrame({
+        "Rol": nombres,
+        "Tipo Actual": tipo_actual,
+        "Tipo Sugerido": tipo_sugerido,
+        "Protegido": fijo,
+        "Costo Actual": costo_actual,
+        "Costo Sugerido": costo_sugerido,
+        "Ahorro": costo_actual - costo_sugerido,
+        "Bolsillo Sugerido": neto_sugerido,
+    })
+
+    # 4. Frontera: costo óptimo con k contratos freelance, submuestreada para graficar
+    pasos = np.unique(np.linspace(0, len(libres), min(len(libres) + 1, MAX_PUNTOS_FRONTERA)).astype(int))
+    total_actual = float(costo_actual.sum())
+    frontera = pd.DataFrame({
+        "Freelance": pasos + freelance_fijos,
+        "% Freelance": (pasos + freelance_fijos) / max(n, 1) * 100,
+        "Costo Empresa": costos_frontera[pasos],
+        "Ahorro": total_actual - costos_frontera[pasos],
+    })
+
+    return OptimizacionContratos(detalle, frontera, total_actual, float(costo_sugerido.sum()), cupo + freelance_fijos)
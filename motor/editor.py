@@ -0,0 +1,26 @@
+# ==========================================
+# CAMBIOS DE st.data_editor
+# ==========================================
+import pandas as pd
+
+
+def aplicar_cambios_editor(df, cambios):
+    """
+    Aplica el estado de un st.data_editor (edited_rows, deleted_rows y
+    added_rows, con posiciones relativas al DataFrame original) y devuelve
+    un DataFrame nuevo con los cambios consolidados.
+    """
+    df = df.copy()
+    for fila, valores in cambios.get("edited_rows", {}).items():
+        for columna, valor in valores.items():
+            df.iloc[int(fila), df.columns.get_loc(columna)] = valor
+
+    borradas = cambios.get("deleted_rows", [])
+    if borradas:
+        df = df.drop(df.index[list(borradas)])
+
+    agregadas = [f for f in cambios.get("added_rows", []) if f]
+    if agregadas:
+        df = pd.concat([df, pd.DataFrame(agregadas, columns=df.columns)], ignore_index=True)
+
+    return df.reset_index(drop=True)
@@ -0,0 +1,240 @@
+# ==========================================
+# CÁLCULOS CENTRALES (BACKEND)
+# ==========================================
+# Motor financiero puro: sin streamlit, plotly ni fpdf. Solo librería estándar
+# para que se importe en milisegundos y pueda llamarse miles de veces por
+# segundo desde procesos por lotes. La versión por columnas
+# (calcular_diagnostico_matriz) importa numpy solo al usarse.
+from dataclasses import dataclass, field, fields
+
+from motor.reglas import MOTOR_REGLAS
+
+
+@dataclass(frozen=True, slots=True)
+class EntradasFinancieras:
+    """
+    Datos de un mes representativo (P&L) y la foto del Balance General.
+    """
+    ventas_mes: float = 0.0
+    costo_ventas_mes: float = 0.0
+    gasto_alquiler_mes: float = 0.0
+    gasto_planilla_mes: float = 0.0
+    gasto_otros_mes: float = 0.0
+    depreciacion_mes: float = 0.0
+    intereses_mes: float = 0.0
+    impuestos_mes: float = 0.0
+    caja: float = 0.0
+    cuentas_cobrar: float = 0.0
+    inventario: float = 0.0
+    cuentas_pagar: float = 0.0
+    deuda_bancaria: float = 0.0
+    multiplo_global: float = 3.0
+
+
+@dataclass(frozen=True, slots=True)
+class ResultadosFinancieros:
+    """
+    Todos los KPIs que consumen las pestañas y el reporte PDF.
+    """
+    # 1. Potencia
+    gastos_operativos_mes: float
+    utilidad_bruta_mes: float
+    margen_bruto: float
+    ebitda_mes: float
+    margen_ebitda: float
+    ebit_mes: float
+    utilidad_neta_mes: float
+    margen_neto: float
+    # 2. Ratios
+    ratio_alquiler: float
+    ratio_planilla: float
+    # 3. Supervivencia
+    costos_fijos_totales_mes: float
+    margen_contribucion_pct: float
+    punto_equilibrio_mes: float
+    margen_seguridad_mes: float
+    # 4. Oxígeno (CCC) y Solvencia
+    dias_calle: float
+    dias_inventario: float
+    dias_proveedor: float
+    ccc: float
+    dinero_atrapado_total: float
+    cobertura_bancaria: float
+    pasivo_circulante: float
+    prueba_acida: float
+    ventas_anual_proy: float
+    # 5. Valoración Actual Base
+    valor_empresa_actual_base: float
+    patrimonio_estimado: float
+    # 6. Juez Digital
+    veredicto_final: str
+    icono_veredicto: str
+    acciones_choque: list = field(default_factory=list)
+
+
+def calcular_diagnostico(e):
+    """
+    Calcula el diagnóstico completo (Potencia, Ratios, Supervivencia,
+    Oxígeno, Valoración y Juez Digital) a partir de EntradasFinancieras.
+    """
+    ventas_mes = e.ventas_mes
+    costo_ventas_mes = e.costo_ventas_mes
+
+    gastos_operativos_mes = e.gasto_alquiler_mes + e.gasto_planilla_mes + e.gasto_otros_mes
+
+    # 1. Potencia
+    utilidad_bruta_mes = ventas_mes - costo_ventas_mes
+    margen_bruto = (utilidad_bruta_mes / ventas_mes) * 100 if ventas_mes > 0 else 0
+
+    ebitda_mes = utilidad_bruta_mes - gastos_operativos_mes
+    margen_ebitda = (ebitda_mes / ventas_mes) * 100 if ventas_mes > 0 else 0
+
+    ebit_mes = ebitda_mes - e.depreciacion_mes
+    utilidad_neta_mes = ebit_mes - e.intereses_mes - e.impuestos_mes
+    margen_neto = (utilidad_neta_mes / ventas_mes) * 100 if ventas_mes > 0 else 0
+
+    # 2. Ratios
+    ratio_alquiler = (e.gasto_alquiler_mes / ventas_mes) * 100 if ventas_mes > 0 else 0
+    ratio_planilla = (e.gasto_planilla_mes / utilidad_bruta_mes) * 100 if utilidad_bruta_mes > 0 else 0
+
+    # 3. Supervivencia
+    costos_fijos_totales_mes = gastos_operativos_mes + e.intereses_mes
+    margen_contribucion_pct = (utilidad_bruta_mes / ventas_mes) if ventas_mes > 0 else 0
+    punto_equilibrio_mes = costos_fijos_totales_mes / margen_contribucion_pct if margen_contribucion_pct > 0 else 0
+    margen_seguridad_mes = ventas_mes - punto_equilibrio_mes
+
+    # 4. Oxígeno (CCC)
+    dias_calle = (e.cuentas_cobrar / ventas_mes) * 30 if ventas_mes > 0 else 0
+    dias_inventario = (e.inventario / costo_ventas_mes) * 30 if costo_ventas_mes > 0 else 0
+    dias_proveedor = (e.cuentas_pagar / costo_ventas_mes) * 30 if costo_ventas_mes > 0 else 0
+    ccc = dias_calle + dias_inventario - dias_proveedor
+    dinero_atrapado_total = e.cuentas_cobrar + e.inventario
+
+    # Solvencia (Semáforo y Oxígeno)
+    cobertura_bancaria = ebitda_mes / e.intereses_mes if e.intereses_mes > 0 else 10.0
+    pasivo_circulante = e.cuentas_pagar + e.deuda_bancaria
+    prueba_acida = (e.caja + e.cuentas_cobrar) / pasivo_circulante if pasivo_circulante > 0 else 0
+    ventas_anual_proy = ventas_mes * 12
+
+    # 5. Valoración Actual Base
+    valor_empresa_actual_base = (ebitda_mes * 12) * e.multiplo_global
+    patrimonio_estimado = max(valor_empresa_actual_base - e.deuda_bancaria, 0)
+
+    # 6. Juez Digital y Plan de Choque (Semáforo): umbrales en motor.reglas
+    veredicto_final, icono_veredicto, acciones_choque = MOTOR_REGLAS.juzgar({
+        'ebitda_mes': ebitda_mes, 'margen_ebitda': margen_ebitda, 'ccc': ccc,
+        'ratio_alquiler': ratio_alquiler, 'ratio_planilla': ratio_planilla,
+        'cobertura_bancaria': cobertura_bancaria, 'prueba_acida': prueba_acida,
+    })
+
+    return ResultadosFinancieros(
+        gastos_operativos_mes=gastos_operativos_mes,
+        utilidad_bruta_mes=utilidad_bruta_mes,
+        margen_bruto=margen_bruto,
+        ebitda_mes=ebitda_mes,
+        margen_ebitda=margen_ebitda,
+        ebit_mes=ebit_mes,
+        utilidad_neta_mes=utilidad_neta_mes,
+        margen_neto=margen_neto,
+        ratio_alquiler=ratio_alquiler,
+        ratio_planilla=ratio_planilla,
+        costos_fijos_totales_mes=costos_fijos_totales_mes,
+        margen_contribucion_pct=margen_contribucion_pct,
+        punto_equilibrio_mes=punto_equilibrio_mes,
+        margen_seguridad_mes=margen_seguridad_mes,
+        dias_calle=dias_calle,
+        dias_inventario=dias_inventario,
+        dias_proveedor=dias_proveedor,
+        ccc=ccc,
+        dinero_atrapado_total=dinero_atrapado_total,
+        cobertura_bancaria=cobertura_bancaria,
+        pasivo_circulante=pasivo_circulante,
+        prueba_acida=prueba_acida,
+        ventas_anual_proy=ventas_anual_proy,
+        valor_empresa_actual_base=valor_empresa_actual_base,
+        patrimonio_estimado=patrimonio_estimado,
+        veredicto_final=veredicto_final,
+        icono_veredicto=icono_veredicto,
+        acciones_choque=acciones_choque,
+    )
+
+
+def calcular_diagnostico_matriz(entradas):
+    """
+    Mismo diagnóstico que calcular_diagnostico, por columnas: `entradas`
+    es un dict o DataFrame con los campos de EntradasFinancieras como
+    arreglos (una posición por empresa, mes o escenario). Devuelve un dict
+    con un arreglo por campo de ResultadosFinancieros (salvo los textos del
+    Juez Digital), más 'codigo_veredicto' (índice en
+    MOTOR_REGLAS.veredictos), 'n_acciones' y una bandera por regla.
+    """
+    import numpy as np
+
+    def campo(nombre):
+        if nombre in entradas:
+            return np.asarray(entradas[nombre], dtype=float)
+        return np.float64(getattr(EntradasFinancieras, nombre))
+
+    def dividir(num, den, defecto=0.0):
+        num, den = np.broadcast_arrays(num, den)
+        salida = np.full(num.shape, defecto, dtype=float)
+        np.divide(num, den, out=salida, where=den > 0)
+        return salida
+
+    e = {f.name: campo(f.name) for f in fields(EntradasFinancieras)}
+    ventas_mes = e['ventas_mes']
+    costo_ventas_mes = e['costo_ventas_mes']
+
+    gastos_operativos_mes = e['gasto_alquiler_mes'] + e['gasto_planilla_mes'] + e['gasto_otros_mes']
+
+    # 1. Potencia
+    utilidad_bruta_mes = ventas_mes - costo_ventas_mes
+    ebitda_mes = utilidad_bruta_mes - gastos_operativos_mes
+    ebit_mes = ebitda_mes - e['depreciacion_mes']
+    utilidad_neta_mes = ebit_mes - e['intereses_mes'] - e['impuestos_mes']
+
+    # 3. Supervivencia
+    costos_fijos_totales_mes = gastos_operativos_mes + e['intereses_mes']
+    margen_contribucion_pct = dividir(utilidad_bruta_mes, ventas_mes)
+    punto_equilibrio_mes = dividir(costos_fijos_totales_mes, margen_contribucion_pct)
+
+    # 4. Oxígeno (CCC) y Solvencia
+    dias_calle = dividir(e['cuentas_cobrar'], ventas_mes) * 30
+    dias_inventario = dividir(e['inventario'], costo_ventas_mes) * 30
+    dias_proveedor = dividir(e['cuentas_pagar'], costo_ventas_mes) * 30
+    pasivo_circulante = e['cuentas_pagar'] + e['deuda_bancaria']
+    valor_empresa_actual_base = (ebitda_mes * 12) * e['multiplo_global']
+
+    r = {
+        'gastos_operativos_mes': gastos_operativos_mes,
+        'utilidad_bruta_mes': utilidad_bruta_mes,
+        'margen_bruto': dividir(utilidad_bruta_mes, ventas_mes) * 100,
+        'ebitda_mes': ebitda_mes,
+        'margen_ebitda': dividir(ebitda_mes, ventas_mes) * 100,
+        'ebit_mes': ebit_mes,
+        'utilidad_neta_mes': utilidad_neta_mes,
+        'margen_neto': dividir(utilidad_neta_mes, ventas_mes) * 100,
+        'ratio_alquiler': dividir(e['gasto_alquiler_mes'], ventas_mes) * 100,
+        'ratio_planilla': dividir(e['gasto_planilla_mes'], utilidad_bruta_mes) * 100,
+        'costos_fijos_totales_mes': costos_fijos_totales_mes,
+        'margen_contribucion_pct': margen_contribucion_pct,
+        'punto_equilibrio_mes': punto_equilibrio_mes,
+        'margen_seguridad_mes': ventas_mes - punto_equilibrio_mes,
+        'dias_calle': dias_calle,
+        'dias_inventario': dias_inventario,
+        'dias_proveedor': dias_proveedor,
+        'ccc': dias_calle + dias_inventario - dias_proveedor,
+        'dinero_atrapado_total': e['cuentas_cobrar'] + e['inventario'],
+        'cobertura_bancaria': dividir(ebitda_mes, e['intereses_mes'], defecto=10.0),
+        'pasivo_circulante': pasivo_circulante,
+        'prueba_acida': dividir(e['caja'] + e['cuentas_cobrar'], pasivo_circulante),
+        'ventas_anual_proy': ventas_mes * 12,
+        'valor_empresa_actual_base': valor_empresa_actual_base,
+        'patrimonio_estimado': np.maximum(valor_empresa_actual_base - e['deuda_bancaria'], 0),
+    }
+
+    # 6. Juez Digital y Plan de Choque: las mismas reglas, evaluadas por columnas
+    reglas = MOTOR_REGLAS.evaluar_matriz(r)
+    r['codigo_veredicto'] = reglas.pop('veredicto')
+    r.update(reglas)
+    return r
@@ -0,0 +1,449 @@
+# ==========================================
+# 📈 FÁBRICA DE GRÁFICOS (PLOTLY) MEMOIZADA
+# ==========================================
+# Cada figura se construye solo cuando su pestaña se abre y queda guardada
+# por huella de entradas: volver a una pestaña con los mismos datos es
+# instantáneo. Las figuras se comparten entre sesiones: no modificarlas.
+# Plotly se importa dentro de cada figura: se carga al dibujar el primer
+# gráfico, no al arrancar la app.
+import numpy as np
+
+from motor.cache import CacheLRU, memoizar
+from motor.reglas import AMBAR, MOTOR_REGLAS, ROJO, VERDE
+from motor.submuestreo import UMBRAL_SERIE_GRANDE, indices_submuestreo
+
+MAX_FIGURAS_EN_CACHE = 256
+_CACHE_FIGURAS = CacheLRU(MAX_FIGURAS_EN_CACHE)
+
+# Colores de las bandas del Semáforo (umbrales en motor.reglas.BANDAS_SEMAFORO)
+COLORES_BANDA = {VERDE: "#43a047", AMBAR: "#fb8c00", ROJO: "#e53935"}
+
+
+@memoizar(_CACHE_FIGURAS)
+def figura_cascada(val_ventas, val_cogs, val_bruta, val_opex, val_ebitda, val_fin_tax, val_neta):
+    """Cascada de Rentabilidad (Tab 1)."""
+    import plotly.graph_objects as go
+    fig_waterfall = go.Figure(go.Waterfall(
+        name = "Flujo de Caja", 
+        orientation = "v",
+        measure = ["relative", "relative", "total", "relative", "total", "relative", "total"],
+        x = ["Ventas", "Costo Ventas", "Ut. Bruta", "Gastos Op. (OPEX)", "EBITDA (Motor)", "Intereses/Imp", "Ut. Neta"],
+        textposition = "outside",
+        text = [f"${val_ventas/1000:.1f}k", f"${val_cogs/1000:.1f}k", f"${val_bruta/1000:.1f}k", 
+                f"${val_opex/1000:.1f}k", f"${val_ebitda/1000:.1f}k", f"${val_fin_tax/1000:.1f}k", f"${val_neta/1000:.1f}k"],
+        y = [val_ventas, val_cogs, 0, val_opex, 0, val_fin_tax, 0],
+        connector = {"line":{"color":"rgb(63, 63, 63)"}},
+        
+        # --- CORRECCIÓN DE COLORES ---
+        decreasing = {"marker":{"color":"#ef5350"}}, # Rojo suave para salidas de dinero
+        increasing = {"marker":{"color":"#1565c0"}}, # Azul para entradas
+        totals = {"marker":{"color":"#37474f"}}      # Gris Oscuro (Charcoal) para todos los Totales
+    ))
+    
+    fig_waterfall.update_layout(
+        title="De la Venta a la Bolsa (P&L)",
+        showlegend=False,
+        height=550,
+        waterfallgap=0.1
+    )
+    return fig_waterfall
+
+
+@memoizar(_CACHE_FIGURAS)
+def figura_mandibulas(historico, meses=None):
+    """Ventas vs Costos vs Utilidad con Punto de Ineficiencia (Tab 2), en los últimos `meses` meses."""
+    import plotly.graph_objects as go
+    meses = historico.normalizar_ventana(meses)
+    df = historico.df_mandibulas if meses is None else historico.df_mandibulas.tail(meses)
+    fig_jaws = go.Figure()
+
+    # 3. DETECCIÓN DEL PUNTO DE INEFICIENCIA (sobre la serie completa, antes de submuestrear)
+    # Buscamos el primer mes donde Costos > Ventas
+    cruces = np.flatnonzero(df['Costos_Totales'].to_numpy() > df['Ventas'].to_numpy())
+    pos_quiebre = int(cruces[0]) if len(cruces) else None
+    if pos_quiebre is not None:
+        mes_q = df['Mes'].iloc[pos_quiebre]
+        valor_q = df['Costos_Totales'].iloc[pos_quiebre]
+
+    # Series grandes: WebGL y submuestreo LTTB (el punto de quiebre siempre se conserva)
+    n_puntos = len(df)
+    serie_grande = n_puntos > UMBRAL_SERIE_GRANDE
+    if serie_grande:
+        df = df.iloc[indices_submuestreo(
+            df, ['Ventas', 'Costos_Totales', 'Utilidad_Neta'],
+            obligatorios=[] if pos_quiebre is None else [pos_quiebre],
+        )]
+    Linea = go.Scattergl if serie_grande else go.Scatter
+    modo_linea = 'lines' if serie_grande else 'lines+markers'
+
+    # A. BARRAS DE UTILIDAD (Base)
+    if serie_grande:
+        fig_jaws.add_trace(go.Scattergl(
+            x=df['Mes'], y=df['Utilidad_Neta'],
+            mode='lines', fill='tozeroy',
+            name='Spread (Utilidad)',
+            line=dict(color='#66bb6a', width=1),
+            fillcolor='rgba(102, 187, 106, 0.4)',
+            hovertemplate='Mes: %{x}<br>Utilidad: $%{y:,.2f}<extra></extra>'
+        ))
+    else:
+        fig_jaws.add_trace(go.Bar(
+            x=df['Mes'], 
+            y=df['Utilidad_Neta'],
+            name='Spread (Utilidad)',
+            marker_color=np.where(df['Utilidad_Neta'].to_numpy() > 0, '#66bb6a', '#ffa726'),
+            opacity=0.6,
+            hovertemplate='Mes: %{x}<br>Utilidad: $%{y:,.2f}<extra></extra>'
+        ))
+
+    # B. LÍNEA DE VENTAS (Top Line)
+    fig_jaws.add_trace(Linea(
+        x=df['Mes'], y=df['Ventas'],
+        mode=modo_linea,
+        name='Ventas',
+        line=dict(color='#1565c0', width=4),
+        hovertemplate='Ventas: $%{y:,.2f}'
+    ))
+
+    # C. LÍNEA DE COSTOS CON SOMBREADO
+    fig_jaws.add_trace(Linea(
+        x=df['Mes'], y=df['Costos_Totales'],
+        mode=modo_linea,
+        name='Costos Totales',
+        line=dict(color='#c62828', width=4),
+        fill='tonexty', # Sombrea hacia la línea de ventas (que debe estar antes en el código)
+        fillcolor='rgba(198, 40, 40, 0.2)', 
+        hovertemplate='Costos: $%{y:,.2f}'
+    ))
+
+    if pos_quiebre is not None:
+        fig_jaws.add_annotation(
+            x=mes_q, y=valor_q,
+            text="⚠️ Punto de Ineficiencia",
+            showarrow=True,
+            arrowhead=2,
+            arrowcolor="#c62828",
+            ax=0, ay=-40,
+            font=dict(color="#ffffff", size=12),
+            bgcolor="#c62828"
+        )
+
+    # Configuración del Layout
+    fig_jaws.update_layout(
+        height=600,
+        template="plotly_white",
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
+        margin=dict(l=20, r=20, t=80, b=20),
+        hovermode="x unified",
+        yaxis_title="Monto Financiero ($)"
+    )
+    if serie_grande:
+        fig_jaws.add_annotation(
+            xref="paper", yref="paper", x=0, y=1.08, showarrow=False,
+            text=f"Vista reducida (LTTB): {len(df):,} de {n_puntos:,} puntos",
+            font=dict(color="#757575", size=11)
+        )
+    return fig_jaws
+
+
+@memoizar(_CACHE_FIGURAS)
+def figura_tendencia(historico, meses=None):
+    """Margen EBITDA móvil 3/6/12 meses (Tab 2), en los últimos `meses` meses."""
+    import plotly.graph_objects as go
+    meses = historico.normalizar_ventana(meses)
+    df = historico.moviles if meses is None else historico.moviles.tail(meses)
+    fig_tend = go.Figure()
+    colores = {3: '#90caf9', 6: '#42a5f5', 12: '#0d47a1'}
+    columnas = [f'Margen_EBITDA_{v}M' for v in colores if f'Margen_EBITDA_{v}M' in df]
+    serie_grande = len(df) > UMBRAL_SERIE_GRANDE
+    if serie_grande:
+        df = df.iloc[indices_submuestreo(df, columnas)]
+    Linea = go.Scattergl if serie_grande else go.Scatter
+    for v, color in colores.items():
+        columna = f'Margen_EBITDA_{v}M'
+        if columna in df and df[columna].notna().any():
+            fig_tend.add_trace(Linea(
+                x=df['Mes'], y=df[columna], mode='lines', name=f'Móvil {v}M',
+                line=dict(color=color, width=3 if v == 12 else 2),
+                hovertemplate=f'Margen {v}M: %{{y:.1f}}%<extra></extra>'
+            ))
+    fig_tend.add_hline(y=15, line_dash="dot", line_color="#2e7d32", annotation_text="Meta 15%")
+    fig_tend.update_layout(
+        height=350, template="plotly_white", hovermode="x unified",
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
+        margin=dict(l=20, r=20, t=40, b=20), yaxis_title="Margen EBITDA (%)"
+    )
+    return fig_tend
+
+
+@memoizar(_CACHE_FIGURAS)
+def figura_talento(df_chart_talento):
+    """Brecha Costo Empresa vs. Bolsillo Empleado (Tab 3)."""
+    import plotly.graph_objects as go
+    fig_talento = go.Figure()
+    # Barra Costo Real
+    fig_talento.add_trace(go.Bar(
+        y=df_chart_talento['Rol'], x=df_chart_talento['Costo Empresa'],
+        name='Costo Real (Tu Gasto)', orientation='h', marker_color='#ef5350'
+    ))
+    # Barra Neto
+    fig_talento.add_trace(go.Bar(
+        y=df_chart_talento['Rol'], x=df_chart_talento['Bolsillo Empleado'],
+        name='Neto (Su Bolsillo)', orientation='h', marker_color='#66bb6a',
+        text=df_chart_talento['Bolsillo Empleado'].apply(lambda x: f"${x:,.0f}"), textposition='auto'
+    ))
+    fig_talento.update_layout(barmode='group', height=200, margin=dict(l=0, r=0, t=0, b=0), legend=dict(orientation="h", y=-0.2))
+    return fig_talento
+
+
+@memoizar(_CACHE_FIGURAS)
+def figura_reloj_alquiler(ratio_alquiler):
+    """Reloj de Eficiencia Inmobiliaria (Tab 3)."""
+    import plotly.graph_objects as go
+    color_renta = COLORES_BANDA[MOTOR_REGLAS.banda('ratio_alquiler', ratio_alquiler)]
+    limite = MOTOR_REGLAS.bandas['ratio_alquiler'][1]
+    fig_renta = go.Figure(go.Indicator(
+        mode = "gauge+number", value = ratio_alquiler,
+        title = {'text': "Eficiencia Inmobiliaria (% Ventas)"},
+        gauge = {
+            'axis': {'range': [None, 2 * limite]}, 'bar': {'color': color_renta},
+            'steps': [{'range': [0, limite], 'color': "#f1f8e9"}, {'range': [limite, 2 * limite], 'color': "#ffebee"}],
+            'threshold': {'line': {'color': "red", 'width': 4}, 'thickness': 0.75, 'value': limite}
+        }
+    ))
+    fig_renta.update_layout(height=250, margin=dict(l=30, r=30, t=40, b=20))
+    return fig_renta
+
+
+@memoizar(_CACHE_FIGURAS)
+def figura_reloj_nomina(ratio_planilla_ub):
+    """Reloj de Peso de Nómina (Tab 3)."""
+    import plotly.graph_objects as go
+    color_nomina = COLORES_BANDA[MOTOR_REGLAS.banda('ratio_planilla', ratio_planilla_ub)]
+    limite = MOTOR_REGLAS.bandas['ratio_planilla'][1]
+    fig_nomina = go.Figure(go.Indicator(
+        mode = "gauge+number", value = ratio_planilla_ub,
+        title = {'text': "Peso de Nómina (% Ut. Bruta)"},
+        gauge = {
+            'axis': {'range': [None, 60]}, 'bar': {'color': color_nomina},
+            'steps': [{'range': [0, limite], 'color': "#f1f8e9"}, {'range': [limite, 60], 'color': "#ffebee"}],
+            'threshold': {'line': {'color': "red", 'width': 4}, 'thickness': 0.75, 'value': limite}
+        }
+    ))
+    fig_nomina.update_layout(height=250, margin=dict(l=30, r=30, t=40, b=20))
+    return fig_nomina
+
+
+@memoizar(_CACHE_FIGURAS)
+def figura_equilibrio(ventas_mes, punto_equilibrio_mes, costos_fijos_totales_mes, cv_ratio, ventas_meta, ganancia_deseada):
+    """Mapa de Navegación Financiera / Punto de Equilibrio (Tab 5)."""
+    import plotly.graph_objects as go
+    # Definir Rango de Proyección (Eje X) para incluir la Meta
+    max_x = max(ventas_mes, punto_equilibrio_mes, ventas_meta) * 1.25
+    if max_x == 0: max_x = 1000
+
+    # Coordenadas
+    eje_x = [0, max_x]
+    y_ventas = [0, max_x]
+    y_fijos = [costos_fijos_totales_mes, costos_fijos_totales_mes]
+    y_totales = [costos_fijos_totales_mes, costos_fijos_totales_mes + (max_x * cv_ratio)]
+
+    fig_be = go.Figure()
+
+    # A. ZONAS DE SOMBRA (Pérdida/Ganancia)
+    if punto_equilibrio_mes > 0:
+        # Zona Roja
+        fig_be.add_trace(go.Scatter(
+            x=[0, punto_equilibrio_mes, punto_equilibrio_mes, 0],
+            y=[costos_fijos_totales_mes, punto_equilibrio_mes, 0, 0],
+            fill='toself', mode='none', name='Zona Pérdida',
+            fillcolor='rgba(239, 83, 80, 0.1)', hoverinfo='skip'
+        ))
+        # Zona Verde
+        y_fin_ventas = max_x
+        y_fin_costos = costos_fijos_totales_mes + (max_x * cv_ratio)
+        fig_be.add_trace(go.Scatter(
+            x=[punto_equilibrio_mes, max_x, max_x, punto_equilibrio_mes],
+            y=[punto_equilibrio_mes, y_fin_ventas, y_fin_costos, punto_equilibrio_mes],
+            fill='toself', mode='none', name='Zona Ganancia',
+            fillcolor='rgba(102, 187, 106, 0.1)', hoverinfo='skip'
+        ))
+
+    # B. LÍNEAS ESTRUCTURALES
+    fig_be.add_trace(go.Scatter(x=eje_x, y=y_fijos, mode='lines', name='Costos Fijos', line=dict(color='firebrick', width=2, dash='dash')))
+    fig_be.add_trace(go.Scatter(x=eje_x, y=y_totales, mode='lines', name='Costo Total', line=dict(color='orange', width=3)))
+    fig_be.add_trace(go.Scatter(x=eje_x, y=y_ventas, mode='lines', name='Ventas', line=dict(color='royalblue', width=4)))
+
+    # C. MARCADORES
+    # 1. Punto de Equilibrio
+    if punto_equilibrio_mes > 0:
+        fig_be.add_trace(go.Scatter(
+            x=[punto_equilibrio_mes], y=[punto_equilibrio_mes],
+            mode='markers', name='Punto de Equilibrio',
+            marker=dict(size=10, color='white', line=dict(color='black', width=2))
+        ))
+
+    # 2. Realidad Actual
+    fig_be.add_trace(go.Scatter(
+        x=[ventas_mes], y=[ventas_mes],
+        mode='markers', name='Tu Realidad',
+        marker=dict(size=15, color='green' if ventas_mes >= punto_equilibrio_mes else 'red', symbol='diamond'),
+        hovertemplate='Hoy: $%{x:,.0f}<extra></extra>'
+    ))
+
+    # D. LÍNEA DE META (NUEVO FEATURE)
+    if ganancia_deseada > 0 and ventas_meta > 0:
+        # Línea Vertical
+        fig_be.add_vline(x=ventas_meta, line_width=2, line_dash="dot", line_color="purple")
+        
+        # Marcador de Meta
+        fig_be.add_trace(go.Scatter(
+            x=[ventas_meta], y=[ventas_meta],
+            mode='markers+text', name='META DESEADA',
+            text=["🏆"], textposition="top center",
+            marker=dict(size=15, color='purple', symbol='star'),
+            hovertemplate='Meta: $%{x:,.0f}<br>Ganancia: $' + f'{ganancia_deseada:,.0f}<extra></extra>'
+        ))
+        
+        # Anotación
+        fig_be.add_annotation(
+            x=ventas_meta, y=0,
+            text=f"Meta: ${ventas_meta:,.0f}",
+            showarrow=False, yshift=10, font=dict(color="purple")
+        )
+
+    # Configuración Final
+    fig_be.update_layout(
+        title="Mapa de Navegación Financiera",
+        xaxis_title="Ventas ($)", yaxis_title="Dinero ($)",
+        height=500, template="plotly_white",
+        legend=dict(orientation="h", y=1.1)
+    )
+    return fig_be
+
+
+@memoizar(_CACHE_FIGURAS)
+def figura_simulador(base_ventas, sim_ventas, base_costos, sim_costos, mejora):
+    """Apertura de la Mandíbula: Actual vs Simulado (Tab 4)."""
+    import plotly.graph_objects as go
+    # Datos para el gráfico comparativo
+    x_stages = ["Actual", "Simulado"]
+    y_ventas = [base_ventas, sim_ventas]
+    y_costos = [base_costos, sim_costos]
+    
+    fig_sim = go.Figure()
+    
+    # Línea Ventas
+    fig_sim.add_trace(go.Scatter(
+        x=x_stages, y=y_ventas, mode='lines+markers+text', name='Ventas',
+        text=[f"${v/1000:.1f}k" for v in y_ventas], textposition="top center",
+        line=dict(color='#1565c0', width=4)
+    ))
+    
+    # Línea Costos
+    fig_sim.add_trace(go.Scatter(
+        x=x_stages, y=y_costos, mode='lines+markers+text', name='Costos Totales',
+        text=[f"${v/1000:.1f}k" for v in y_costos], textposition="bottom center",
+        line=dict(color='#c62828', width=4)
+    ))
+    
+    # Sombreado de Utilidad (Area entre líneas)
+    fig_sim.add_trace(go.Scatter(
+        x=x_stages, y=y_ventas,
+        fill=None, mode='none', showlegend=False
+    ))
+    fig_sim.add_trace(go.Scatter(
+        x=x_stages, y=y_costos,
+        fill='tonexty', mode='none', showlegend=False,
+        fillcolor='rgba(76, 175, 80, 0.2)' if mejora else 'rgba(239, 83, 80, 0.2)'
+    ))
+
+    fig_sim.update_layout(
+        title="Apertura de la Mandíbula (Rentabilidad)",
+        yaxis_title="Dinero ($)",
+        height=300,
+        margin=dict(l=20, r=20, t=40, b=20),
+        showlegend=True
+    )
+    return fig_sim
+
+
+@memoizar(_CACHE_FIGURAS)
+def figura_distribucion(centros, conteos, percentiles, titulo, eje_x, formato="$%{x:,.0f}", meta=None):
+    """Histograma de escenarios Monte Carlo con P5/P50/P95 y meta opcional (Tab 4)."""
+    import plotly.graph_objects as go
+    colores = ['#ef5350' if c < 0 else '#66bb6a' for c in centros] if meta is None else \
+              ['#66bb6a' if c >= meta else '#ffa726' for c in centros]
+    fig_dist = go.Figure(go.Bar(
+        x=centros, y=conteos, marker_color=colores, opacity=0.8,
+        hovertemplate=f'{formato}<br>Escenarios: %{{y:,}}<extra></extra>'
+    ))
+    for etiqueta, valor in percentiles.items():
+        fig_dist.add_vline(x=valor, line_width=2, line_dash="dot", line_color="#37474f",
+                           annotation_text=etiqueta, annotation_position="top")
+    if meta is not None:
+        fig_dist.add_vline(x=meta, line_width=3, line_color="green",
+                           annotation_text=f"Meta {meta:.0f}%", annotation_position="bottom right")
+    fig_dist.update_layout(
+        title=titulo, xaxis_title=eje_x, yaxis_title="Escenarios",
+        height=320, bargap=0.02, template="plotly_white",
+        margin=dict(l=20, r=20, t=50, b=20), showlegend=False
+    )
+    return fig_dist
+
+
+@memoizar(_CACHE_FIGURAS)
+def figura_mapa_sensibilidad(x, y, z, titulo, etiqueta_z, formato_z, niveles=None, meta=None):
+    """Mapa de calor de la superficie de sensibilidad con curvas iso-margen (Tab 4)."""
+    import plotly.graph_objects as go
+    fig_mapa = go.Figure(go.Heatmap(
+        x=x, y=y, z=z, colorscale="RdYlGn", zmid=meta if meta is not None else 0,
+        colorbar=dict(title=etiqueta_z),
+        hovertemplate=f'Precio: +%{{x}}%<br>Volumen: %{{y}}%<br>{etiqueta_z}: {formato_z}<extra></extra>'
+    ))
+    if niveles is not None:
+        fig_mapa.add_trace(go.Contour(
+            x=x, y=y, z=z, showscale=False, hoverinfo='skip',
+            contours=dict(coloring='none', showlabels=True, start=niveles[0], end=niveles[1], size=niveles[2],
+                          labelfont=dict(color='#263238')),
+            line=dict(color='#263238', width=1)
+        ))
+    if meta is not None:
+        # Frontera del Legado: combinaciones que llegan exactamente a la meta
+        fig_mapa.add_trace(go.Contour(
+            x=x, y=y, z=z, showscale=False, hoverinfo='skip',
+            contours=dict(coloring='none', showlabels=True, start=meta, end=meta, size=1,
+                          labelfont=dict(color='#1b5e20', size=14)),
+            line=dict(color='#1b5e20', width=4)
+        ))
+    fig_mapa.update_layout(
+        title=titulo, xaxis_title="Subir Precios (%)", yaxis_title="Variación de Volumen (%)",
+        height=420, margin=dict(l=20, r=20, t=50, b=20)
+    )
+    return fig_mapa
+
+
+@memoizar(_CACHE_FIGURAS)
+def figura_tornado(base_ebitda, impactos):
+    """Tornado: impacto de cada palanca sobre el EBITDA mensual (Tab 4)."""
+    import plotly.graph_objects as go
+    palancas = [i["Palanca"] for i in impactos][::-1]
+    fig_tornado = go.Figure()
+    fig_tornado.add_trace(go.Bar(
+        y=palancas, x=[i["Mínimo"] for i in impactos][::-1], base=base_ebitda, orientation='h',
+        name='Peor extremo', marker_color='#ef5350',
+        hovertemplate='%{y}: %{x:+$,.0f}<extra></extra>'
+    ))
+    fig_tornado.add_trace(go.Bar(
+        y=palancas, x=[i["Máximo"] for i in impactos][::-1], base=base_ebitda, orientation='h',
+        name='Mejor extremo', marker_color='#66bb6a',
+        hovertemplate='%{y}: %{x:+$,.0f}<extra></extra>'
+    ))
+    fig_tornado.add_vline(x=base_ebitda, line_width=2, line_color="#37474f",
+                          annotation_text="EBITDA Actual", annotation_position="top")
+    fig_tornado.update_layout(
+        title="Tornado: ¿Qué palanca mueve más tu EBITDA?", barmode='overlay',
+        xaxis_title="EBITDA Mensual ($)", height=300, template="plotly_white",
+        margin=dict(l=20, r=20, t=50, b=20), legend=dict(orientation="h", y=-0.25)
+    )
+    return fig_tornado
@@ -0,0 +1,218 @@
+# ==========================================
+# HISTÓRICO MODO B (PLANTILLA MENSUAL, CUALQUIER LONGITUD)
+# ==========================================
+import hashlib
+import io
+from dataclasses import dataclass
+
+import pandas as pd
+
+from motor.cache import CacheLRU
+
+# Columnas de plantilla_sg_consulting.csv y su variable equivalente en el motor
+COLUMNAS_PLANTILLA = {
+    'Ventas': 'ventas_mes',
+    'Costo_Ventas': 'costo_ventas_mes',
+    'Alquiler': 'gasto_alquiler_mes',
+    'Planilla': 'gasto_planilla_mes',
+    'Otros_Gastos': 'gasto_otros_mes',
+    'Depreciacion': 'depreciacion_mes',
+    'Intereses': 'intereses_mes',
+    'Impuestos': 'impuestos_mes',
+}
+
+MESES = ['Ene', 'Feb', 'Mar', 'Abr', 'May', 'Jun', 'Jul', 'Ago', 'Sep', 'Oct', 'Nov', 'Dic']
+
+# Columnas que el motor necesita: en formatos columnares solo se leen estas
+COLUMNAS_LECTURA = ['Mes', *COLUMNAS_PLANTILLA]
+
+# Firmas de los formatos columnares aceptados además de CSV
+MAGIA_PARQUET = b"PAR1"
+MAGIA_ARROW = b"ARROW1"
+
+# Ventanas móviles (meses) precalculadas al cargar un histórico
+VENTANAS_MOVILES = (3, 6, 12)
+
+# Ventana de análisis por defecto (Modo B, portafolio y procesos por lotes)
+VENTANA_DEFECTO = 12
+
+# Históricos procesados por proceso (compartido entre sesiones y reruns)
+MAX_HISTORICOS_EN_CACHE = 32
+_CACHE_HISTORICOS = CacheLRU(MAX_HISTORICOS_EN_CACHE)
+
+
+@dataclass(frozen=True)
+class HistoricoCargado:
+    """
+    Un archivo subido ya procesado: el DataFrame original, los promedios
+    mensuales, las series derivadas para la pestaña Mandíbulas y los
+    indicadores móviles. Se comparte entre sesiones, así que debe
+    tratarse como solo lectura.
+    """
+    huella: str
+    df: pd.DataFrame
+    promedios: dict
+    df_mandibulas: pd.DataFrame
+    moviles: pd.DataFrame
+    promedios_por_ventana: dict
+
+    @property
+    def meses(self):
+        return len(self.df)
+
+    def normalizar_ventana(self, meses):
+        """None si la ventana cubre todo el histórico (o no se indicó)."""
+        return meses if meses and meses < self.meses else None
+
+    def promedios_ventana(self, meses=None):
+        """Promedios de los últimos `meses` meses (todo el histórico si es None)."""
+        meses = self.normalizar_ventana(meses)
+        if meses is None:
+            return self.promedios
+        if meses in self.promedios_por_ventana:
+            return self.promedios_por_ventana[meses]
+        return promedios_mensuales(self.df.tail(meses))
+
+
+def promedios_mensuales(df_historico):
+    """
+    Promedio de cada columna de la plantilla, con los nombres de variable
+    que usa EntradasFinancieras (ventas_mes, costo_ventas_mes, ...).
+    """
+    faltantes = [c for c in COLUMNAS_PLANTILLA if c not in df_historico.columns]
+    if faltantes:
+        raise ValueError(f"Faltan columnas en el archivo: {', '.join(faltantes)}")
+    return {var: float(df_historico[col].mean()) for col, var in COLUMNAS_PLANTILLA.items()}
+
+
+def preparar_mandibulas(df_historico):
+    """
+    Agrega Costos_Totales, Utilidad_Neta y Costos_Exceso al histórico.
+    """
+    df = df_historico.copy()
+    if 'Mes' in df:
+        df['Mes'] = etiquetas_unicas(df['Mes']).to_numpy()
+    df['Costos_Totales'] = df['Costo_Ventas'] + df['Alquiler'] + df['Planilla'] + df['Otros_Gastos']
+    df['Utilidad_Neta'] = df['Ventas'] - df['Costos_Totales']
+    
+    # Serie que solo contiene valores cuando los costos superan las ventas
+    df['Costos_Exceso'] = df['Costos_Totales'].where(df['Costos_Totales'] > df['Ventas'], df['Ventas'])
+    return df
+
+
+def etiquetas_unicas(meses):
+    """
+    En históricos de varios años con etiquetas sin año ("Ene", "Feb", ...)
+    numera las repeticiones ("Ene (2)") para que el eje de los gráficos no
+    las fusione.
+    """
+    meses = pd.Series(meses, dtype=object).astype(str).reset_index(drop=True)
+    ocurrencia = meses.groupby(meses).cumcount()
+    if not ocurrencia.any():
+        return meses
+    return meses.where(ocurrencia == 0, meses + " (" + (ocurrencia + 1).astype(str) + ")")
+
+
+def indicadores_moviles(df_historico, ventanas=VENTANAS_MOVILES):
+    """
+    EBITDA y margen EBITDA mensuales, acumulados móviles por ventana
+    (EBITDA_3M, Margen_EBITDA_3M, ...) y variaciones interanuales contra el
+    mismo mes del año anterior. Todo por columnas, sin recorrer filas.
+    """
+    ventas = df_historico['Ventas'].astype(float).reset_index(drop=True)
+    ebitda = ventas - (
+        df_historico['Costo_Ventas'] + df_historico['Alquiler'] +
+        df_historico['Planilla'] + df_historico['Otros_Gastos']
+    ).astype(float).reset_index(drop=True)
+
+    columnas = {
+        'Mes': etiquetas_unicas(df_historico['Mes']) if 'Mes' in df_historico else pd.Series(range(1, len(ventas) + 1)),
+        'Ventas': ventas,
+        'EBITDA': ebitda,
+        'Margen_EBITDA': (ebitda / ventas.where(ventas > 0)) * 100,
+    }
+    for v in ventanas:
+        ventas_v = ventas.rolling(v).sum()
+        ebitda_v = ebitda.rolling(v).sum()
+        columnas[f'Ventas_{v}M'] = ventas_v
+        columnas[f'EBITDA_{v}M'] = ebitda_v
+        columnas[f'Margen_EBITDA_{v}M'] = (ebitda_v / ventas_v.where(ventas_v > 0)) * 100
+
+    ventas_anterior = ventas.shift(12)
+    columnas['Ventas_YoY_%'] = (ventas / ventas_anterior.where(ventas_anterior > 0) - 1) * 100
+    columnas['EBITDA_YoY'] = ebitda.diff(12)
+    if 12 in ventanas:
+        # Últimos 12 meses contra los 12 anteriores (requiere 24 meses)
+        ventas_12m_anterior = columnas['Ventas_12M'].shift(12)
+        columnas['Ventas_12M_YoY_%'] = (columnas['Ventas_12M'] / ventas_12m_anterior.where(ventas_12m_anterior > 0) - 1) * 100
+        columnas['EBITDA_12M_YoY'] = columnas['EBITDA_12M'].diff(12)
+    return pd.DataFrame(columnas)
+
+
+def tendencia_ventana(historico, meses=None):
+    """
+    Cambio de ventas y EBITDA entre el primer y el último mes de la
+    ventana, más las variaciones interanuales del último mes cuando el
+    histórico las permite (NaN si no).
+    """
+    meses = historico.normalizar_ventana(meses)
+    ventana = historico.moviles if meses is None else historico.moviles.tail(meses)
+    ultimo = ventana.iloc[-1]
+    return {
+        'meses': len(ventana),
+        'desde': ventana['Mes'].iloc[0],
+        'hasta': ultimo['Mes'],
+        'crecimiento_ventas': float(ultimo['Ventas'] - ventana['Ventas'].iloc[0]),
+        'crecimiento_ebitda': float(ultimo['EBITDA'] - ventana['EBITDA'].iloc[0]),
+        'ventas_yoy_pct': float(ultimo['Ventas_YoY_%']),
+        'ebitda_yoy': float(ultimo['EBITDA_YoY']),
+        'ventas_12m_yoy_pct': float(ultimo.get('Ventas_12M_YoY_%', float('nan'))),
+        'ebitda_12m_yoy': float(ultimo.get('EBITDA_12M_YoY', float('nan'))),
+    }
+
+
+def huella_contenido(contenido):
+    """Hash SHA-256 del contenido del archivo (clave del caché)."""
+    return hashlib.sha256(contenido).hexdigest()
+
+
+def leer_historico(contenido):
+    """
+    DataFrame del histórico a partir de los bytes de un CSV, Parquet o
+    Arrow IPC (se detecta por la firma del archivo). En los formatos
+    columnares solo se leen las columnas de COLUMNAS_LECTURA.
+    """
+    if contenido[:4] == MAGIA_PARQUET:
+        import pyarrow.parquet as pq
+        archivo = pq.ParquetFile(io.BytesIO(contenido))
+        columnas = [c for c in COLUMNAS_LECTURA if c in archivo.schema_arrow.names]
+        return archivo.read(columns=columnas).to_pandas()
+    if contenido[:6] == MAGIA_ARROW:
+        import pyarrow as pa
+        lector = pa.ipc.open_file(pa.BufferReader(contenido))
+        columnas = [c for c in COLUMNAS_LECTURA if c in lector.schema.names]
+        return lector.read_all().select(columnas).to_pandas()
+    return pd.read_csv(io.BytesIO(contenido))
+
+
+def historico_desde_df(huella, leer_df):
+    """
+    HistoricoCargado para la huella dada; `leer_df` solo se llama si la
+    huella no está en caché.
+    """
+    def _procesar():
+        df = leer_df()
+        promedios = promedios_mensuales(df)
+        por_ventana = {v: promedios_mensuales(df.tail(v)) for v in VENTANAS_MOVILES if v < len(df)}
+        return HistoricoCargado(huella, df, promedios, preparar_mandibulas(df), indicadores_moviles(df), por_ventana)
+
+    return _CACHE_HISTORICOS.obtener_o_calcular(huella, _procesar)
+
+
+def cargar_historico(contenido):
+    """
+    Procesa los bytes de un archivo subido una sola vez por contenido.
+    Reruns, pestañas y sesiones que suban el mismo archivo reutilizan el
+    resultado; el caché desaloja el menos usado al llegar al límite.
+    """
+    return historico_desde_df(huella_contenido(contenido), lambda: leer_historico(contenido))
@@ -0,0 +1,173 @@
+# ==========================================
+# 📚 INGESTA DE LIBRO MAYOR (TRANSACCIONES → PLANTILLA MENSUAL)
+# ==========================================
+"""
+Convierte un libro mayor exportado (millones de líneas) en el histórico
+mensual de plantilla_sg_consulting.csv.
+
+El archivo se lee por bloques: en memoria solo viven el bloque actual y
+los totales por (mes, categoría), así que el consumo no crece con el
+número de transacciones.
+
+Uso:
+    python -m motor.ingesta_libro libro_mayor.csv --salida historico.csv
+"""
+import argparse
+import re
+import sys
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from motor.historico import COLUMNAS_PLANTILLA, MESES
+
+CATEGORIAS = list(COLUMNAS_PLANTILLA)
+
+# Reglas por defecto (en orden): expresión sobre el nombre o código de la
+# cuenta -> categoría de la plantilla. La primera que coincide gana.
+REGLAS_DEFECTO = [
+    (r"costo.*venta|costo de (lo|los|las)|cogs|^5", 'Costo_Ventas'),
+    (r"deprecia|amortiza", 'Depreciacion'),
+    (r"inter[eé]s|financier", 'Intereses'),
+    (r"impuesto sobre la renta|\bisr\b|renta gravable", 'Impuestos'),
+    (r"alquiler|arrendamiento|\bcam\b", 'Alquiler'),
+    (r"salario|sueldo|planilla|n[oó]mina|seguro social|seguro educativo|d[eé]cimo|vacaciones|riesgos profesionales", 'Planilla'),
+    (r"venta|ingreso|^4", 'Ventas'),
+    (r"gasto|servicio|software|publicidad|mercadeo|luz|agua|tel[eé]fono|^6", 'Otros_Gastos'),
+]
+
+TAM_BLOQUE_DEFECTO = 250_000
+
+
+@dataclass(frozen=True)
+class ResultadoIngesta:
+    df_historico: pd.DataFrame
+    filas_leidas: int
+    filas_ignoradas: int
+    cuentas_sin_clasificar: list
+
+
+def compilar_reglas(reglas=None):
+    return [(re.compile(patron, re.IGNORECASE), categoria) for patron, categoria in (reglas or REGLAS_DEFECTO)]
+
+
+def clasificar_cuenta(cuenta, reglas_compiladas, mapeo=None):
+    """
+    Categoría de la plantilla para una cuenta, o None si no se reconoce
+    (ej. cuentas de balance). El mapeo explícito tiene prioridad.
+    """
+    if mapeo and cuenta in mapeo:
+        return mapeo[cuenta]
+    for patron, categoria in reglas_compiladas:
+        if patron.search(cuenta):
+            return categoria
+    return None
+
+
+def agregar_libro(fuente, col_fecha="Fecha", col_cuenta="Cuenta", col_monto="Monto", col_debe=None, col_haber=None,
+                  reglas=None, mapeo=None, naturaleza_contable=False, dayfirst=True, tam_bloque=TAM_BLOQUE_DEFECTO):
+    """
+    Lee el libro mayor por bloques y lo agrega a totales mensuales por
+    categoría con el formato de la plantilla (Mes, Ventas, Costo_Ventas, ...).
+
+    Con `naturaleza_contable` (o columnas Debe/Haber) los créditos vienen
+    negativos y las Ventas se invierten de signo.
+    """
+    reglas_compiladas = compilar_reglas(reglas)
+    usar_debe_haber = col_debe is not None and col_haber is not None
+    columnas = [col_fecha, col_cuenta] + ([col_debe, col_haber] if usar_debe_haber else [col_monto])
+
+    memo_cuentas = {}
+    sin_clasificar = set()
+    totales = None
+    filas_leidas = 0
+    filas_ignoradas = 0
+
+    lector = pd.read_csv(fuente, usecols=columnas, dtype={col_cuenta: str}, chunksize=tam_bloque)
+    for bloque in lector:
+        filas_leidas += len(bloque)
+
+        # 1. Clasificación: cada cuenta distinta se evalúa una sola vez en todo el archivo
+        codigos_cuenta, cuentas_unicas = pd.factorize(bloque[col_cuenta].fillna(""))
+        categorias_unicas = []
+        for cuenta in cuentas_unicas:
+            cuenta = str(cuenta).strip()
+            if cuenta not in memo_cuentas:
+                memo_cuentas[cuenta] = clasificar_cuenta(cuenta, reglas_compiladas, mapeo)
+                if memo_cuentas[cuenta] is None:
+                    sin_clasificar.add(cuenta)
+            categorias_unicas.append(memo_cuentas[cuenta])
+        categorias = pd.Series(np.asarray(categorias_unicas, dtype=object)[codigos_cuenta], index=bloque.index)
+
+        # 2. Montos y periodo mensual
+        if usar_debe_haber:
+            montos = (pd.to_numeric(bloque[col_debe], errors='coerce').fillna(0)
+                      - pd.to_numeric(bloque[col_haber], errors='coerce').fillna(0))
+        else:
+            montos = pd.to_numeric(bloque[col_monto], errors='coerce')
+        # Las fechas se repiten mucho: se convierten solo los valores distintos
+        codigos_fecha, fechas_unicas = pd.factorize(bloque[col_fecha])
+        periodos_unicos = pd.to_datetime(pd.Series(fechas_unicas), errors='coerce', dayfirst=dayfirst).dt.to_period('M')
+        periodos = pd.Series(periodos_unicos.to_numpy()[codigos_fecha], index=bloque.index)
+        periodos[codigos_fecha < 0] = pd.NaT
+
+        validas = categorias.notna() & montos.notna() & periodos.notna()
+        filas_ignoradas += int((~validas).sum())
+
+        # 3. Acumulado acotado: (mes, categoría) -> total
+        parcial = montos[validas].groupby([periodos[validas], categorias[validas]]).sum()
+        totales = parcial if totales is None else totales.add(parcial, fill_value=0)
+
+    if totales is None or totales.empty:
+        raise ValueError("El libro no contiene transacciones clasificables (revisa columnas y reglas de cuentas).")
+
+    tabla = totales.unstack(fill_value=0).reindex(columns=CATEGORIAS, fill_value=0)
+    tabla = tabla.reindex(pd.period_range(tabla.index.min(), tabla.index.max(), freq='M'), fill_value=0)
+    if naturaleza_contable or usar_debe_haber:
+        tabla['Ventas'] = -tabla['Ventas']
+
+    df_historico = tabla.reset_index(drop=True)
+    df_historico.insert(0, 'Mes', [f"{MESES[p.month - 1]} {p.year}" for p in tabla.index])
+    df_historico.columns.name = None
+    return ResultadoIngesta(df_historico, filas_leidas, filas_ignoradas, sorted(sin_clasificar))
+
+
+def leer_mapeo(fuente):
+    """Mapeo explícito desde un CSV con columnas Cuenta y Categoria."""
+    df = pd.read_csv(fuente, dtype=str)
+    invalidas = sorted(set(df['Categoria']) - set(CATEGORIAS))
+    if invalidas:
+        raise ValueError(f"Categorías no válidas en el mapeo: {', '.join(invalidas)}")
+    return dict(zip(df['Cuenta'].str.strip(), df['Categoria'].str.strip()))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Agrega un libro mayor a la plantilla mensual de SG Consulting.")
+    parser.add_argument("libro", help="CSV del libro mayor (una línea por transacción)")
+    parser.add_argument("--salida", default="plantilla_sg_consulting.csv")
+    parser.add_argument("--col-fecha", default="Fecha")
+    parser.add_argument("--col-cuenta", default="Cuenta")
+    parser.add_argument("--col-monto", default="Monto")
+    parser.add_argument("--col-debe", default=None)
+    parser.add_argument("--col-haber", default=None)
+    parser.add_argument("--mapeo", default=None, help="CSV con columnas Cuenta,Categoria (tiene prioridad sobre las reglas)")
+    parser.add_argument("--naturaleza-contable", action="store_true", help="Créditos negativos (Ventas se invierten)")
+    parser.add_argument("--tam-bloque", type=int, default=TAM_BLOQUE_DEFECTO)
+    args = parser.parse_args(argv)
+
+    resultado = agregar_libro(
+        args.libro, args.col_fecha, args.col_cuenta, args.col_monto, args.col_debe, args.col_haber,
+        mapeo=leer_mapeo(args.mapeo) if args.mapeo else None,
+        naturaleza_contable=args.naturaleza_contable, tam_bloque=args.tam_bloque,
+    )
+    resultado.df_historico.to_csv(args.salida, index=False)
+    print(f"✅ {resultado.filas_leidas:,} líneas -> {len(resultado.df_historico)} meses ({args.salida}). "
+          f"Ignoradas: {resultado.filas_ignoradas:,}.")
+    if resultado.cuentas_sin_clasificar:
+        print(f"⚠️ Cuentas sin clasificar: {', '.join(resultado.cuentas_sin_clasificar[:20])}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
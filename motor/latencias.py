@@ -0,0 +1,146 @@
+# ==========================================
+# 🩺 INSTRUMENTACIÓN DE LATENCIA POR RERUN
+# ==========================================
+"""
+Mide cuánto tarda cada fase de un rerun de la app (barra lateral, nómina,
+lectura del histórico, cálculos centrales, cada pestaña y el informe PDF)
+para poder responder con datos cuando "la app se siente lenta".
+
+Cada rerun usa un RegistroRerun: las fases se miden con `fase(nombre)`
+(anidables: la barra lateral incluye la nómina y la lectura) y al cerrar
+se obtiene un registro plano que se agrega a dos AgregadorLatencias (el
+de la sesión y LATENCIAS_PROCESO, compartido por todas las sesiones) y se
+anexa como una línea JSON al archivo de latencias.
+
+El archivo se toma de la variable de entorno SG_CONSULTING_LATENCIAS
+(por defecto ~/.sg_consulting/latencias.jsonl); si la variable existe y
+está vacía, no se escribe nada. Cuando el archivo supera
+MAX_BYTES_REGISTRO se renombra a latencias.jsonl.1 (reemplazando el
+anterior) y se empieza uno nuevo, así que en disco nunca hay más de unas
+2 x MAX_BYTES_REGISTRO de registros.
+"""
+import json
+import math
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+FASE_TOTAL = "Total rerun"
+
+# Muestras por fase que conserva cada agregador (las más recientes)
+MAX_MUESTRAS_SESION = 500
+MAX_MUESTRAS_PROCESO = 5000
+
+# Tamaño (bytes) a partir del cual se rota el archivo de latencias
+MAX_BYTES_REGISTRO = 10 * 1024 * 1024
+
+_LOCK_ARCHIVO = threading.Lock()
+
+
+def ruta_registro_defecto():
+    ruta = os.environ.get("SG_CONSULTING_LATENCIAS")
+    if ruta is None:
+        return Path.home() / ".sg_consulting" / "latencias.jsonl"
+    return Path(ruta) if ruta else None
+
+
+def percentil(valores, p):
+    """Percentil `p` (0-100) por rango más cercano de una lista ya ordenada."""
+    if not valores:
+        return float('nan')
+    indice = min(len(valores) - 1, max(0, math.ceil(p / 100 * len(valores)) - 1))
+    return valores[indice]
+
+
+class RegistroRerun:
+    """Fases (ms) de un rerun, en el orden en que se midieron."""
+
+    def __init__(self, sesion=""):
+        self.sesion = sesion
+        self.inicio = time.perf_counter()
+        self.fases = {}
+
+    def agregar(self, nombre, ms):
+        self.fases[nombre] = self.fases.get(nombre, 0.0) + ms
+
+    @contextmanager
+    def fase(self, nombre, medir=True):
+        """Mide el bloque `with`. Con medir=False no registra nada (ej. pestaña oculta)."""
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            if medir:
+                self.agregar(nombre, (time.perf_counter() - inicio) * 1000)
+
+    def cerrar(self, **contexto):
+        """Registro plano del rerun: marca de tiempo, sesión, contexto, fases y total."""
+        fases = dict(self.fases)
+        fases[FASE_TOTAL] = (time.perf_counter() - self.inicio) * 1000
+        return {
+            'ts': datetime.now().isoformat(timespec="milliseconds"),
+            'sesion': self.sesion,
+            **contexto,
+            'fases_ms': {nombre: round(ms, 3) for nombre, ms in fases.items()},
+        }
+
+
+class AgregadorLatencias:
+    """Últimas `max_muestras` mediciones por fase, seguro entre hilos."""
+
+    def __init__(self, max_muestras=MAX_MUESTRAS_SESION):
+        self.max_muestras = max_muestras
+        self._muestras = {}
+        self._lock = threading.Lock()
+
+    def agregar(self, registro):
+        with self._lock:
+            for nombre, ms in registro['fases_ms'].items():
+                self._muestras.setdefault(nombre, deque(maxlen=self.max_muestras)).append(ms)
+
+    def muestras(self, fase):
+        """Mediciones guardadas de la fase (ms), de la más antigua a la más reciente."""
+        with self._lock:
+            return list(self._muestras.get(fase, ()))
+
+    def resumen(self):
+        """Una fila por fase (el total al final): muestras, p50, p95 y máximo (ms)."""
+        with self._lock:
+            copia = {nombre: sorted(muestras) for nombre, muestras in self._muestras.items() if nombre != FASE_TOTAL}
+            if FASE_TOTAL in self._muestras:
+                copia[FASE_TOTAL] = sorted(self._muestras[FASE_TOTAL])
+        return [
+            {'Fase': nombre, 'n': len(valores), 'p50 (ms)': percentil(valores, 50),
+             'p95 (ms)': percentil(valores, 95), 'máx (ms)': valores[-1]}
+            for nombre, valores in copia.items()
+        ]
+
+
+def escribir_registro(registro, ruta=None, max_bytes=MAX_BYTES_REGISTRO):
+    """
+    Anexa el registro como una línea JSON, rotando el archivo si ya pasa
+    de `max_bytes`. Devuelve False si no hay ruta o no se pudo escribir:
+    medir nunca debe romper la app.
+    """
+    ruta = ruta_registro_defecto() if ruta is None else Path(ruta)
+    if ruta is None:
+        return False
+    linea = json.dumps(registro, ensure_ascii=False) + "\n"
+    try:
+        with _LOCK_ARCHIVO:
+            ruta.parent.mkdir(parents=True, exist_ok=True)
+            if ruta.exists() and ruta.stat().st_size >= max_bytes:
+                os.replace(ruta, ruta.with_name(ruta.name + ".1"))
+            with open(ruta, "a", encoding="utf-8") as archivo:
+                archivo.write(linea)
+    except OSError:
+        return False
+    return True
+
+
+# Compartido por todas las sesiones del proceso
+LATENCIAS_PROCESO = AgregadorLatencias(MAX_MUESTRAS_PROCESO)
@@ -0,0 +1,132 @@
+# ==========================================
+# 📂 DIAGNÓSTICO MASIVO DE PORTAFOLIO (MODO B POR LOTES)
+# ==========================================
+"""
+Ejecuta el diagnóstico del Modo B para una carpeta completa de clientes.
+
+Cada archivo debe tener el formato de plantilla_sg_consulting.csv. Los
+archivos se reparten en un pool de procesos y el resultado se consolida
+en una sola tabla (una fila por cliente) con tiempos y errores por archivo.
+Como en la app, los KPIs salen del promedio de los últimos `meses` meses
+(VENTANA_DEFECTO, 12); con --meses 0 se promedia todo el histórico.
+
+Uso:
+    python -m motor.lote_diagnostico carpeta_clientes/ --salida resultados.csv
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict
+from pathlib import Path
+
+import pandas as pd
+
+from motor.financiero import EntradasFinancieras, calcular_diagnostico
+from motor.historico import VENTANA_DEFECTO, leer_historico, promedios_mensuales
+
+# Balance General por defecto (mismos valores iniciales que la barra lateral)
+BALANCE_DEFECTO = {
+    'caja': 5000.0,
+    'cuentas_cobrar': 15000.0,
+    'inventario': 20000.0,
+    'cuentas_pagar': 10000.0,
+    'deuda_bancaria': 15000.0,
+    'multiplo_global': 3.0,
+}
+
+
+def diagnosticar_archivo(ruta, balance=None, meses=VENTANA_DEFECTO):
+    """
+    Lee el archivo de un cliente (CSV, Parquet o Arrow) y devuelve una fila
+    con sus KPIs y veredicto sobre los últimos `meses` meses (todos si es
+    0 o None).
+    Nunca lanza excepción: los errores quedan registrados en la fila.
+    """
+    inicio = time.perf_counter()
+    fila = {'archivo': Path(ruta).name, 'estado': 'OK', 'error': ''}
+    try:
+        df_historico = leer_historico(Path(ruta).read_bytes())
+        ventana = df_historico.tail(meses) if meses else df_historico
+        entradas = EntradasFinancieras(**promedios_mensuales(ventana), **(balance or BALANCE_DEFECTO))
+        kpis = asdict(calcular_diagnostico(entradas))
+        kpis['acciones_choque'] = " | ".join(kpis['acciones_choque'])
+        fila['meses'] = len(df_historico)
+        fila['meses_ventana'] = len(ventana)
+        fila.update(asdict(entradas))
+        fila.update(kpis)
+    except Exception as e:
+        fila['estado'] = 'ERROR'
+        fila['error'] = f"{type(e).__name__}: {e}"
+    fila['segundos'] = time.perf_counter() - inicio
+    return fila
+
+
+def _diagnosticar_bloque(rutas, balance, meses):
+    return [diagnosticar_archivo(r, balance, meses) for r in rutas]
+
+
+def diagnosticar_carpeta(carpeta, patron="*.csv", procesos=None, balance=None, tam_bloque=None, meses=VENTANA_DEFECTO):
+    """
+    Diagnostica todos los archivos de la carpeta en paralelo y devuelve un
+    DataFrame consolidado (una fila por archivo, ordenado por nombre).
+    """
+    rutas = sorted(str(p) for p in Path(carpeta).glob(patron))
+    if not rutas:
+        return pd.DataFrame()
+
+    procesos = procesos or os.cpu_count() or 1
+    # Bloques grandes reducen el costo de comunicación entre procesos
+    tam_bloque = tam_bloque or max(1, len(rutas) // (procesos * 4))
+    bloques = [rutas[i:i + tam_bloque] for i in range(0, len(rutas), tam_bloque)]
+
+    filas = []
+    if procesos == 1:
+        for bloque in bloques:
+            filas.extend(_diagnosticar_bloque(bloque, balance, meses))
+    else:
+        with ProcessPoolExecutor(max_workers=procesos) as pool:
+            for resultado in pool.map(_diagnosticar_bloque, bloques, [balance] * len(bloques), [meses] * len(bloques)):
+                filas.extend(resultado)
+    return pd.DataFrame(filas)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Diagnóstico Modo B por lotes para una carpeta de clientes.")
+    parser.add_argument("carpeta", help="Carpeta con archivos en formato plantilla_sg_consulting.csv")
+    parser.add_argument("--salida", default="resultados_portafolio.csv", help="Tabla consolidada (.csv o .parquet)")
+    parser.add_argument("--patron", default="*.csv", help="Patrón de archivos a procesar")
+    parser.add_argument("--procesos", type=int, default=None, help="Procesos en paralelo (por defecto: núcleos)")
+    parser.add_argument("--meses", type=int, default=VENTANA_DEFECTO, help="Últimos meses que se promedian (0: todo el histórico)")
+    for campo, valor in BALANCE_DEFECTO.items():
+        parser.add_argument(f"--{campo.replace('_', '-')}", dest=campo, type=float, default=valor)
+    args = parser.parse_args(argv)
+
+    balance = {campo: getattr(args, campo) for campo in BALANCE_DEFECTO}
+
+    inicio = time.perf_counter()
+    resultados = diagnosticar_carpeta(args.carpeta, args.patron, args.procesos, balance, meses=args.meses)
+    total = time.perf_counter() - inicio
+
+    if resultados.empty:
+        print(f"No se encontraron archivos '{args.patron}' en {args.carpeta}", file=sys.stderr)
+        return 1
+
+    if args.salida.endswith(".parquet"):
+        resultados.to_parquet(args.salida, index=False)
+    else:
+        resultados.to_csv(args.salida, index=False)
+
+    errores = resultados[resultados['estado'] == 'ERROR']
+    for _, fila in errores.iterrows():
+        print(f"❌ {fila['archivo']}: {fila['error']}", file=sys.stderr)
+
+    cpu = resultados['segundos'].sum()
+    print(f"✅ {len(resultados) - len(errores)}/{len(resultados)} clientes diagnosticados en {total:.2f}s "
+          f"(CPU {cpu:.2f}s, p95 por archivo {resultados['segundos'].quantile(0.95) * 1000:.1f} ms) -> {args.salida}")
+    return 0 if errores.empty else 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
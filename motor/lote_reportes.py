@@ -0,0 +1,196 @@
+# ==========================================
+# 🖨️ INFORMES PDF POR LOTES (CIERRE DE MES)
+# ==========================================
+"""
+Genera el INFORME DE SALUD FINANCIERA de todos los clientes de una vez.
+
+Los clientes salen del almacén de históricos (con el Balance General que
+se guardó con cada uno) o de una carpeta de archivos en formato
+plantilla_sg_consulting.csv (con el balance por defecto o el indicado).
+Cada informe es el mismo que genera la app (motor.reporte), promediando
+los últimos `meses` meses del cliente.
+
+Los clientes se reparten en bloques a un pool de procesos. Cada proceso
+escribe sus PDF directo a la carpeta de salida y devuelve solo una fila
+de índice, así la memoria no crece con el tamaño del portafolio; además
+cada proceso se recicla tras `max_bloques_por_proceso` bloques. Al final
+se escribe indice.csv con estado, veredicto, tamaño y segundos por informe.
+
+Uso:
+    python -m motor.lote_reportes --salida informes/
+    python -m motor.lote_reportes --carpeta carpeta_clientes/ --salida informes/
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+from motor.almacen import AlmacenHistoricos, slug_cliente
+from motor.financiero import EntradasFinancieras, calcular_diagnostico
+from motor.historico import leer_historico, promedios_mensuales
+from motor.lote_diagnostico import BALANCE_DEFECTO
+from motor.planillas import detalle_por_rol, resumen_reporte
+from motor.portafolio import VENTANA_PORTAFOLIO
+from motor.reporte import DatosReporte, generar_reporte_pdf
+
+try:
+    import resource
+except ImportError:  # Windows: sin medición de memoria pico
+    resource = None
+
+NOMBRE_INDICE = "indice.csv"
+
+# Bloques que atiende cada proceso antes de reciclarse (acota la memoria)
+MAX_BLOQUES_POR_PROCESO = 50
+
+
+def _memoria_pico_mb():
+    if resource is None:
+        return float('nan')
+    # ru_maxrss está en KB en Linux y en bytes en macOS
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return pico / (1024 * 1024) if sys.platform == "darwin" else pico / 1024
+
+
+def periodo_analizado(df_ventana):
+    """Misma línea de período que el informe de la app en Modo B."""
+    if 'Mes' not in df_ventana.columns:
+        return f"Período analizado: últimos {len(df_ventana)} meses (promedios mensuales)."
+    return (f"Período analizado: {df_ventana['Mes'].iloc[0]} a {df_ventana['Mes'].iloc[-1]} "
+            f"({len(df_ventana)} meses, promedios mensuales).")
+
+
+def renderizar_cliente(tarea, salida, meses, balance, fecha):
+    """
+    Escribe el PDF de un cliente en `salida` y devuelve su fila de índice.
+    `tarea` es ('almacen', directorio, cliente) o ('archivo', ruta, cliente).
+    Nunca lanza excepción: los errores quedan registrados en la fila.
+    """
+    inicio = time.perf_counter()
+    origen, referencia, cliente = tarea
+    fila = {'cliente': cliente, 'archivo_pdf': '', 'estado': 'OK', 'error': ''}
+    try:
+        if origen == 'almacen':
+            almacen = AlmacenHistoricos(referencia)
+            df_historico = almacen.cargar(cliente)
+            balance_cliente = {**balance, **almacen.balance(cliente)}
+            planilla = almacen.cargar_planilla(cliente)
+        else:
+            df_historico = leer_historico(Path(referencia).read_bytes())
+            balance_cliente = balance
+            planilla = None
+        if df_historico.empty:
+            raise ValueError("Histórico sin meses")
+        ventana = df_historico.tail(meses)
+        entradas = EntradasFinancieras(**promedios_mensuales(ventana), **balance_cliente)
+        nomina = resumen_reporte(detalle_por_rol(planilla)) if planilla is not None else ()
+        datos = DatosReporte(entradas, periodo=periodo_analizado(ventana), fecha=fecha, nomina=nomina)
+
+        ruta_pdf = Path(salida) / f"{slug_cliente(cliente)}.pdf"
+        contenido = generar_reporte_pdf(datos)
+        ruta_pdf.write_bytes(contenido)
+
+        kpis = calcular_diagnostico(entradas)
+        fila.update({
+            'archivo_pdf': ruta_pdf.name, 'meses': len(ventana), 'veredicto': kpis.veredicto_final,
+            'ebitda_mes': kpis.ebitda_mes, 'bytes': len(contenido),
+        })
+    except Exception as e:
+        fila['estado'] = 'ERROR'
+        fila['error'] = f"{type(e).__name__}: {e}"
+    fila['segundos'] = time.perf_counter() - inicio
+    fila['memoria_pico_mb'] = _memoria_pico_mb()
+    return fila
+
+
+def _renderizar_bloque(tareas, salida, meses, balance, fecha):
+    return [renderizar_cliente(t, salida, meses, balance, fecha) for t in tareas]
+
+
+def tareas_almacen(almacen):
+    return [('almacen', str(almacen.directorio), cliente) for cliente in almacen.clientes()]
+
+
+def tareas_carpeta(carpeta, patron="*.csv"):
+    return [('archivo', str(p), p.stem) for p in sorted(Path(carpeta).glob(patron))]
+
+
+def renderizar_lote(tareas, salida, meses=VENTANA_PORTAFOLIO, procesos=None, balance=None, fecha=None,
+                    tam_bloque=None, max_bloques_por_proceso=MAX_BLOQUES_POR_PROCESO):
+    """
+    Genera un PDF por tarea en la carpeta `salida`, escribe el índice
+    (indice.csv) y lo devuelve como DataFrame (una fila por cliente, en el
+    orden de `tareas`).
+    """
+    salida = Path(salida)
+    salida.mkdir(parents=True, exist_ok=True)
+    balance = {**BALANCE_DEFECTO, **(balance or {})}
+    fecha = fecha or datetime.now().strftime("%d/%m/%Y")
+    if not tareas:
+        return pd.DataFrame()
+
+    procesos = procesos or os.cpu_count() or 1
+    tam_bloque = tam_bloque or max(1, min(25, len(tareas) // (procesos * 4)))
+    bloques = [tareas[i:i + tam_bloque] for i in range(0, len(tareas), tam_bloque)]
+    argumentos = (salida, meses, balance, fecha)
+
+    filas = []
+    if procesos == 1:
+        for bloque in bloques:
+            filas.extend(_renderizar_bloque(bloque, *argumentos))
+    else:
+        with ProcessPoolExecutor(max_workers=procesos, max_tasks_per_child=max_bloques_por_proceso) as pool:
+            n = len(bloques)
+            for resultado in pool.map(_renderizar_bloque, bloques, *([a] * n for a in argumentos)):
+                filas.extend(resultado)
+
+    indice = pd.DataFrame(filas)
+    indice.to_csv(salida / NOMBRE_INDICE, index=False)
+    return indice
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Informe PDF de salud financiera para todos los clientes.")
+    parser.add_argument("--salida", default="informes", help="Carpeta donde se escriben los PDF y el índice")
+    parser.add_argument("--almacen", default=None, help="Directorio del almacén (por defecto: SG_CONSULTING_ALMACEN)")
+    parser.add_argument("--carpeta", default=None, help="Usar archivos en formato plantilla en lugar del almacén")
+    parser.add_argument("--patron", default="*.csv", help="Patrón de archivos en --carpeta")
+    parser.add_argument("--meses", type=int, default=VENTANA_PORTAFOLIO, help="Últimos meses que se promedian")
+    parser.add_argument("--procesos", type=int, default=None, help="Procesos en paralelo (por defecto: núcleos)")
+    parser.add_argument("--fecha", default=None, help="Fecha del pie de página (por defecto: hoy)")
+    for campo, valor in BALANCE_DEFECTO.items():
+        parser.add_argument(f"--{campo.replace('_', '-')}", dest=campo, type=float, default=valor)
+    args = parser.parse_args(argv)
+
+    balance = {campo: getattr(args, campo) for campo in BALANCE_DEFECTO}
+    if args.carpeta:
+        tareas, origen = tareas_carpeta(args.carpeta, args.patron), args.carpeta
+    else:
+        almacen = AlmacenHistoricos(args.almacen)
+        tareas, origen = tareas_almacen(almacen), str(almacen.directorio)
+
+    inicio = time.perf_counter()
+    indice = renderizar_lote(tareas, args.salida, args.meses, args.procesos, balance, args.fecha)
+    total = time.perf_counter() - inicio
+
+    if indice.empty:
+        print(f"No se encontraron clientes en {origen}", file=sys.stderr)
+        return 1
+
+    errores = indice[indice['estado'] == 'ERROR']
+    for _, fila in errores.iterrows():
+        print(f"❌ {fila['cliente']}: {fila['error']}", file=sys.stderr)
+
+    print(f"✅ {len(indice) - len(errores)}/{len(indice)} informes en {total:.2f}s "
+          f"(p50 {indice['segundos'].median() * 1000:.1f} ms, p95 {indice['segundos'].quantile(0.95) * 1000:.1f} ms por informe, "
+          f"memoria pico por proceso {indice['memoria_pico_mb'].max():.0f} MB) -> {Path(args.salida) / NOMBRE_INDICE}")
+    return 0 if errores.empty else 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,346 @@
+# ==========================================
+# 🇵🇦 MOTOR DE CÁLCULO NÓMINA PANAMÁ
+# ==========================================
+"""
+Costo empresa, neto del empleado y retenciones según la ley panameña.
+
+Las tasas (CSS, Seguro Educativo, Riesgos Profesionales, retención a
+freelance) y los tramos anuales del ISR viven en REGLAS_FISCALES, una
+fila por año fiscal: actualizar la ley es agregar un año, no tocar las
+fórmulas. Cada año se compila una vez por proceso (tabla_fiscal).
+
+ISR: el salario mensual se anualiza por 13 (12 salarios + XIII mes),
+se busca el tramo en la tabla anual y el impuesto se reparte de nuevo
+entre 13. La búsqueda del tramo es un searchsorted sobre la planilla
+completa, y funciona igual con un arreglo meses x empleados
+(proyectar_nomina).
+"""
+import math
+from bisect import bisect_right
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+TIPO_PLANILLA = "Planilla (Carga Patronal)"
+TIPO_FREELANCE = "Servicios Profesionales (Freelance)"
+TIPOS_CONTRATO = [TIPO_PLANILLA, TIPO_FREELANCE]
+
+ANIO_FISCAL_DEFECTO = 2026
+
+# Cambios incrementales tras los que los totales se vuelven a sumar completos
+RESUMAR_CADA = 500
+
+
+@dataclass(frozen=True)
+class ReglasFiscales:
+    anio: int
+    # Tramos anuales del ISR: (desde, tasa marginal), ordenados
+    tramos_isr: tuple
+    # Pagos del año sobre los que se anualiza el salario mensual
+    pagos_anuales: int = 13
+    ss_patronal: float = 0.1225
+    se_patronal: float = 0.0150
+    rp_patronal: float = 0.0150  # Riesgos Profesionales (Promedio)
+    ss_empleado: float = 0.0975
+    se_empleado: float = 0.0125
+    retencion_freelance: float = 0.10
+
+
+# Tabla DGI anual: exento hasta 11,000; 15% hasta 50,000; 25% sobre el excedente
+TRAMOS_ISR_DGI = ((0.0, 0.0), (11000.0, 0.15), (50000.0, 0.25))
+
+REGLAS_FISCALES = {
+    2025: ReglasFiscales(2025, TRAMOS_ISR_DGI),
+    2026: ReglasFiscales(2026, TRAMOS_ISR_DGI),
+}
+
+
+@dataclass(frozen=True)
+class TablaFiscal:
+    """
+    Reglas de un año listas para buscar: límite inferior, tasa y cuota
+    fija acumulada de cada tramo, como arreglos (planilla completa) y como
+    tuplas (un salario suelto, sin costo de NumPy por fila).
+    """
+    reglas: ReglasFiscales
+    desde: np.ndarray
+    tasas: np.ndarray
+    cuotas: np.ndarray
+    desde_escalar: tuple
+    tasas_escalar: tuple
+    cuotas_escalar: tuple
+
+    def isr_mensual(self, salario):
+        """ISR mensual de un salario suelto (misma aritmética que isr_mensual_arreglo)."""
+        anual = salario * self.reglas.pagos_anuales
+        i = bisect_right(self.desde_escalar, anual) - 1
+        return (self.cuotas_escalar[i] + (anual - self.desde_escalar[i]) * self.tasas_escalar[i]) / self.reglas.pagos_anuales
+
+    def isr_mensual_arreglo(self, salario):
+        """ISR mensual de un arreglo de salarios de cualquier forma (ej. meses x empleados)."""
+        anual = salario * self.reglas.pagos_anuales
+        i = np.searchsorted(self.desde, anual, side='right') - 1
+        return (self.cuotas[i] + (anual - self.desde[i]) * self.tasas[i]) / self.reglas.pagos_anuales
+
+
+# Tablas ya compiladas, por año pedido (pocas y pequeñas: sin límite)
+_TABLAS_COMPILADAS = {}
+
+
+def _compilar_tabla(anio):
+    vigentes = [a for a in REGLAS_FISCALES if a <= anio]
+    if not vigentes:
+        raise ValueError(f"No hay reglas fiscales para {anio} (disponibles: {sorted(REGLAS_FISCALES)})")
+    reglas = REGLAS_FISCALES[max(vigentes)]
+    desde = np.array([d for d, _ in reglas.tramos_isr], dtype=float)
+    tasas = np.array([t for _, t in reglas.tramos_isr], dtype=float)
+    cuotas = np.concatenate([[0.0], np.cumsum(np.diff(desde) * tasas[:-1])])
+    return TablaFiscal(reglas, desde, tasas, cuotas, tuple(desde.tolist()), tuple(tasas.tolist()), tuple(cuotas.tolist()))
+
+
+def tabla_fiscal(anio=None):
+    """
+    Tabla compilada del año fiscal (por defecto ANIO_FISCAL_DEFECTO). Un
+    año sin fila usa la más reciente anterior a él.
+    """
+    anio = ANIO_FISCAL_DEFECTO if anio is None else int(anio)
+    tabla = _TABLAS_COMPILADAS.get(anio)
+    if tabla is None:
+        tabla = _TABLAS_COMPILADAS.setdefault(anio, _compilar_tabla(anio))
+    return tabla
+
+
+def calcular_carga_panama(salario, tipo, anio=None):
+    """
+    Calcula el Costo Real para la empresa y el Neto para el empleado
+    basado en las leyes laborales de Panamá del año fiscal `anio`.
+    """
+    if salario <= 0: return 0, 0, 0
+    tabla = tabla_fiscal(anio)
+    r = tabla.reglas
+    
+    if tipo == TIPO_PLANILLA:
+        # 1. Costos Patronales (Lo que paga la empresa ADICIONAL)
+        ss_patronal = salario * r.ss_patronal
+        se_patronal = salario * r.se_patronal
+        rp_patronal = salario * r.rp_patronal
+        decimo_prov = salario / 12     # Provisión XIII Mes (8.33%)
+        
+        carga_patronal = ss_patronal + se_patronal + rp_patronal + decimo_prov
+        costo_real_empresa = salario + carga_patronal
+        
+        # 2. Retenciones al Empleado (Lo que se descuenta)
+        ss_empleado = salario * r.ss_empleado
+        se_empleado = salario * r.se_empleado
+        
+        # ISR (Tabla DGI anual, salario anualizado con XIII Mes)
+        isr_empleado = tabla.isr_mensual(salario)
+            
+        retenciones = ss_empleado + se_empleado + isr_empleado
+        salario_neto = salario - retenciones
+        
+        return costo_real_empresa, salario_neto, retenciones
+
+    elif tipo == TIPO_FREELANCE:
+        # Empresa paga el bruto, pero retiene ISR si aplica o asume gasto
+        costo_real_empresa = salario 
+        
+        # Retención 10% (Si no presenta paz y salvo, práctica común retener)
+        retencion_10 = salario * r.retencion_freelance
+        salario_neto = salario - retencion_10
+        
+        return costo_real_empresa, salario_neto, retencion_10
+    
+    return salario, salario, 0
+
+
+class ResultadoNomina:
+    """
+    Resultado columnar de la nómina: un valor por empleado en cada arreglo
+    (costo empresa, neto y retenciones) más los totales del equipo. En una
+    proyección los arreglos son meses x empleados y los totales suman todo.
+    """
+
+    def __init__(self, costo_empresa, neto_empleado, retenciones):
+        self.costo_empresa = costo_empresa
+        self.neto_empleado = neto_empleado
+        self.retenciones = retenciones
+
+    @property
+    def costo_total(self):
+        return float(self.costo_empresa.sum())
+
+    @property
+    def neto_total(self):
+        return float(self.neto_empleado.sum())
+
+    @property
+    def retenciones_total(self):
+        return float(self.retenciones.sum())
+
+
+def _calcular_arreglos(salario, tipo, tabla):
+    """Costo, neto y retenciones para arreglos de salario y tipo de la misma forma (o difundibles)."""
+    r = tabla.reglas
+    es_planilla = (tipo == TIPO_PLANILLA) & ~(salario <= 0)
+    es_freelance = (tipo == TIPO_FREELANCE) & ~(salario <= 0)
+    sin_pago = salario <= 0
+
+    # 1. Planilla: Costos Patronales + Retenciones (misma fórmula que la escalar)
+    carga_patronal = salario * r.ss_patronal + salario * r.se_patronal + salario * r.rp_patronal + salario / 12
+    costo_planilla = salario + carga_patronal
+    isr_empleado = tabla.isr_mensual_arreglo(salario)
+    ret_planilla = salario * r.ss_empleado + salario * r.se_empleado + isr_empleado
+    neto_planilla = salario - ret_planilla
+
+    # 2. Freelance: Retención 10%
+    ret_freelance = salario * r.retencion_freelance
+    neto_freelance = salario - ret_freelance
+
+    # 3. Selección por tipo (Tipo desconocido: bruto = neto, sin retención)
+    costo = np.select([sin_pago, es_planilla, es_freelance], [0.0, costo_planilla, salario], default=salario)
+    neto = np.select([sin_pago, es_planilla, es_freelance], [0.0, neto_planilla, neto_freelance], default=salario)
+    retenciones = np.select([sin_pago, es_planilla, es_freelance], [0.0, ret_planilla, ret_freelance], default=0.0)
+
+    return ResultadoNomina(costo, neto, retenciones)
+
+
+def calcular_nomina_vectorizada(salarios, tipos, anio=None):
+    """
+    Versión columnar de calcular_carga_panama: recibe la planilla completa
+    como arreglos y calcula todas las filas en una sola pasada.
+
+    Replica el mismo orden de operaciones que la versión escalar para que
+    cada fila dé exactamente el mismo número.
+    """
+    salario = pd.to_numeric(pd.Series(salarios), errors="coerce").to_numpy(dtype=float)
+    tipo = np.asarray(tipos, dtype=object)
+    return _calcular_arreglos(salario, tipo, tabla_fiscal(anio))
+
+
+def proyectar_nomina(salarios, tipos, meses=12, anio=None):
+    """
+    Proyección mes a mes de la planilla: costo empresa, neto y retenciones
+    como arreglos meses x empleados, en una sola operación.
+
+    `salarios` es un salario por empleado (igual todos los meses) o una
+    matriz meses x empleados (ej. con aumentos programados); `meses` solo
+    aplica en el primer caso.
+    """
+    salario = np.asarray(salarios, dtype=float)
+    if salario.ndim == 1:
+        salario = np.broadcast_to(salario, (meses, salario.size))
+    tipo = np.asarray(tipos, dtype=object)[np.newaxis, :]
+    return _calcular_arreglos(salario, tipo, tabla_fiscal(anio))
+
+
+def detalle_nomina(df_nomina):
+    """
+    Calcula la planilla completa del editor (columnas Nombre, Tipo y
+    Salario Pactado) y devuelve el desglose por rol junto al resultado.
+    """
+    resultado = calcular_nomina_vectorizada(df_nomina['Salario Pactado'], df_nomina['Tipo'])
+    return _detalle(df_nomina['Nombre'], resultado), resultado
+
+
+def _detalle(nombres, resultado):
+    return pd.DataFrame({
+        "Rol": np.asarray(nombres),
+        "Costo Empresa": resultado.costo_empresa,
+        "Bolsillo Empleado": resultado.neto_empleado,
+        "Retenciones Estado": resultado.retenciones
+    })
+
+
+class NominaIncremental:
+    """
+    Planilla del editor con sus resultados por fila y totales acumulados.
+
+    `aplicar_cambios` recibe el estado de un st.data_editor (mismo formato
+    que editor.aplicar_cambios_editor) y recalcula solo las filas
+    editadas o agregadas; los totales se ajustan con la diferencia en vez
+    de volver a sumar la planilla. Cada RESUMAR_CADA cambios (o si un
+    total quedó en NaN por una fila incompleta) se suman de nuevo completos.
+    """
+
+    def __init__(self, df_nomina, anio=None):
+        self.anio = anio
+        self.df = df_nomina.reset_index(drop=True)
+        resultado = calcular_nomina_vectorizada(self.df['Salario Pactado'], self.df['Tipo'], anio)
+        self.costo_empresa = resultado.costo_empresa
+        self.neto_empleado = resultado.neto_empleado
+        self.retenciones = resultado.retenciones
+        self._detalle = None
+        self._resumar()
+
+    def __len__(self):
+        return len(self.df)
+
+    def _resumar(self):
+        self.costo_total = float(self.costo_empresa.sum())
+        self.neto_total = float(self.neto_empleado.sum())
+        self.retenciones_total = float(self.retenciones.sum())
+        self._cambios_sin_resumar = 0
+
+    def _sumar(self, costo, neto, retenciones, signo=1):
+        self.costo_total += signo * float(costo.sum())
+        self.neto_total += signo * float(neto.sum())
+        self.retenciones_total += signo * float(retenciones.sum())
+        self._cambios_sin_resumar += len(costo)
+
+    def _calcular(self, df):
+        return calcular_nomina_vectorizada(df['Salario Pactado'], df['Tipo'], self.anio)
+
+    @property
+    def resultado(self):
+        return ResultadoNomina(self.costo_empresa, self.neto_empleado, self.retenciones)
+
+    def detalle(self):
+        """Desglose por rol (como detalle_nomina), reconstruido solo tras un cambio."""
+        if self._detalle is None:
+            self._detalle = _detalle(self.df['Nombre'], self.resultado)
+        return self._detalle
+
+    def aplicar_cambios(self, cambios, desplazamiento=0):
+        """
+        Aplica los cambios de un editor que muestra la planilla desde la
+        fila `desplazamiento` (paginación). Las filas agregadas van al final.
+        """
+        df = self.df.copy()
+        editadas = sorted(int(fila) + desplazamiento for fila in cambios.get("edited_rows", {}))
+        for fila, valores in cambios.get("edited_rows", {}).items():
+            for columna, valor in valores.items():
+                df.iloc[int(fila) + desplazamiento, df.columns.get_loc(columna)] = valor
+        if editadas:
+            nuevo = self._calcular(df.iloc[editadas])
+            self._sumar(self.costo_empresa[editadas], self.neto_empleado[editadas], self.retenciones[editadas], -1)
+            self._sumar(nuevo.costo_empresa, nuevo.neto_empleado, nuevo.retenciones)
+            self.costo_empresa[editadas] = nuevo.costo_empresa
+            self.neto_empleado[editadas] = nuevo.neto_empleado
+            self.retenciones[editadas] = nuevo.retenciones
+
+        borradas = [int(fila) + desplazamiento for fila in cambios.get("deleted_rows", [])]
+        if borradas:
+            self._sumar(self.costo_empresa[borradas], self.neto_empleado[borradas], self.retenciones[borradas], -1)
+            df = df.drop(df.index[borradas])
+            self.costo_empresa = np.delete(self.costo_empresa, borradas)
+            self.neto_empleado = np.delete(self.neto_empleado, borradas)
+            self.retenciones = np.delete(self.retenciones, borradas)
+
+        agregadas = [f for f in cambios.get("added_rows", []) if f]
+        if agregadas:
+            df_nuevas = pd.DataFrame(agregadas, columns=df.columns)
+            nuevo = self._calcular(df_nuevas)
+            self._sumar(nuevo.costo_empresa, nuevo.neto_empleado, nuevo.retenciones)
+            df = pd.concat([df, df_nuevas], ignore_index=True)
+            self.costo_empresa = np.concatenate([self.costo_empresa, nuevo.costo_empresa])
+            self.neto_empleado = np.concatenate([self.neto_empleado, nuevo.neto_empleado])
+            self.retenciones = np.concatenate([self.retenciones, nuevo.retenciones])
+
+        self.df = df.reset_index(drop=True)
+        self._detalle = None
+        totales = (self.costo_total, self.neto_total, self.retenciones_total)
+        if self._cambios_sin_resumar >= RESUMAR_CADA or not all(math.isfinite(t) for t in totales):
+            self._resumar()
+        return self.df
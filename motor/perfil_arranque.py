@@ -0,0 +1,107 @@
+# ==========================================
+# ⏱️ PERFIL DE ARRANQUE DE LA APP
+# ==========================================
+"""
+Mide cuánto tarda la app en arrancar en frío y qué módulos pesados carga.
+
+Cada medición corre en un proceso nuevo (sin nada importado), así los
+tiempos son los de un servidor recién iniciado:
+
+- importación: costo de importar cada módulo pesado por separado.
+- primer render: primera ejecución completa del script con AppTest (lo
+  que ve el primer usuario tras reiniciar el servidor), y un rerun
+  posterior ya en caliente.
+- módulos cargados tras el primer render: los que no aparecen se cargan
+  recién cuando se usan (ej. fpdf al generar el primer PDF).
+
+Uso:
+    python -m motor.perfil_arranque
+    python -m motor.perfil_arranque --app SG_Consulting_App.py --repeticiones 5
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+APP_DEFECTO = Path(__file__).resolve().parent.parent / "SG_Consulting_App.py"
+
+MODULOS_PESADOS = ("streamlit", "pandas", "numpy", "pyarrow", "plotly.graph_objects", "fpdf")
+
+_MEDIR_IMPORTACION = """
+import importlib, json, sys, time
+inicio = time.perf_counter()
+importlib.import_module(sys.argv[1])
+print(json.dumps({'ms': (time.perf_counter() - inicio) * 1000}))
+"""
+
+_MEDIR_RENDER = """
+import json, sys, time
+inicio = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+importar_ms = (time.perf_counter() - inicio) * 1000
+at = AppTest.from_file(sys.argv[1], default_timeout=120)
+inicio = time.perf_counter()
+at.run()
+primer_ms = (time.perf_counter() - inicio) * 1000
+cargados = [m for m in json.loads(sys.argv[2]) if m in sys.modules]
+inicio = time.perf_counter()
+at.run()
+rerun_ms = (time.perf_counter() - inicio) * 1000
+print(json.dumps({'streamlit_ms': importar_ms, 'primer_render_ms': primer_ms, 'rerun_ms': rerun_ms,
+                  'errores': len(at.exception), 'cargados': cargados}))
+"""
+
+
+def _en_proceso_nuevo(codigo, *argumentos):
+    salida = subprocess.run([sys.executable, "-c", codigo, *argumentos], capture_output=True, text=True, check=True)
+    return json.loads(salida.stdout.strip().splitlines()[-1])
+
+
+def medir_importaciones(modulos=MODULOS_PESADOS, repeticiones=3):
+    """{módulo: ms} (mediana) de importar cada módulo en un proceso nuevo."""
+    return {m: statistics.median(_en_proceso_nuevo(_MEDIR_IMPORTACION, m)['ms'] for _ in range(repeticiones))
+            for m in modulos}
+
+
+def medir_primer_render(app=APP_DEFECTO, repeticiones=3, modulos=MODULOS_PESADOS):
+    """
+    Medianas de: importar streamlit, primer render en frío y rerun en
+    caliente (ms), más los módulos pesados ya cargados tras el primer render.
+    """
+    corridas = [_en_proceso_nuevo(_MEDIR_RENDER, str(Path(app).resolve()), json.dumps(list(modulos)))
+                for _ in range(repeticiones)]
+    resumen = {clave: statistics.median(c[clave] for c in corridas)
+               for clave in ('streamlit_ms', 'primer_render_ms', 'rerun_ms')}
+    resumen['errores'] = max(c['errores'] for c in corridas)
+    resumen['cargados'] = corridas[-1]['cargados']
+    return resumen
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Perfil de arranque en frío de la app.")
+    parser.add_argument("--app", default=str(APP_DEFECTO), help="Script de Streamlit a medir")
+    parser.add_argument("--repeticiones", type=int, default=3, help="Procesos nuevos por medición (se reporta la mediana)")
+    args = parser.parse_args(argv)
+
+    print("Importación en frío (proceso nuevo, mediana):")
+    for modulo, ms in medir_importaciones(repeticiones=args.repeticiones).items():
+        print(f"  {modulo:<24} {ms:8.1f} ms")
+
+    render = medir_primer_render(args.app, args.repeticiones)
+    print(f"\nApp: {args.app}")
+    print(f"  importar streamlit       {render['streamlit_ms']:8.1f} ms")
+    print(f"  primer render (frío)     {render['primer_render_ms']:8.1f} ms")
+    print(f"  rerun (caliente)         {render['rerun_ms']:8.1f} ms")
+    diferidos = [m for m in MODULOS_PESADOS if m not in render['cargados']]
+    print(f"  cargados al primer render: {', '.join(render['cargados']) or '-'}")
+    print(f"  diferidos hasta su uso:    {', '.join(diferidos) or '-'}")
+    if render['errores']:
+        print(f"❌ El script terminó con {render['errores']} excepción(es)", file=sys.stderr)
+        return 2
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
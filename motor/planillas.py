@@ -0,0 +1,164 @@
+# ==========================================
+# 👥 PLANILLAS DEL PORTAFOLIO (IMPORTACIÓN MASIVA)
+# ==========================================
+"""
+Planillas de muchos clientes en un solo archivo (CSV o Parquet), con una
+fila por empleado y las columnas Cliente, Nombre, Tipo y Salario Pactado.
+Los empleados sin Nombre se agrupan como "Sin nombre"; los salarios que
+no se pudieron leer y los tipos de contrato desconocidos se reportan en
+`avisos`.
+
+Todos los empleados de todos los clientes se calculan en una sola pasada
+de calcular_nomina_vectorizada; los totales por cliente y por rol salen
+de groupby sobre esas columnas. La planilla calculada de cada cliente se
+guarda en el almacén (AlmacenHistoricos.guardar_planilla), de donde la
+leen el gráfico "Realidad de Nómina" del Semáforo y el informe PDF.
+"""
+import io
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from motor.cache import CacheLRU
+from motor.historico import MAGIA_PARQUET, huella_contenido
+from motor.nomina import TIPO_FREELANCE, TIPO_PLANILLA, TIPOS_CONTRATO, calcular_nomina_vectorizada
+
+COLUMNAS_IMPORTACION = ('Cliente', 'Nombre', 'Tipo', 'Salario Pactado')
+COLUMNAS_RESULTADO = ('Costo Empresa', 'Bolsillo Empleado', 'Retenciones Estado')
+
+# Tipos de contrato abreviados que se aceptan en el archivo
+ALIAS_TIPO = {
+    'planilla': TIPO_PLANILLA,
+    'freelance': TIPO_FREELANCE,
+    'servicios profesionales': TIPO_FREELANCE,
+}
+
+# Rol de los empleados que vienen sin Nombre
+SIN_NOMBRE = 'Sin nombre'
+
+# Ejemplos de tipos desconocidos que se citan en el aviso
+MAX_EJEMPLOS_AVISO = 3
+
+# Roles que lista el informe PDF (el resto se agrupa en "Otros")
+MAX_ROLES_REPORTE = 12
+
+_CACHE_PLANILLAS = CacheLRU(4)
+
+
+@dataclass(frozen=True)
+class PlanillasPortafolio:
+    """
+    Empleados con su costo calculado y los totales por cliente y por rol.
+    `avisos` describe las filas que se calcularon con datos dudosos.
+    """
+    empleados: pd.DataFrame
+    por_cliente: pd.DataFrame
+    por_rol: pd.DataFrame
+    avisos: tuple = ()
+
+    @property
+    def clientes(self):
+        return self.por_cliente['Cliente'].tolist()
+
+
+def leer_planillas(contenido):
+    """
+    DataFrame de empleados a partir de los bytes de un CSV o Parquet.
+    Normaliza Nombre (vacío -> SIN_NOMBRE), Tipo (acepta los alias de
+    ALIAS_TIPO) y Salario Pactado (lo que no es número queda NaN).
+    """
+    if contenido[:4] == MAGIA_PARQUET:
+        df = pd.read_parquet(io.BytesIO(contenido))
+    else:
+        df = pd.read_csv(io.BytesIO(contenido))
+    faltantes = [c for c in COLUMNAS_IMPORTACION if c not in df.columns]
+    if faltantes:
+        raise ValueError(f"Faltan columnas: {', '.join(faltantes)} (se esperan {', '.join(COLUMNAS_IMPORTACION)})")
+
+    df = df[list(COLUMNAS_IMPORTACION)].dropna(subset=['Cliente'])
+    df['Cliente'] = df['Cliente'].astype(str).str.strip()
+    df['Nombre'] = _nombres(df['Nombre'])
+    tipo = df['Tipo'].astype(str).str.strip()
+    df['Tipo'] = tipo.str.lower().map(ALIAS_TIPO).fillna(tipo)
+    df['Salario Pactado'] = pd.to_numeric(df['Salario Pactado'], errors="coerce")
+    return df.reset_index(drop=True)
+
+
+def _nombres(nombres):
+    nombres = nombres.fillna(SIN_NOMBRE).astype(str).str.strip()
+    return nombres.mask(nombres == '', SIN_NOMBRE)
+
+
+def _avisos(df_empleados):
+    avisos = []
+    sin_salario = int(df_empleados['Salario Pactado'].isna().sum())
+    if sin_salario:
+        avisos.append(f"{sin_salario:,} empleados con Salario Pactado vacío o no numérico (no suman al costo).")
+    desconocidos = df_empleados.loc[~df_empleados['Tipo'].isin(TIPOS_CONTRATO), 'Tipo']
+    if len(desconocidos):
+        ejemplos = ', '.join(f"'{t}'" for t in desconocidos.astype(str).unique()[:MAX_EJEMPLOS_AVISO])
+        avisos.append(f"{len(desconocidos):,} empleados con Tipo desconocido ({ejemplos}); se esperan "
+                      f"{', '.join(TIPOS_CONTRATO)}. Su costo es el salario sin cargas ni retenciones.")
+    return tuple(avisos)
+
+
+def _sumas(agrupado):
+    return agrupado.agg(
+        Empleados=('Salario Pactado', 'size'),
+        **{'Salario Bruto': ('Salario Pactado', 'sum')},
+        **{c: (c, 'sum') for c in COLUMNAS_RESULTADO},
+    ).reset_index()
+
+
+def calcular_planillas(df_empleados, anio=None):
+    """Costo, neto y retenciones de todos los empleados y sus totales por cliente y por rol."""
+    resultado = calcular_nomina_vectorizada(df_empleados['Salario Pactado'], df_empleados['Tipo'], anio)
+    empleados = df_empleados.assign(**dict(zip(
+        COLUMNAS_RESULTADO, (resultado.costo_empresa, resultado.neto_empleado, resultado.retenciones))))
+    por_cliente = _sumas(empleados.groupby('Cliente', sort=True))
+    por_rol = _sumas(empleados.groupby(['Cliente', 'Nombre'], sort=True, dropna=False)).rename(columns={'Nombre': 'Rol'})
+    return PlanillasPortafolio(empleados, por_cliente, por_rol, _avisos(df_empleados))
+
+
+def cargar_planillas(contenido):
+    """leer_planillas + calcular_planillas, una sola vez por contenido de archivo."""
+    return _CACHE_PLANILLAS.obtener_o_calcular(
+        huella_contenido(contenido), lambda: calcular_planillas(leer_planillas(contenido)))
+
+
+def guardar_planillas(almacen, planillas):
+    """Guarda en el almacén la planilla calculada de cada cliente. Devuelve cuántas guardó."""
+    for cliente, grupo in planillas.empleados.groupby('Cliente', sort=False):
+        almacen.guardar_planilla(cliente, grupo.drop(columns='Cliente'))
+    return len(planillas.por_cliente)
+
+
+def detalle_por_rol(df_planilla):
+    """
+    Desglose por rol de una planilla guardada, con las columnas de
+    detalle_nomina (Rol, Costo Empresa, ...), del rol más costoso al menos.
+    """
+    # Planillas guardadas antes de normalizar Nombre pueden traer vacíos
+    df_planilla = df_planilla.assign(Nombre=_nombres(df_planilla['Nombre']))
+    detalle = _sumas(df_planilla.groupby('Nombre', sort=False)).rename(columns={'Nombre': 'Rol'})
+    return detalle.sort_values('Costo Empresa', ascending=False, kind='stable').reset_index(drop=True)
+
+
+def resumen_reporte(detalle, max_roles=MAX_ROLES_REPORTE):
+    """
+    Filas (rol, empleados, costo empresa, bolsillo, retenciones) para el
+    informe PDF: los `max_roles` roles más costosos y el resto en "Otros".
+    `detalle` es un desglose por rol (detalle_nomina o detalle_por_rol).
+    """
+    if detalle is None or detalle.empty:
+        return ()
+    detalle = detalle.sort_values('Costo Empresa', ascending=False, kind='stable')
+    empleados = detalle['Empleados'].to_numpy() if 'Empleados' in detalle else np.ones(len(detalle), dtype=int)
+    columnas = [detalle[c].to_numpy(dtype=float) for c in COLUMNAS_RESULTADO]
+    filas = [(str(rol), int(n), *(float(v) for v in valores))
+             for rol, n, *valores in zip(detalle['Rol'].head(max_roles), empleados, *columnas)]
+    if len(detalle) > max_roles:
+        filas.append((f"Otros ({len(detalle) - max_roles} roles)", int(empleados[max_roles:].sum()),
+                      *(float(np.nansum(c[max_roles:])) for c in columnas)))
+    return tuple(filas)
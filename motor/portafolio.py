@@ -0,0 +1,124 @@
+# ==========================================
+# 🗂️ PORTAFOLIO DE CLIENTES (TAMIZAJE MASIVO)
+# ==========================================
+"""
+Reúne a todos los clientes del almacén en una sola tabla columnar y
+calcula sus KPIs de una vez con calcular_diagnostico_matriz.
+
+Cada archivo Arrow se abre con memoria mapeada y solo se toman los
+últimos `meses` meses de las columnas del motor; los promedios salen de
+un único groupby. La tabla resultante queda en caché mientras ningún
+archivo del almacén cambie (nombre, tamaño y fecha de modificación), así
+que filtrar y ordenar trabaja sobre un DataFrame ya calculado.
+"""
+import json
+import os
+from dataclasses import dataclass
+
+import pandas as pd
+import pyarrow as pa
+
+from motor.almacen import CLAVE_BALANCE, CLAVE_CLIENTE, EXTENSION
+from motor.cache import CacheLRU
+from motor.financiero import calcular_diagnostico_matriz
+from motor.historico import COLUMNAS_PLANTILLA, VENTANA_DEFECTO
+from motor.lote_diagnostico import BALANCE_DEFECTO
+from motor.reglas import MOTOR_REGLAS
+
+# Meses que se promedian por cliente (misma ventana por defecto que el Modo B)
+VENTANA_PORTAFOLIO = VENTANA_DEFECTO
+
+_CACHE_PORTAFOLIO = CacheLRU(4)
+
+
+@dataclass(frozen=True)
+class Portafolio:
+    """Tabla con una fila por cliente; `omitidos` lista (cliente, motivo)."""
+    tabla: pd.DataFrame
+    omitidos: list
+    meses: int
+
+
+def firma_almacen(directorio):
+    """(nombre, tamaño, mtime) de cada archivo: cambia si cualquier cliente cambia."""
+    if not os.path.isdir(directorio):
+        return ()
+    with os.scandir(directorio) as entradas:
+        return tuple(sorted(
+            (e.name, e.stat().st_size, e.stat().st_mtime_ns)
+            for e in entradas if e.name.endswith(EXTENSION)
+        ))
+
+
+def _construir_portafolio(directorio, meses, balance_defecto):
+    columnas = list(COLUMNAS_PLANTILLA)
+    tablas, filas, omitidos = [], [], []
+    nombres = sorted(n for n in os.listdir(directorio) if n.endswith(EXTENSION)) if os.path.isdir(directorio) else []
+    for nombre in nombres:
+        with pa.memory_map(os.path.join(directorio, nombre)) as fuente:
+            tabla = pa.ipc.open_file(fuente).read_all()
+        metadatos = tabla.schema.metadata or {}
+        cliente = metadatos.get(CLAVE_CLIENTE, nombre[:-len(EXTENSION)].encode("utf-8")).decode("utf-8")
+        faltantes = [c for c in columnas if c not in tabla.schema.names]
+        if faltantes or tabla.num_rows == 0:
+            omitidos.append((cliente, f"Faltan columnas: {', '.join(faltantes)}" if faltantes else "Sin meses"))
+            continue
+        # Últimos `meses` meses (slice sobre la memoria mapeada). Cada cliente
+        # pasa a float64 por su cuenta: un histórico guardado con enteros no
+        # debe imponer su tipo a los demás
+        ventana = tabla.select(columnas).slice(max(tabla.num_rows - meses, 0))
+        try:
+            ventana = pa.table({c: ventana.column(c).cast(pa.float64()) for c in columnas})
+        except (pa.ArrowInvalid, pa.ArrowNotImplementedError, pa.ArrowTypeError) as error:
+            omitidos.append((cliente, f"Columnas no numéricas: {error}"))
+            continue
+        tablas.append(ventana.append_column('id_cliente', pa.array([len(filas)] * ventana.num_rows, pa.int32())))
+        balance = {**balance_defecto, **json.loads(metadatos.get(CLAVE_BALANCE, b"{}"))}
+        ultimo_mes = tabla.column('Mes')[-1].as_py() if 'Mes' in tabla.schema.names else ""
+        filas.append({'cliente': cliente, 'meses_guardados': tabla.num_rows, 'hasta': str(ultimo_mes), **balance})
+
+    if not filas:
+        return Portafolio(pd.DataFrame(), omitidos, meses)
+
+    # Una sola tabla columnar para todos los clientes y un único groupby
+    todos = pa.concat_tables(tablas).to_pandas()
+    promedios = todos.groupby('id_cliente', sort=True)[columnas].mean().rename(columns=COLUMNAS_PLANTILLA)
+
+    info = pd.DataFrame(filas)
+    entradas = pd.concat([info.drop(columns=['cliente', 'meses_guardados', 'hasta']), promedios.reset_index(drop=True)], axis=1)
+    kpis = calcular_diagnostico_matriz(entradas)
+
+    tabla = pd.concat([info[['cliente', 'meses_guardados', 'hasta']], entradas, pd.DataFrame(kpis)], axis=1)
+    textos = pd.Series([v for v, _ in MOTOR_REGLAS.veredictos])
+    iconos = pd.Series([i for _, i in MOTOR_REGLAS.veredictos])
+    tabla.insert(1, 'icono', iconos.take(tabla['codigo_veredicto']).to_numpy())
+    tabla.insert(2, 'veredicto', textos.take(tabla['codigo_veredicto']).to_numpy())
+    return Portafolio(tabla, omitidos, meses)
+
+
+def cargar_portafolio(almacen, meses=VENTANA_PORTAFOLIO, balance_defecto=None):
+    """
+    Portafolio de todos los clientes del almacén. Se recalcula solo si
+    algún archivo cambió desde la última llamada.
+    """
+    balance_defecto = {**BALANCE_DEFECTO, **(balance_defecto or {})}
+    directorio = str(almacen.directorio)
+    clave = (directorio, meses, firma_almacen(directorio), tuple(sorted(balance_defecto.items())))
+    return _CACHE_PORTAFOLIO.obtener_o_calcular(clave, lambda: _construir_portafolio(directorio, meses, balance_defecto))
+
+
+def filtrar_portafolio(tabla, veredictos=None, texto="", con_acciones=False, orden='ebitda_mes', ascendente=True):
+    """
+    Filtra y ordena la tabla del portafolio con máscaras booleanas (sin
+    recorrer filas). `veredictos` es una lista de textos de veredicto.
+    """
+    if tabla.empty:
+        return tabla
+    mascara = pd.Series(True, index=tabla.index)
+    if veredictos:
+        mascara &= tabla['veredicto'].isin(veredictos)
+    if texto:
+        mascara &= tabla['cliente'].str.contains(texto, case=False, regex=False)
+    if con_acciones:
+        mascara &= tabla['n_acciones'] > 0
+    return tabla.loc[mascara].sort_values(orden, ascending=ascendente, kind='stable')
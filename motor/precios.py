@@ -0,0 +1,113 @@
+# ==========================================
+# 🧪 LAB DE PRECIOS (UNITARIO Y CATÁLOGO)
+# ==========================================
+"""
+Fórmulas del Lab de Precios: costo unitario (materiales + mano de obra +
+carga de fijos) y precio de venta (Precio = Costo / (1 - %Margen -
+%Comisión), más ITBMS).
+
+Las funciones escalares alimentan el cálculo de un producto en la
+pestaña; precios_catalogo aplica las mismas fórmulas, en el mismo orden,
+a un catálogo completo de una vez (una columna por entrada).
+
+Formato del catálogo (CSV o Parquet), una fila por producto:
+Producto, Costo Materiales, Minutos, Capacidad y, opcionales, Salario
+Base, Margen % y Comision % (si faltan se usan los valores de la
+pestaña).
+"""
+import io
+
+import numpy as np
+import pandas as pd
+
+from motor.cache import CacheLRU
+from motor.historico import MAGIA_PARQUET, huella_contenido
+
+# Minutos de trabajo al mes (192 horas)
+MINUTOS_MES = 11520
+TASA_ITBMS = 0.07
+
+COLUMNAS_CATALOGO = ('Producto', 'Costo Materiales', 'Minutos', 'Capacidad')
+COLUMNAS_OPCIONALES = ('Salario Base', 'Margen %', 'Comision %')
+COLUMNAS_PRECIO = ('Costo Mano Obra', 'Carga Fijos', 'Costo Unitario', 'Precio Sugerido', 'ITBMS', 'Precio Final', 'Ganancia Neta')
+
+_CACHE_CATALOGOS = CacheLRU(4)
+
+
+def costo_mano_obra(salario_base, minutos):
+    """Costo de la mano de obra directa de una unidad."""
+    costo_minuto = salario_base / MINUTOS_MES
+    return costo_minuto * minutos
+
+
+def carga_fijos_unitaria(gastos_operativos_mes, capacidad):
+    """OPEX mensual repartido entre la capacidad de producción (0 sin capacidad)."""
+    return gastos_operativos_mes / capacidad if capacidad > 0 else 0
+
+
+def precio_venta(costo_total_unitario, margen, comision):
+    """
+    (precio sugerido, ITBMS, precio final) para el margen y la comisión
+    en %, o None si margen + comisión llega al 100%.
+    """
+    denominador = 1 - ((margen + comision) / 100)
+    if denominador <= 0:
+        return None
+    precio_sugerido = costo_total_unitario / denominador
+    itbms_item = precio_sugerido * TASA_ITBMS
+    return precio_sugerido, itbms_item, precio_sugerido + itbms_item
+
+
+def leer_catalogo(contenido):
+    """Catálogo a partir de los bytes de un CSV o Parquet (se detecta por la firma)."""
+    if contenido[:4] == MAGIA_PARQUET:
+        df = pd.read_parquet(io.BytesIO(contenido))
+    else:
+        df = pd.read_csv(io.BytesIO(contenido))
+    faltantes = [c for c in COLUMNAS_CATALOGO if c not in df.columns]
+    if faltantes:
+        raise ValueError(f"Faltan columnas: {', '.join(faltantes)} (se esperan {', '.join(COLUMNAS_CATALOGO)})")
+    return df[[c for c in (*COLUMNAS_CATALOGO, *COLUMNAS_OPCIONALES) if c in df.columns]]
+
+
+def cargar_catalogo(contenido):
+    """leer_catalogo una sola vez por contenido de archivo."""
+    return _CACHE_CATALOGOS.obtener_o_calcular(huella_contenido(contenido), lambda: leer_catalogo(contenido))
+
+
+def precios_catalogo(catalogo, gastos_operativos_mes, salario_base=0.0, margen=30.0, comision=0.0):
+    """
+    Costo unitario y precio de venta de todos los productos del catálogo.
+
+    Replica el orden de operaciones de las funciones escalares para que
+    cada producto dé el mismo número que en la pestaña. `salario_base`,
+    `margen` y `comision` se usan en los productos que no los traen.
+    Los productos con margen + comisión >= 100% quedan sin precio (NaN).
+    """
+    def columna(nombre, defecto):
+        if nombre not in catalogo:
+            return np.full(len(catalogo), float(defecto))
+        return pd.to_numeric(catalogo[nombre], errors="coerce").fillna(defecto).to_numpy(dtype=float)
+
+    materiales = pd.to_numeric(catalogo['Costo Materiales'], errors="coerce").fillna(0.0).to_numpy(dtype=float)
+    minutos = pd.to_numeric(catalogo['Minutos'], errors="coerce").fillna(0.0).to_numpy(dtype=float)
+    capacidad = pd.to_numeric(catalogo['Capacidad'], errors="coerce").fillna(0.0).to_numpy(dtype=float)
+    salario = columna('Salario Base', salario_base)
+    margen_pct = columna('Margen %', margen)
+    comision_pct = columna('Comision %', comision)
+
+    costo_mod = salario / MINUTOS_MES * minutos
+    carga_fijos = np.divide(gastos_operativos_mes, capacidad, out=np.zeros(len(capacidad)), where=capacidad > 0)
+    costo_unitario = materiales + costo_mod + carga_fijos
+
+    denominador = 1 - ((margen_pct + comision_pct) / 100)
+    viable = denominador > 0
+    precio_sugerido = np.divide(costo_unitario, denominador, out=np.full(len(denominador), np.nan), where=viable)
+    itbms = precio_sugerido * TASA_ITBMS
+
+    # Un solo DataFrame nuevo (agregar columna por columna cuesta más que el cálculo)
+    columnas = {c: catalogo[c] for c in catalogo.columns if c not in COLUMNAS_OPCIONALES}
+    columnas.update({'Salario Base': salario, 'Margen %': margen_pct, 'Comision %': comision_pct})
+    columnas.update(zip(COLUMNAS_PRECIO, (costo_mod, carga_fijos, costo_unitario, precio_sugerido, itbms,
+                                          precio_sugerido + itbms, precio_sugerido - costo_unitario)))
+    return pd.DataFrame(columnas, index=catalogo.index)
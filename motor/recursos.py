@@ -0,0 +1,58 @@
+# ==========================================
+# 🎨 RECURSOS ESTÁTICOS DE LA APP
+# ==========================================
+# Textos y archivos que no dependen de la sesión: se construyen una vez por
+# proceso (al importar o al primer uso) y los comparten todas las sesiones,
+# en lugar de rehacerse en cada rerun del script.
+import pandas as pd
+
+from motor.cache import CacheLRU, memoizar
+from motor.historico import MESES
+
+_CACHE_RECURSOS = CacheLRU(4)
+
+# ESTILOS CSS (DISEÑO VISUAL RECUPERADO)
+CSS_APP = """
+    <style>
+    /* Estilos Generales */
+    .metric-card { background-color: #ffffff; padding: 20px; border-radius: 10px; border-left: 5px solid #1565c0; box-shadow: 0 4px 6px rgba(0,0,0,0.1); }
+    
+    /* Cajas de Diagnóstico (Tab 1) */
+    .power-level-title { font-size: 16px; font-weight: bold; color: #1565c0; margin-top: 15px; margin-bottom: 5px; text-transform: uppercase; }
+    .power-value { font-size: 22px; font-weight: bold; color: #000000; margin-bottom: 5px; }
+    
+    .check-box-success { 
+        background-color: #2e7d32; color: white; padding: 10px; border-radius: 5px; 
+        font-weight: bold; display: flex; align-items: center; margin-bottom: 10px; border-left: 5px solid #1b5e20;
+    }
+    .check-box-warning { 
+        background-color: #fbc02d; color: black; padding: 10px; border-radius: 5px; 
+        font-weight: bold; display: flex; align-items: center; margin-bottom: 10px; border-left: 5px solid #f57f17;
+    }
+    .check-box-danger { 
+        background-color: #c62828; color: white; padding: 10px; border-radius: 5px; 
+        font-weight: bold; display: flex; align-items: center; margin-bottom: 10px; border-left: 5px solid #b71c1c;
+    }
+
+    /* Estilos Nuevos V2.5 */
+    .verdict-box { background-color: #263238; color: #ffffff; padding: 20px; border-radius: 10px; margin-bottom: 20px; border-left: 8px solid #ffca28; box-shadow: 0 4px 10px rgba(0,0,0,0.2); }
+    .money-trap { background-color: #ffebee; padding: 20px; border-radius: 10px; border-left: 5px solid #c62828; }
+    .valuation-box { background-color: #e3f2fd; padding: 20px; border-radius: 10px; border-left: 5px solid #1565c0; }
+    .legal-footer { font-size: 10px; color: #777; margin-top: 10px; font-style: italic; border-top: 1px solid #ddd; padding-top: 5px;}
+    </style>
+    """
+
+# Valores de ejemplo de cada mes de la plantilla descargable
+VALORES_PLANTILLA = {
+    'Ventas': 50000, 'Costo_Ventas': 30000,
+    'Alquiler': 5000, 'Planilla': 8000, 'Otros_Gastos': 2000,
+    'Depreciacion': 2000, 'Intereses': 1000, 'Impuestos': 1500,
+}
+
+
+@memoizar(_CACHE_RECURSOS)
+def plantilla_csv(anio):
+    """Bytes de plantilla_sg_consulting.csv: 12 meses de ejemplo del año dado."""
+    df_plantilla = pd.DataFrame({'Mes': [f"{m} {anio}" for m in MESES],
+                                 **{columna: [valor] * 12 for columna, valor in VALORES_PLANTILLA.items()}})
+    return df_plantilla.to_csv(index=False).encode('utf-8')
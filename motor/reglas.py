@@ -0,0 +1,147 @@
+# ==========================================
+# ⚖️ MOTOR DE REGLAS (JUEZ DIGITAL Y SEMÁFORO)
+# ==========================================
+"""
+Tabla declarativa con todos los umbrales del diagnóstico: veredicto del
+Juez Digital, Plan de Choque, alertas de las pestañas y bandas de color
+de los relojes. La app, el reporte PDF y los procesos por lotes leen de
+aquí, así que un umbral se cambia en un solo lugar.
+
+Cada regla se compila una vez a (indicador, operador, umbral). El mismo
+operador sirve para un valor suelto o para un arreglo NumPy de
+empresas x meses, así que evaluar un portafolio completo es una sola
+comparación por regla.
+
+Este módulo no importa numpy al cargarse: solo lo usan los métodos por
+arreglos (codigos_veredicto, evaluar_matriz). Los indicadores por
+columnas salen de financiero.calcular_diagnostico_matriz.
+"""
+import operator
+from dataclasses import dataclass
+
+VEREDICTO_EMERGENCIA = "INTERVENCIÓN DE EMERGENCIA. El negocio consume capital. Problema estructural."
+VEREDICTO_AGUJERO_NEGRO = "AGUJERO NEGRO. Rentable pero insolvente. Prioridad: Cobrar."
+VEREDICTO_INMOBILIARIO = "RIESGO INMOBILIARIO. Trabajas para pagar el local."
+VEREDICTO_SALUDABLE = "EMPRESA SALUDABLE Y ESCALABLE. Listo para crecer."
+
+GRUPO_VEREDICTO = "veredicto"
+GRUPO_ACCION = "accion"
+GRUPO_ALERTA = "alerta"
+
+OPERADORES = {'<': operator.lt, '<=': operator.le, '>': operator.gt, '>=': operator.ge}
+
+# Relojes del Semáforo: verde hasta el primer valor, ámbar hasta el segundo, rojo después
+BANDAS_SEMAFORO = {
+    'ratio_alquiler': (10.0, 15.0),
+    'ratio_planilla': (35.0, 45.0),
+}
+
+VERDE, AMBAR, ROJO = "verde", "ambar", "rojo"
+
+
+@dataclass(frozen=True)
+class Regla:
+    grupo: str
+    clave: str
+    indicador: str
+    operador: str
+    umbral: float
+    texto: str = ""
+    icono: str = ""
+
+
+# Veredicto: gana la primera que se cumple (si ninguna, VEREDICTO_SALUDABLE).
+# Acciones y alertas: se reportan todas las que se cumplen, en este orden.
+REGLAS = (
+    Regla(GRUPO_VEREDICTO, 'emergencia', 'ebitda_mes', '<', 0.0, VEREDICTO_EMERGENCIA, "🚨"),
+    Regla(GRUPO_VEREDICTO, 'agujero_negro', 'ccc', '>', 60.0, VEREDICTO_AGUJERO_NEGRO, "🕳️"),
+    Regla(GRUPO_VEREDICTO, 'inmobiliario', 'ratio_alquiler', '>', BANDAS_SEMAFORO['ratio_alquiler'][1], VEREDICTO_INMOBILIARIO, "🏢"),
+
+    Regla(GRUPO_ACCION, 'alquiler_alto', 'ratio_alquiler', '>', BANDAS_SEMAFORO['ratio_alquiler'][1], "🏢 **ALQUILER:** Renegociar contrato o subarrendar."),
+    Regla(GRUPO_ACCION, 'nomina_alta', 'ratio_planilla', '>', BANDAS_SEMAFORO['ratio_planilla'][1], "👥 **NÓMINA:** Revisar eficiencia y turnos."),
+    Regla(GRUPO_ACCION, 'cobertura_baja', 'cobertura_bancaria', '<', 1.5, "🏦 **DEUDA:** Detener deuda nueva."),
+    Regla(GRUPO_ACCION, 'liquidez_baja', 'prueba_acida', '<', 1.0, "🩸 **LIQUIDEZ:** Ejecutar rescate de caja."),
+
+    Regla(GRUPO_ALERTA, 'motor_debil', 'margen_ebitda', '<', 10.0),
+    Regla(GRUPO_ALERTA, 'escalable', 'margen_ebitda', '>', 15.0),
+    Regla(GRUPO_ALERTA, 'ccc_lento', 'ccc', '>', 60.0),
+    Regla(GRUPO_ALERTA, 'ccc_negativo', 'ccc', '<', 0.0),
+)
+VEREDICTO_DEFECTO = (VEREDICTO_SALUDABLE, "✅")
+
+
+def _valor(indicadores, nombre):
+    """Indicador desde un ResultadosFinancieros, un dict o un DataFrame."""
+    if hasattr(indicadores, '__dataclass_fields__'):
+        return getattr(indicadores, nombre)
+    return indicadores[nombre]
+
+
+class MotorReglas:
+    """
+    Reglas compiladas. `cumple`, `evaluar` y `juzgar` aceptan valores
+    sueltos; `evaluar_matriz` y `codigos_veredicto` aceptan arreglos de
+    cualquier forma (empresas, meses, empresas x meses).
+    """
+
+    def __init__(self, reglas=REGLAS, bandas=None):
+        self.reglas = tuple(reglas)
+        self.bandas = dict(BANDAS_SEMAFORO if bandas is None else bandas)
+        self._por_clave = {r.clave: r for r in self.reglas}
+        self._compiladas = {r.clave: (r.indicador, OPERADORES[r.operador], r.umbral) for r in self.reglas}
+        self._veredicto = [r for r in self.reglas if r.grupo == GRUPO_VEREDICTO]
+        self._acciones = [r for r in self.reglas if r.grupo == GRUPO_ACCION]
+        # Código de veredicto i -> (texto, icono); el último es el veredicto por defecto
+        self.veredictos = [(r.texto, r.icono) for r in self._veredicto] + [VEREDICTO_DEFECTO]
+        self.indicadores = sorted({r.indicador for r in self.reglas} | set(self.bandas))
+
+    def umbral(self, clave):
+        return self._por_clave[clave].umbral
+
+    def cumple(self, clave, indicadores):
+        nombre, comparar, umbral = self._compiladas[clave]
+        return comparar(_valor(indicadores, nombre), umbral)
+
+    def evaluar(self, indicadores, grupo=None):
+        """{clave: cumple} para todas las reglas (o solo las del grupo)."""
+        return {r.clave: self.cumple(r.clave, indicadores) for r in self.reglas if grupo is None or r.grupo == grupo}
+
+    def juzgar(self, indicadores):
+        """(veredicto, icono, acciones de choque) para una empresa."""
+        veredicto, icono = VEREDICTO_DEFECTO
+        for regla in self._veredicto:
+            if self.cumple(regla.clave, indicadores):
+                veredicto, icono = regla.texto, regla.icono
+                break
+        acciones = [r.texto for r in self._acciones if self.cumple(r.clave, indicadores)]
+        return veredicto, icono, acciones
+
+    def banda(self, indicador, valor):
+        """VERDE, AMBAR o ROJO según BANDAS_SEMAFORO (valor suelto)."""
+        verde, ambar = self.bandas[indicador]
+        return VERDE if valor <= verde else AMBAR if valor <= ambar else ROJO
+
+    def codigos_veredicto(self, indicadores):
+        """Índice en `self.veredictos` por elemento (gana la primera regla)."""
+        import numpy as np
+        condiciones = [np.asarray(self.cumple(r.clave, indicadores), dtype=bool) for r in self._veredicto]
+        forma = np.broadcast_shapes(*(c.shape for c in condiciones))
+        condiciones = [np.broadcast_to(c, forma) for c in condiciones]
+        return np.select(condiciones, list(range(len(condiciones))), default=len(condiciones))
+
+    def evaluar_matriz(self, indicadores):
+        """
+        Todas las reglas sobre arreglos: {clave: arreglo bool} más
+        'veredicto' (códigos) y 'n_acciones' (cuántas acciones de choque
+        dispara cada elemento).
+        """
+        import numpy as np
+        resultado = {r.clave: np.asarray(self.cumple(r.clave, indicadores), dtype=bool) for r in self.reglas}
+        resultado['veredicto'] = self.codigos_veredicto(indicadores)
+        resultado['n_acciones'] = sum(resultado[r.clave].astype(np.int64) for r in self._acciones)
+        return resultado
+
+
+# Compilado una sola vez al importar
+MOTOR_REGLAS = MotorReglas()
+
@@ -0,0 +1,337 @@
+# ==========================================
+# 📊 GENERADOR DE REPORTE "ULTIMATE CONSULTANT" (V FINAL)
+# ==========================================
+# Este motor genera un informe de 4-5 páginas con calidad de auditoría.
+# No depende de Streamlit: recibe todo en DatosReporte, así que corre igual
+# en la cola de trabajos de la app que en procesos por lotes.
+# fpdf se importa al generar el primer informe, no al arrancar la app.
+from dataclasses import dataclass
+from datetime import datetime
+
+from motor.financiero import EntradasFinancieras, calcular_diagnostico
+from motor.reglas import MOTOR_REGLAS
+from motor.trabajos import ColaTrabajos
+
+# Hilos que generan informes a la vez (por proceso, compartidos entre sesiones)
+MAX_TRABAJADORES_PDF = 2
+
+
+@dataclass(frozen=True)
+class DatosReporte:
+    """
+    Todo lo que necesita el informe. `periodo` es la línea de período del
+    Modo B (vacía en Modo A); `fecha` va en el pie (vacía = hoy). `nomina`
+    son las filas de planillas.resumen_reporte (vacío = sin sección de
+    nómina).
+    """
+    entradas: EntradasFinancieras
+    periodo: str = ""
+    fecha: str = ""
+    nomina: tuple = ()
+
+
+def generar_reporte_pdf(datos, progreso=None):
+    """
+    Bytes del INFORME DE SALUD FINANCIERA. `progreso(fraccion, etapa)` se
+    llama al pasar cada página.
+    """
+    from fpdf import FPDF
+
+    def avisar(fraccion, etapa):
+        if progreso is not None:
+            progreso(fraccion, etapa)
+
+    e = datos.entradas
+    kpis = calcular_diagnostico(e)
+    ventas_mes, costo_ventas_mes = e.ventas_mes, e.costo_ventas_mes
+    cuentas_cobrar, inventario, deuda_bancaria = e.cuentas_cobrar, e.inventario, e.deuda_bancaria
+    multiplo_global = e.multiplo_global
+    utilidad_bruta_mes, gastos_operativos_mes = kpis.utilidad_bruta_mes, kpis.gastos_operativos_mes
+    ebitda_mes, margen_ebitda, utilidad_neta_mes = kpis.ebitda_mes, kpis.margen_ebitda, kpis.utilidad_neta_mes
+    punto_equilibrio_mes = kpis.punto_equilibrio_mes
+    veredicto_final = kpis.veredicto_final
+
+    class PDF(FPDF):
+        def header(self):
+            # Banner Superior Azul Oscuro
+            self.set_fill_color(26, 35, 126) # Azul Navy
+            self.rect(0, 0, 210, 35, 'F')
+            
+            # Títulos
+            self.set_y(10)
+            self.set_font('Arial', 'B', 20)
+            self.set_text_color(255)
+            self.cell(0, 10, 'INFORME DE SALUD FINANCIERA', 0, 1, 'R')
+            self.set_font('Arial', '', 10)
+            self.cell(0, 5, 'SG CONSULTING | DIVISIÓN DE ESTRATEGIA', 0, 1, 'R')
+            self.ln(15)
+
+        def footer(self):
+            self.set_y(-15)
+            self.set_font('Arial', 'I', 8)
+            self.set_text_color(128)
+            fecha = datos.fecha or datetime.now().strftime("%d/%m/%Y")
+            self.cell(0, 10, f'Confidencial - Generado el {fecha} | Página {self.page_no()}', 0, 0, 'C')
+
+        # --- UTILIDADES GRÁFICAS ---
+        def chapter_title(self, num, label):
+            self.set_font('Arial', 'B', 14)
+            self.set_fill_color(230, 230, 230)
+            self.set_text_color(0)
+            self.ln(5)
+            self.cell(0, 10, f"  {num}. {label.upper()}", 0, 1, 'L', 1)
+            self.ln(5)
+
+        def draw_kpi_box(self, x, y, title, value, status_color, subtitle):
+            self.set_xy(x, y)
+            self.set_fill_color(255, 255, 255)
+            self.set_draw_color(200, 200, 200)
+            self.rect(x, y, 45, 30) # Caja
+            
+            # Título
+            self.set_xy(x, y+2)
+            self.set_font('Arial', 'B', 8)
+            self.set_text_color(100)
+            self.cell(45, 5, title, 0, 1, 'C')
+            
+            # Valor
+            self.set_xy(x, y+8)
+            self.set_font('Arial', 'B', 14)
+            # Color del Texto según Estado
+            if status_color == 'R': self.set_text_color(198, 40, 40)
+            elif status_color == 'A': self.set_text_color(255, 143, 0)
+            else: self.set_text_color(46, 125, 50)
+            self.cell(45, 10, value, 0, 1, 'C')
+            
+            # Subtítulo (Diagnóstico corto)
+            self.set_xy(x, y+20)
+            self.set_font('Arial', '', 7)
+            self.set_text_color(80)
+            self.cell(45, 5, subtitle, 0, 1, 'C')
+
+        def draw_bar_chart_row(self, label, value, max_val, color_rgb):
+            # Simula una barra de gráfico horizontal
+            self.set_font('Arial', '', 10)
+            self.set_text_color(0)
+            self.cell(50, 8, label, 0, 0)
+            
+            # Calcular ancho barra
+            if max_val > 0:
+                bar_w = (value / max_val) * 100 # 100mm max width
+            else:
+                bar_w = 1
+            
+            # Dibujar barra
+            self.set_fill_color(color_rgb[0], color_rgb[1], color_rgb[2])
+            current_y = self.get_y()
+            current_x = self.get_x()
+            self.rect(current_x, current_y+1, bar_w, 6, 'F')
+            
+            # Valor texto al final
+            self.set_xy(current_x + bar_w + 2, current_y)
+            self.cell(30, 8, f"${value:,.0f}", 0, 1)
+
+    avisar(0.05, "Resumen ejecutivo")
+    pdf = PDF()
+    pdf.add_page()
+
+    # ===================== PÁGINA 1: RESUMEN EJECUTIVO =====================
+    
+    # 1.1 INTRODUCCIÓN
+    pdf.set_font('Arial', '', 11)
+    pdf.multi_cell(0, 6, "El siguiente informe presenta un diagnóstico profundo de la salud operativa, financiera y de solvencia de la empresa. Los datos han sido sometidos a pruebas de estrés para identificar riesgos ocultos.")
+    if datos.periodo:
+        pdf.set_font('Arial', 'I', 10)
+        pdf.multi_cell(0, 6, datos.periodo)
+    
+    # 1.2 EL VEREDICTO (TEXTO GRANDE)
+    pdf.ln(5)
+    pdf.set_font('Arial', 'B', 12)
+    pdf.set_fill_color(255, 235, 238) # Fondo suave alerta
+    pdf.cell(0, 10, "  VEREDICTO DEL ANALISTA:", 0, 1, 'L', 1)
+    
+    pdf.set_font('Arial', 'I', 12)
+    pdf.set_text_color(50)
+    pdf.multi_cell(0, 8, f"\"{veredicto_final}\"")
+    pdf.ln(5)
+
+    # 1.3 TABLERO DE CONTROL (KPIs SEMÁFORO)
+    pdf.chapter_title(1, "Signos Vitales (KPIs)")
+    
+    # Mismas reglas que el Semáforo de la app (motor.reglas)
+    r_alq = kpis.ratio_alquiler
+    r_nom = kpis.ratio_planilla
+    r_acid = kpis.prueba_acida
+    alerta = MOTOR_REGLAS.evaluar(kpis)
+    
+    # Fila de 4 Cajas
+    y_start = pdf.get_y() + 5
+    pdf.draw_kpi_box(10, y_start, "Eficiencia Renta", f"{r_alq:.1f}%", 'R' if alerta['alquiler_alto'] else 'V', f"Meta: <{MOTOR_REGLAS.umbral('alquiler_alto'):.0f}%")
+    pdf.draw_kpi_box(60, y_start, "Peso Nómina", f"{r_nom:.1f}%", 'R' if alerta['nomina_alta'] else 'V', f"Meta: <{MOTOR_REGLAS.umbral('nomina_alta'):.0f}% (UB)")
+    pdf.draw_kpi_box(110, y_start, "Prueba Ácida", f"{r_acid:.2f}x", 'R' if alerta['liquidez_baja'] else 'V', "Liquidez Real")
+    pdf.draw_kpi_box(160, y_start, "Margen EBITDA", f"{margen_ebitda:.1f}%", 'R' if alerta['motor_debil'] else 'V', "Potencia Operativa")
+    
+    pdf.set_y(y_start + 35)
+
+    # ===================== PÁGINA 1 (Cont): CASCADA =====================
+    pdf.chapter_title(2, "Estructura de Resultados (P&L)")
+    
+    # Dibujamos "Gráfico" de Barras nativo
+    pdf.draw_bar_chart_row("Ventas Totales", ventas_mes, ventas_mes, (33, 150, 243)) # Azul
+    pdf.draw_bar_chart_row("Utilidad Bruta", utilidad_bruta_mes, ventas_mes, (100, 100, 100)) # Gris
+    pdf.draw_bar_chart_row("Gastos Operativos", gastos_operativos_mes, ventas_mes, (239, 83, 80)) # Rojo
+    pdf.draw_bar_chart_row("EBITDA (Caja)", ebitda_mes, ventas_mes, (76, 175, 80) if ebitda_mes > 0 else (255, 152, 0)) # Verde/Naranja
+    pdf.draw_bar_chart_row("Utilidad Neta", utilidad_neta_mes, ventas_mes, (21, 101, 192)) # Azul Oscuro
+    
+    pdf.ln(5)
+    # Tabla Detallada
+    pdf.set_font('Arial', 'B', 10)
+    pdf.cell(100, 8, "Concepto", 1); pdf.cell(50, 8, "Monto ($)", 1, 1, 'C')
+    pdf.set_font('Arial', '', 10)
+    pdf.cell(100, 6, "Ingresos Operativos", 1); pdf.cell(50, 6, f"${ventas_mes:,.2f}", 1, 1, 'R')
+    pdf.cell(100, 6, "(-) Costos Variables", 1); pdf.cell(50, 6, f"${costo_ventas_mes:,.2f}", 1, 1, 'R')
+    pdf.cell(100, 6, "(-) Gastos Estructurales", 1); pdf.cell(50, 6, f"${gastos_operativos_mes:,.2f}", 1, 1, 'R')
+    pdf.set_font('Arial', 'B', 10)
+    pdf.cell(100, 6, "(=) EBITDA Normalizado", 1); pdf.cell(50, 6, f"${ebitda_mes:,.2f}", 1, 1, 'R')
+
+    # ===================== PÁGINA 2: ANÁLISIS PROFUNDO =====================
+    avisar(0.4, "Solvencia y valoración")
+    pdf.add_page()
+    pdf.chapter_title(3, "Diagnóstico de Solvencia & Caja")
+    
+    # 3.1 DINERO ATRAPADO
+    dinero_atrapado = kpis.dinero_atrapado_total
+    pdf.set_font('Arial', '', 11)
+    pdf.cell(0, 10, "Análisis del Ciclo de Conversión de Efectivo (CCC):", 0, 1)
+    
+    # Caja de Dinero Atrapado
+    pdf.set_fill_color(245, 245, 245)
+    pdf.rect(10, pdf.get_y(), 190, 25, 'F')
+    pdf.set_x(15)
+    pdf.set_font('Arial', 'B', 12); pdf.set_text_color(198, 40, 40)
+    pdf.cell(90, 10, "CAPITAL INMOVILIZADO:", 0, 0)
+    pdf.set_font('Arial', 'B', 16)
+    pdf.cell(50, 10, f"${dinero_atrapado:,.2f}", 0, 1)
+    
+    pdf.set_x(15); pdf.set_font('Arial', 'I', 10); pdf.set_text_color(80)
+    pdf.cell(0, 8, f"Desglose: ${cuentas_cobrar:,.0f} en Clientes + ${inventario:,.0f} en Inventario.", 0, 1)
+    pdf.ln(10)
+    
+    # 3.2 PUNTO DE EQUILIBRIO
+    pdf.set_text_color(0)
+    pdf.cell(0, 8, f"Punto de Equilibrio Mensual: ${punto_equilibrio_mes:,.2f}", 0, 1)
+    pdf.set_font('Arial', '', 10)
+    if ventas_mes > punto_equilibrio_mes:
+        diff = ventas_mes - punto_equilibrio_mes
+        pdf.multi_cell(0, 5, f"STATUS: SUPERAVIT. Usted vende ${diff:,.0f} por encima de su necesidad mínima. La empresa genera valor.")
+    else:
+        diff = punto_equilibrio_mes - ventas_mes
+        pdf.multi_cell(0, 5, f"STATUS: DEFICIT. Usted necesita vender ${diff:,.0f} adicionales solo para no perder dinero.")
+
+    # 3.3 VALORACIÓN
+    pdf.ln(5)
+    pdf.chapter_title(4, "Valoración Estimada de Mercado")
+    
+    valor_negocio_est = kpis.valor_empresa_actual_base
+    patrimonio_est = kpis.patrimonio_estimado # Simplificado
+    
+    pdf.set_font('Arial', '', 11)
+    pdf.cell(0, 8, f"Basado en un múltiplo de mercado de {multiplo_global}x EBITDA Anualizado:", 0, 1)
+    
+    # Tabla Valoración
+    pdf.set_fill_color(227, 242, 253) # Azul muy claro
+    pdf.rect(60, pdf.get_y()+2, 90, 30, 'F')
+    pdf.set_y(pdf.get_y()+5)
+    
+    pdf.set_x(60)
+    pdf.set_font('Arial', 'B', 12)
+    pdf.cell(90, 8, f"VALOR OPERATIVO: ${valor_negocio_est:,.0f}", 0, 1, 'C')
+    pdf.set_x(60)
+    pdf.set_font('Arial', '', 10)
+    pdf.cell(90, 6, f"(-) Deuda Bancaria: ${deuda_bancaria:,.0f}", 0, 1, 'C')
+    pdf.set_x(60)
+    pdf.set_font('Arial', 'B', 14); pdf.set_text_color(21, 101, 192)
+    pdf.cell(90, 10, f"PATRIMONIO NETO: ${patrimonio_est:,.0f}", 0, 1, 'C')
+    pdf.set_text_color(0)
+    pdf.ln(10)
+
+    # 3.4 REALIDAD DE NÓMINA (planilla del editor o guardada del cliente)
+    if datos.nomina:
+        pdf.chapter_title(5, "Realidad de Nómina")
+        anchos = (70, 20, 35, 35, 30)
+        pdf.set_font('Arial', 'B', 9)
+        for ancho, titulo in zip(anchos, ("Rol", "Empleados", "Costo Empresa", "Bolsillo", "Retenciones")):
+            pdf.cell(ancho, 7, titulo, 1, 0, 'C')
+        pdf.ln()
+        pdf.set_font('Arial', '', 9)
+        for rol, empleados, costo, neto, retenciones in datos.nomina:
+            pdf.cell(anchos[0], 6, rol.encode('latin-1', 'replace').decode('latin-1')[:40], 1)
+            pdf.cell(anchos[1], 6, f"{empleados:,}", 1, 0, 'R')
+            for ancho, valor in zip(anchos[2:], (costo, neto, retenciones)):
+                pdf.cell(ancho, 6, f"${valor:,.2f}", 1, 0, 'R')
+            pdf.ln()
+        totales = [sum(fila[i] for fila in datos.nomina) for i in range(1, 5)]
+        pdf.set_font('Arial', 'B', 9)
+        pdf.cell(anchos[0], 6, "TOTAL", 1)
+        pdf.cell(anchos[1], 6, f"{totales[0]:,}", 1, 0, 'R')
+        for ancho, valor in zip(anchos[2:], totales[1:]):
+            pdf.cell(ancho, 6, f"${valor:,.2f}", 1, 0, 'R')
+        pdf.ln()
+
+    # ===================== PÁGINA 3: PLAN DE ACCIÓN =====================
+    avisar(0.7, "Plan de choque")
+    pdf.add_page()
+    pdf.set_fill_color(183, 28, 28) # Rojo
+    pdf.rect(0, 0, 210, 30, 'F')
+    pdf.set_y(10)
+    pdf.set_font('Arial', 'B', 16); pdf.set_text_color(255)
+    pdf.cell(0, 10, "PLAN DE CHOQUE ESTRATÉGICO", 0, 1, 'C')
+    pdf.ln(25)
+    
+    pdf.set_text_color(0)
+    pdf.set_font('Arial', 'I', 11)
+    pdf.multi_cell(0, 8, "Basado en las alertas detectadas, se prescriben las siguientes acciones inmediatas de cumplimiento obligatorio para garantizar la continuidad del negocio.")
+    pdf.ln(5)
+    
+    # Recuperar Plan de Choque
+    acciones = kpis.acciones_choque
+    
+    for i, accion in enumerate(acciones, 1):
+        # Limpieza Markdown
+        txt = accion.replace("**", "").replace("🔴", "").replace("⚠️", "[ALERTA]").replace("🏢", "").replace("👥", "").replace("✨", "").replace("🏦", "").replace("🩸", "")
+        txt = txt.encode('latin-1', 'replace').decode('latin-1')
+        
+        # Caja de Acción
+        pdf.set_fill_color(255, 255, 255)
+        pdf.set_draw_color(0)
+        pdf.set_line_width(0.5)
+        
+        current_y = pdf.get_y()
+        # Icono numérico
+        pdf.set_font('Arial', 'B', 16); pdf.set_text_color(183, 28, 28)
+        pdf.text(10, current_y + 8, f"{i}")
+        
+        # Texto
+        pdf.set_x(20)
+        pdf.set_font('Arial', '', 11); pdf.set_text_color(0)
+        pdf.multi_cell(180, 6, txt)
+        pdf.ln(5)
+        
+        # Línea separadora
+        pdf.set_draw_color(200, 200, 200)
+        pdf.line(10, pdf.get_y(), 200, pdf.get_y())
+        pdf.ln(5)
+
+    # ===================== FIRMA Y DISCLAIMER =====================
+    pdf.ln(15)
+    pdf.set_font('Arial', 'I', 8); pdf.set_text_color(100)
+    pdf.multi_cell(0, 4, "AVISO LEGAL: Este reporte es un diagnóstico automatizado basado en la información provista. SG Consulting no se hace responsable por decisiones tomadas sin la validación de un contador público autorizado.")
+    
+    avisar(0.9, "Generando PDF")
+    contenido = pdf.output(dest='S').encode('latin-1', 'replace')
+    avisar(1.0, "Listo")
+    return contenido
+
+
+# Cola única del proceso: todas las sesiones comparten hilos y resultados
+COLA_REPORTES = ColaTrabajos(generar_reporte_pdf, max_trabajadores=MAX_TRABAJADORES_PDF)
@@ -0,0 +1,184 @@
+# ==========================================
+# 🎲 SIMULADOR ESTRATÉGICO ESTOCÁSTICO (MONTE CARLO)
+# ==========================================
+# Las tres palancas del Simulador (precio, recorte de fijos y volumen) se
+# sortean de distribuciones y se evalúan todas a la vez como arreglos NumPy,
+# con exactamente las mismas fórmulas que el escenario determinístico.
+from dataclasses import dataclass
+
+import numpy as np
+
+from motor.cache import CacheLRU, memoizar
+
+META_LEGADO = 15.0  # Margen EBITDA (%) de un "Negocio de Legado"
+TIPOS_DISTRIBUCION = ["Triangular", "Uniforme", "Normal"]
+
+# Solo guarda resúmenes (percentiles e histogramas), no los escenarios
+_CACHE_SIMULACIONES = CacheLRU(16)
+
+
+@dataclass(frozen=True)
+class Palanca:
+    """Rango de una palanca en % (mínimo, más probable y máximo)."""
+    minimo: float
+    probable: float
+    maximo: float
+
+
+@dataclass(frozen=True)
+class ResultadoMontecarlo:
+    """Resumen de la simulación; los histogramas son (centros, conteos)."""
+    histograma_ebitda: tuple
+    histograma_margen: tuple
+    percentiles_ebitda: dict
+    percentiles_margen: dict
+    prob_legado: float
+    prob_perdida: float
+
+
+def muestrear(palanca, tipo, n, rng):
+    """
+    Sortea n valores (%) de la palanca. Normal usa `probable` como media y el
+    rango mín-máx como ±3 desviaciones.
+    """
+    minimo, probable, maximo = palanca.minimo, palanca.probable, palanca.maximo
+    if maximo <= minimo:
+        return np.full(n, float(probable))
+    if tipo == "Uniforme":
+        return rng.uniform(minimo, maximo, n)
+    if tipo == "Normal":
+        return rng.normal(probable, (maximo - minimo) / 6, n)
+    return rng.triangular(minimo, min(max(probable, minimo), maximo), maximo, n)
+
+
+def evaluar_escenarios(base_ventas, base_cv, base_fijos, delta_precio, delta_costos, delta_volumen):
+    """
+    Versión vectorizada del motor del Simulador: cada delta (%) puede ser un
+    escalar o un arreglo y el resultado se difunde (broadcasting) entre ellos.
+    Devuelve (sim_ventas, sim_cv, sim_fijos, sim_ebitda, sim_margen).
+    """
+    f_precio = 1 + (np.asarray(delta_precio, dtype=float) / 100)
+    f_costos_fijos = 1 - (np.asarray(delta_costos, dtype=float) / 100)
+    f_volumen = 1 + (np.asarray(delta_volumen, dtype=float) / 100)
+
+    sim_ventas = base_ventas * f_precio * f_volumen
+    sim_cv = base_cv * f_volumen
+    sim_fijos = base_fijos * f_costos_fijos
+
+    sim_ebitda = sim_ventas - sim_cv - sim_fijos
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sim_margen = np.where(sim_ventas > 0, (sim_ebitda / sim_ventas) * 100, 0.0)
+    return sim_ventas, sim_cv, sim_fijos, sim_ebitda, sim_margen
+
+
+@memoizar(_CACHE_SIMULACIONES)
+def simular_montecarlo(base_ventas, base_cv, base_fijos, precio, costos, volumen,
+                       tipo="Triangular", n_escenarios=100_000, semilla=2026):
+    """
+    Corre n_escenarios sorteando precio, recorte de fijos y volumen (Palanca
+    en %) y resume la distribución de EBITDA y margen. Los escenarios no se
+    conservan: con 1.000.000 pesarían ~16 MB por resultado en caché.
+    """
+    rng = np.random.default_rng(semilla)
+    # Límites físicos: el precio y el volumen no bajan de cero, el recorte no pasa del 100%
+    delta_precio = np.maximum(muestrear(precio, tipo, n_escenarios, rng), -100)
+    delta_costos = np.minimum(muestrear(costos, tipo, n_escenarios, rng), 100)
+    delta_volumen = np.maximum(muestrear(volumen, tipo, n_escenarios, rng), -100)
+
+    _, _, _, ebitda, margen = evaluar_escenarios(base_ventas, base_cv, base_fijos, delta_precio, delta_costos, delta_volumen)
+
+    p_ebitda = np.percentile(ebitda, [5, 50, 95])
+    p_margen = np.percentile(margen, [5, 50, 95])
+    return ResultadoMontecarlo(
+        histograma_ebitda=histograma(ebitda),
+        histograma_margen=histograma(margen),
+        percentiles_ebitda=dict(zip(("P5", "P50", "P95"), p_ebitda.tolist())),
+        percentiles_margen=dict(zip(("P5", "P50", "P95"), p_margen.tolist())),
+        prob_legado=float(np.mean(margen >= META_LEGADO)),
+        prob_perdida=float(np.mean(ebitda < 0)),
+    )
+
+
+def histograma(valores, bins=60):
+    """Conteos y centros de clase: el navegador recibe `bins` barras, no 100k puntos."""
+    conteos, bordes = np.histogram(valores, bins=bins)
+    return (bordes[:-1] + bordes[1:]) / 2, conteos
+
+
+# ==========================================
+# 🗺️ SUPERFICIE DE SENSIBILIDAD (PRECIO × COSTOS × VOLUMEN)
+# ==========================================
+# Todo el rango de las palancas del Simulador en una sola pasada vectorizada
+# (51 × 51 × 101 ≈ 260k combinaciones), calculada una vez por P&L base.
+RANGO_PRECIO = np.arange(0, 51)
+RANGO_COSTOS = np.arange(0, 51)
+RANGO_VOLUMEN = np.arange(-50, 51)
+
+_CACHE_SUPERFICIES = CacheLRU(8)
+
+
+@dataclass(frozen=True)
+class SuperficieSensibilidad:
+    """EBITDA y margen con ejes [precio, costos, volumen] (en %)."""
+    precios: np.ndarray
+    costos: np.ndarray
+    volumenes: np.ndarray
+    ebitda: np.ndarray
+    margen: np.ndarray
+
+    def indice(self, eje, valor):
+        return int(np.abs(eje - valor).argmin())
+
+
+@memoizar(_CACHE_SUPERFICIES)
+def superficie_sensibilidad(base_ventas, base_cv, base_fijos):
+    """
+    Evalúa toda la grilla de palancas con broadcasting: el resultado tiene
+    forma (len(RANGO_PRECIO), len(RANGO_COSTOS), len(RANGO_VOLUMEN)).
+    """
+    _, _, _, ebitda, margen = evaluar_escenarios(
+        base_ventas, base_cv, base_fijos,
+        RANGO_PRECIO[:, None, None], RANGO_COSTOS[None, :, None], RANGO_VOLUMEN[None, None, :]
+    )
+    return SuperficieSensibilidad(RANGO_PRECIO, RANGO_COSTOS, RANGO_VOLUMEN, ebitda, margen)
+
+
+def impacto_palancas(superficie):
+    """
+    Tornado: rango de EBITDA al mover cada palanca sola de punta a punta,
+    con las otras dos en su valor actual (0%). Ordenado de mayor a menor.
+    """
+    ip, ic, iv = superficie.indice(superficie.precios, 0), superficie.indice(superficie.costos, 0), superficie.indice(superficie.volumenes, 0)
+    base = float(superficie.ebitda[ip, ic, iv])
+    cortes = {
+        "💰 Precio": superficie.ebitda[:, ic, iv],
+        "✂️ Gastos Fijos": superficie.ebitda[ip, :, iv],
+        "📦 Volumen": superficie.ebitda[ip, ic, :],
+    }
+    impactos = [
+        {"Palanca": nombre, "Mínimo": float(serie.min()) - base, "Máximo": float(serie.max()) - base}
+        for nombre, serie in cortes.items()
+    ]
+    return base, sorted(impactos, key=lambda x: x["Máximo"] - x["Mínimo"], reverse=True)
+
+
+def combinacion_minima(superficie, meta=META_LEGADO):
+    """
+    Combinación de menor esfuerzo total (suma de |%| movidos) que alcanza la
+    meta de margen, o None si ninguna combinación de la grilla la alcanza.
+    """
+    cumple = superficie.margen >= meta
+    if not cumple.any():
+        return None
+    esfuerzo = (np.abs(superficie.precios)[:, None, None] + np.abs(superficie.costos)[None, :, None]
+                + np.abs(superficie.volumenes)[None, None, :])
+    esfuerzo = np.where(cumple, esfuerzo, np.inf)
+    ip, ic, iv = np.unravel_index(np.argmin(esfuerzo), esfuerzo.shape)
+    return {
+        "precio": int(superficie.precios[ip]),
+        "costos": int(superficie.costos[ic]),
+        "volumen": int(superficie.volumenes[iv]),
+        "ebitda": float(superficie.ebitda[ip, ic, iv]),
+        "margen": float(superficie.margen[ip, ic, iv]),
+        "cobertura": float(cumple.mean()),
+    }
@@ -0,0 +1,64 @@
+# ==========================================
+# 📉 SUBMUESTREO DE SERIES LARGAS (LTTB)
+# ==========================================
+"""
+Reduce series de miles de puntos a un número acotado conservando su
+forma (picos, valles y cruces), para no enviar al navegador más puntos de
+los que la pantalla puede mostrar.
+
+Largest-Triangle-Three-Buckets (Steinarsson, 2013): la serie se divide en
+cubetas y de cada una se conserva el punto que forma el triángulo de
+mayor área con el punto elegido antes y el promedio de la cubeta
+siguiente. El primer y el último punto siempre se conservan.
+"""
+import numpy as np
+
+# Por encima de este número de puntos los gráficos pasan a WebGL y se submuestrean
+UMBRAL_SERIE_GRANDE = 1000
+
+# Puntos que se conservan por serie en modo serie grande
+PUNTOS_POR_SERIE = 800
+
+
+def lttb(y, n_salida, x=None):
+    """
+    Índices (ordenados) de los `n_salida` puntos de `y` que LTTB conserva.
+    Si la serie ya es más corta, devuelve todos los índices. Los NaN se
+    tratan como 0 para elegir los puntos (los valores no se modifican).
+    """
+    y = np.nan_to_num(np.asarray(y, dtype=float))
+    n = len(y)
+    if n_salida >= n or n_salida < 3:
+        return np.arange(n)
+    x = np.arange(n, dtype=float) if x is None else np.asarray(x, dtype=float)
+
+    # n_salida - 2 cubetas para los puntos interiores [1, n - 1)
+    bordes = np.linspace(1, n - 1, n_salida - 1).astype(np.int64)
+    bordes = np.append(bordes, n)
+    indices = np.empty(n_salida, dtype=np.int64)
+    indices[0], indices[-1] = 0, n - 1
+
+    a = 0
+    for i in range(n_salida - 2):
+        inicio, fin = bordes[i], bordes[i + 1]
+        sig_inicio, sig_fin = bordes[i + 1], bordes[i + 2]
+        x_prom = x[sig_inicio:sig_fin].mean()
+        y_prom = y[sig_inicio:sig_fin].mean()
+        xs, ys = x[inicio:fin], y[inicio:fin]
+        # El factor 1/2 del área no cambia el argmax
+        areas = np.abs((x[a] - x_prom) * (ys - y[a]) - (x[a] - xs) * (y_prom - y[a]))
+        a = inicio + int(np.argmax(areas))
+        indices[i + 1] = a
+    return indices
+
+
+def indices_submuestreo(df, columnas, n_por_serie=PUNTOS_POR_SERIE, obligatorios=()):
+    """
+    Unión ordenada de los índices LTTB de cada columna más los índices
+    `obligatorios` (posiciones, ej. un punto de cruce). Todas las trazas
+    comparten los mismos puntos del eje X, así el hover unificado sigue
+    alineado. A lo sumo len(columnas) * n_por_serie + len(obligatorios) puntos.
+    """
+    seleccion = [lttb(df[c].to_numpy(), n_por_serie) for c in columnas]
+    seleccion.append(np.asarray(obligatorios, dtype=np.int64))
+    return np.unique(np.concatenate(seleccion))
@@ -0,0 +1,109 @@
+# ==========================================
+# ⏳ COLA DE TRABAJOS EN SEGUNDO PLANO
+# ==========================================
+"""
+Corre cálculos lentos (ej. el informe PDF) fuera del ciclo de Streamlit,
+así la interfaz sigue respondiendo mientras se generan.
+
+Un único pool de hilos acotado por cola, compartido por todas las
+sesiones del proceso: muchos usuarios pulsando el botón a la vez no
+lanzan más de `max_trabajadores` cálculos simultáneos, el resto espera
+en cola. Cada trabajo se identifica por la huella de sus argumentos, de
+modo que pedir dos veces lo mismo devuelve el trabajo en curso o el
+resultado ya cacheado en lugar de recalcularlo.
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+from motor.cache import CacheLRU, huella_entradas
+
+EN_COLA = "en_cola"
+EN_PROCESO = "en_proceso"
+LISTO = "listo"
+ERROR = "error"
+
+
+@dataclass
+class Trabajo:
+    id: str
+    estado: str = EN_COLA
+    progreso: float = 0.0
+    etapa: str = ""
+    resultado: object = None
+    error: str = ""
+    creado: float = field(default_factory=time.monotonic)
+    iniciado: float = 0.0
+    terminado: float = 0.0
+
+    @property
+    def activo(self):
+        return self.estado in (EN_COLA, EN_PROCESO)
+
+    @property
+    def espera_s(self):
+        """Segundos en cola antes de empezar."""
+        return (self.iniciado or time.monotonic()) - self.creado
+
+    @property
+    def duracion_s(self):
+        """Segundos de cálculo (hasta ahora, si sigue en proceso)."""
+        if not self.iniciado:
+            return 0.0
+        return (self.terminado or time.monotonic()) - self.iniciado
+
+
+class ColaTrabajos:
+    """
+    Ejecuta `funcion(*args, progreso=...)` en un pool de hilos acotado.
+    `progreso(fraccion, etapa)` lo llama la función para informar avance.
+    Los trabajos terminados se guardan en un CacheLRU de `max_resultados`.
+    """
+
+    def __init__(self, funcion, max_trabajadores=2, max_resultados=64):
+        self.funcion = funcion
+        self._pool = ThreadPoolExecutor(max_workers=max_trabajadores, thread_name_prefix="sg-trabajo")
+        self._activos = {}
+        self._terminados = CacheLRU(max_resultados)
+        self._lock = threading.Lock()
+
+    def enviar(self, *args):
+        """
+        Encola el cálculo y devuelve el id del trabajo (la huella de `args`).
+        Si ya está en curso o terminado con éxito no se vuelve a calcular;
+        si terminó con error, se reintenta.
+        """
+        id_trabajo = huella_entradas(*args)
+        with self._lock:
+            if id_trabajo in self._activos:
+                return id_trabajo
+            anterior = self._terminados.obtener(id_trabajo)
+            if anterior is not None and anterior.estado == LISTO:
+                return id_trabajo
+            trabajo = Trabajo(id_trabajo)
+            self._activos[id_trabajo] = trabajo
+        self._pool.submit(self._ejecutar, trabajo, args)
+        return id_trabajo
+
+    def estado(self, id_trabajo):
+        """El Trabajo (en curso o terminado) o None si nunca se envió o ya se desalojó."""
+        with self._lock:
+            trabajo = self._activos.get(id_trabajo)
+        return trabajo if trabajo is not None else self._terminados.obtener(id_trabajo)
+
+    def _ejecutar(self, trabajo, args):
+        def progreso(fraccion, etapa=""):
+            trabajo.progreso, trabajo.etapa = fraccion, etapa
+
+        trabajo.estado, trabajo.iniciado = EN_PROCESO, time.monotonic()
+        try:
+            trabajo.resultado = self.funcion(*args, progreso=progreso)
+            trabajo.progreso, trabajo.estado = 1.0, LISTO
+        except Exception as e:
+            trabajo.error, trabajo.estado = str(e), ERROR
+        finally:
+            trabajo.terminado = time.monotonic()
+            with self._lock:
+                self._terminados.guardar(trabajo.id, trabajo)
+                self._activos.pop(trabajo.id, None)